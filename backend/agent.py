@@ -13,6 +13,21 @@ from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain_openai import ChatOpenAI
 from langgraph.prebuilt import create_react_agent
 import asyncio
+import logging
+
+# Support both `python agent.py` and importing as part of the backend package
+try:
+    from .resilience import get_breaker
+    from .http_pool import get_session
+    from .knowledge_base import knowledge_base_answer
+    from .token_registry import get_registry
+except ImportError:
+    from resilience import get_breaker
+    from http_pool import get_session
+    from knowledge_base import knowledge_base_answer
+    from token_registry import get_registry
+
+logger = logging.getLogger(__name__)
 
 # Initialize the tools
 tavily_tool = TavilySearchResults(max_results=5)
@@ -33,6 +48,16 @@ agent = Agent(name="RWA-GPT-Agent")
 
 async def search_web(query: str):
     """Search the web for a query and provide RWA-focused analysis and recommendations."""
+
+    # Fast path: common questions are answered from the local knowledge base
+    try:
+        local_answer = await asyncio.to_thread(knowledge_base_answer, query)
+    except Exception as e:
+        # A missing or corrupt index must not take search down; fall back to the web
+        logger.warning(f"Knowledge base lookup failed, using web search: {e}")
+        local_answer = None
+    if local_answer is not None:
+        return local_answer
     
     # Construct a specialized prompt for RWA analysis with clear formatting instructions
     prompt = f"""
@@ -63,13 +88,33 @@ async def search_web(query: str):
     try:
         # The create_react_agent expects a list of messages
         messages = [("human", prompt)]
-        response = await graph.ainvoke({"messages": messages})
+        with get_breaker("llm").protect() as timeout:
+            response = await asyncio.wait_for(graph.ainvoke({"messages": messages}), timeout=timeout)
         # The final answer is in the 'content' of the last message
         return response['messages'][-1].content
     except Exception as e:
         return f"Error searching web: {str(e)}"
 
 
+async def warm_agent(invoke: bool = False) -> dict:
+    """
+    Exercise the agent graph before the first search request.
+
+    Builds the graph's node/edge view and opens the OpenAI client's connection
+    pool with a model listing (no tokens used). With ``invoke`` it also runs
+    one short prompt through the graph, so the first real search skips the
+    graph runtime's first-call setup too (this costs a few tokens).
+
+    Returns:
+        {"nodes": graph node count, "invoked": bool}
+    """
+    nodes = len(graph.get_graph().nodes)
+    await model.root_async_client.models.list()
+    if invoke:
+        await graph.ainvoke({"messages": [("human", "Reply with the single word OK without using any tools.")]})
+    return {"nodes": nodes, "invoked": invoke}
+
+
 
 @agent.on_message(model=Message)
 async def handle_message(ctx: Context, sender: str, msg: Message) -> None:
@@ -131,9 +176,10 @@ def query_rwa_database(subgraph_url: str):
         api_key = os.getenv("SUBGRAPH_API_KEY")
         if api_key:
             headers["X-API-KEY"] = api_key
-        response = requests.post(subgraph_url, json=query, headers=headers, timeout=15)
-        response.raise_for_status()
-        data = response.json()
+        with get_breaker("subgraph").protect() as timeout:
+            response = get_session("subgraph").post(subgraph_url, json=query, headers=headers, timeout=timeout)
+            response.raise_for_status()
+            data = response.json()
         if isinstance(data, dict) and data.get("data") and data["data"].get("investments") is not None:
             return data["data"]["investments"]
         return None
@@ -141,6 +187,49 @@ def query_rwa_database(subgraph_url: str):
         return None
 
 
+def query_subgraph(subgraph_url: str, query: str, variables: Optional[dict] = None) -> dict:
+    """POST a GraphQL query to the subgraph and return its data, raising on errors."""
+    headers = {"Content-Type": "application/json"}
+    api_key = os.getenv("SUBGRAPH_API_KEY")
+    if api_key:
+        headers["X-API-KEY"] = api_key
+    with get_breaker("subgraph").protect() as timeout:
+        response = get_session("subgraph").post(
+            subgraph_url, json={"query": query, "variables": variables or {}}, headers=headers, timeout=timeout
+        )
+        response.raise_for_status()
+        payload = response.json()
+    if payload.get("errors"):
+        raise ValueError(f"Subgraph query failed: {payload['errors']}")
+    return payload.get("data") or {}
+
+
+def fetch_all_investments(subgraph_url: str, page_size: int = 1000) -> list:
+    """Return every indexed Invested event ({id, investor, amount, timestamp}), paging by id."""
+    query = """
+    query Investments($first: Int!, $lastId: ID!) {
+      investments(first: $first, orderBy: id, orderDirection: asc, where: { id_gt: $lastId }) {
+        id investor amount timestamp
+      }
+    }
+    """
+    investments = []
+    last_id = ""
+    while True:
+        page = query_subgraph(subgraph_url, query, {"first": page_size, "lastId": last_id}).get("investments") or []
+        investments.extend(page)
+        if len(page) < page_size:
+            return investments
+        last_id = page[-1]["id"]
+
+
+def fetch_latest_yield_distribution(subgraph_url: str) -> Optional[dict]:
+    """Return the most recent indexed YieldDistributed event ({id, amount, timestamp}), or None."""
+    query = "{ yieldDistributions(first: 1, orderBy: timestamp, orderDirection: desc) { id amount timestamp } }"
+    distributions = query_subgraph(subgraph_url, query).get("yieldDistributions") or []
+    return distributions[0] if distributions else None
+
+
 def get_1inch_swap_data(chain_id: int, src_token: str, dst_token: str, amount_human: str, src_token_decimals: int, from_address: str) -> dict:
     """
     Get swap data from 1inch API for specified EVM chain
@@ -164,9 +253,11 @@ def get_1inch_swap_data(chain_id: int, src_token: str, dst_token: str, amount_hu
         if oneinch_api_key:
             headers = {"Authorization": f"Bearer {oneinch_api_key}"}
             try:
-                response = requests.get(oneinch_url, params=params, headers=headers, timeout=15)
-                response.raise_for_status()
-                data = response.json()
+                # Skipped instantly while the 1inch circuit is open
+                with get_breaker("1inch").protect() as timeout:
+                    response = get_session("1inch").get(oneinch_url, params=params, headers=headers, timeout=timeout)
+                    response.raise_for_status()
+                    data = response.json()
                 if isinstance(data, dict) and (data.get("tx") or data.get("to")):
                     return data
             except Exception:
@@ -174,11 +265,8 @@ def get_1inch_swap_data(chain_id: int, src_token: str, dst_token: str, amount_hu
                 pass
 
         # Fallback: 0x quote (often works without API key for demos)
-        if chain_id == 137:
-            zerox_url = "https://polygon.api.0x.org/swap/v1/quote"
-        elif chain_id == 1:
-            zerox_url = "https://api.0x.org/swap/v1/quote"
-        else:
+        zerox_url = get_registry().chain(chain_id).zerox_url
+        if not zerox_url:
             return {"error": "Unsupported chain for fallback aggregator"}
 
         zerox_params = {
@@ -189,9 +277,10 @@ def get_1inch_swap_data(chain_id: int, src_token: str, dst_token: str, amount_hu
             "slippagePercentage": "0.01",
         }
         try:
-            zr = requests.get(zerox_url, params=zerox_params, timeout=15)
-            zr.raise_for_status()
-            z = zr.json()
+            with get_breaker("0x").protect() as timeout:
+                zr = get_session("0x").get(zerox_url, params=zerox_params, timeout=timeout)
+                zr.raise_for_status()
+                z = zr.json()
             # Normalize to 1inch-like shape with tx field
             tx = {
                 "to": z.get("to"),
@@ -200,7 +289,7 @@ def get_1inch_swap_data(chain_id: int, src_token: str, dst_token: str, amount_hu
                 "gas": hex(int(z.get("gas"))) if z.get("gas") else None,
                 "gasPrice": hex(int(z.get("gasPrice"))) if z.get("gasPrice") else None,
             }
-            return {"tx": tx, "_source": "0x"}
+            return {"tx": tx, "toAmount": z.get("buyAmount"), "buyTokenToNativeRate": z.get("buyTokenToEthRate"), "_source": "0x"}
         except Exception as e:
             return {"error": f"aggregator_unavailable: {str(e)}"}
     except requests.exceptions.RequestException as e:
@@ -210,34 +299,26 @@ def get_1inch_swap_data(chain_id: int, src_token: str, dst_token: str, amount_hu
 
 
 def tokens_for_chain(chain_id: int) -> Tuple[str, str, int]:
-    """Return (usdc, weth, usdc_decimals) for a supported chain."""
-    if chain_id == 1:
-        # Ethereum Mainnet
-        return (
-            "0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48",  # USDC
-            "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2",  # WETH
-            6,
-        )
-    elif chain_id == 137:
-        # Polygon Mainnet
-        return (
-            "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174",  # USDC
-            "0x7ceB23fD6bC0adD59E62ac25578270cFf1b9f619",  # WETH
-            6,
-        )
-    elif chain_id == 80002:
-        # Polygon Amoy Testnet
-        return (
-            "0x41E94Eb019C0762f9Bfcf9Fb1E58725BfB0e7582",  # USDC on Amoy
-            "0x360ad4f9a9A8EFe9A8DCB5f461c4Cc1047E1Dcf9",  # WETH on Amoy
-            6,
-        )
-    # Default to Polygon Mainnet
-    return (
-        "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174",  # USDC
-        "0x7ceB23fD6bC0adD59E62ac25578270cFf1b9f619",  # WETH
-        6,
-    )
+    """
+    Return (usdc, weth, usdc_decimals) for a chain in the token registry.
+
+    Raises:
+        UnsupportedChainError: If the chain is not registered
+        UnknownTokenError: If the chain does not list USDC or WETH
+    """
+    registry = get_registry()
+    usdc = registry.token(chain_id, "USDC")
+    return usdc.address, registry.token(chain_id, "WETH").address, usdc.decimals
+
+
+def resolve_asset_token(chain_id: int, asset: str) -> str:
+    """Resolve an asset symbol (USDC, WETH, ...) or token address to an address on a chain."""
+    registry = get_registry()
+    if asset.startswith("0x") and len(asset) == 42:
+        # Any address is passed through to the aggregator, but only on a registered chain
+        registry.chain(chain_id)
+        return asset
+    return registry.token(chain_id, asset).address
 
 
 if __name__ == "__main__":
@@ -0,0 +1,162 @@
+"""
+Benchmarks for RWA-GPT backend hot paths.
+
+Run from the repository root, for example:
+
+    python -m backend.benchmarks yield --events 2000000 --investors 1000000
+    python -m backend.benchmarks catalog --properties 1000000
+    python -m backend.benchmarks recommend --properties 1000000 --queries 2000
+    python -m backend.benchmarks history --transactions 200000 --users 20000 --backend sqlite
+
+Input data comes from the seeded generators in synthetic.py, so runs with
+the same arguments are comparable.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from .realt_catalog import SORT_KEYS, RealTCatalog
+from .rendering import render_portfolio, render_transaction_history
+from .portfolio import build_portfolio
+from .state import InMemoryTransactionStore, SQLiteTransactionStore
+from .synthetic import generate_catalog, generate_transactions, transaction_records, user_address
+from .yield_engine import aggregate_stakes, compute_pro_rata_payouts
+
+
+def _timed(label: str, fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    print(f"  {label:<28} {time.perf_counter() - start:8.3f}s")
+    return result
+
+
+def _latencies(label: str, samples) -> None:
+    ms = np.asarray(samples) * 1000
+    print(f"  {label:<28} p50 {np.percentile(ms, 50):7.3f}ms  p99 {np.percentile(ms, 99):7.3f}ms  max {ms.max():7.3f}ms")
+
+
+def bench_yield(events: int, investors: int, wei: bool, seed: int) -> None:
+    """Aggregate synthetic Invested events and split one distribution pro rata."""
+    rng = np.random.default_rng(seed)
+    investor_ids = rng.integers(0, investors, events)
+    addresses = np.char.add("0x", np.char.zfill(investor_ids.astype(str), 40)).tolist()
+    amounts = rng.integers(1, 10**6, events)
+    # Wei-sized amounts overflow int64 products and exercise the exact object path
+    amount_values = [int(a) * 10**12 for a in amounts] if wei else amounts
+    total_amount = 10**24 + 7 if wei else 10**9 + 7
+
+    print(f"yield distribution: {events:,} events, up to {investors:,} investors, {'wei' if wei else 'int64'} amounts")
+    unique, stakes = _timed("aggregate stakes", aggregate_stakes, addresses, amount_values)
+    payouts, dust = _timed("pro-rata payouts", compute_pro_rata_payouts, stakes, total_amount)
+    assert int(payouts.sum()) + dust == total_amount
+    print(f"  {len(unique):,} investors paid, dust {dust}")
+
+
+def bench_catalog(properties: int, seed: int) -> None:
+    """Generate a catalog, snapshot it to disk, memory-map it back and read a page."""
+    print(f"catalog: {properties:,} synthetic properties")
+    catalog = _timed("generate", generate_catalog, properties, seed)
+    with tempfile.TemporaryDirectory() as root:
+        _timed("save snapshot", catalog.save, root)
+        loaded = _timed("memory-map snapshot", RealTCatalog.load, root)
+        total, rows = _timed("query top 20 by APY", loaded.query, rented_only=True, limit=20)
+        _timed("materialize 20 assets", lambda: [loaded.asset(int(i)) for i in rows])
+        size = sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(root) for f in files)
+    print(f"  {total:,} rented properties, snapshot {size / 2**20:.1f} MiB")
+
+
+def bench_recommend(properties: int, queries: int, seed: int) -> None:
+    """Random filtered, sorted and paginated listing queries over the catalog."""
+    print(f"recommend: {queries:,} listing queries over {properties:,} synthetic properties")
+    catalog = _timed("generate", generate_catalog, properties, seed)
+    rng = np.random.default_rng(seed + 1)
+    samples, matched = [], 0
+    for _ in range(queries):
+        filters = {"rented_only": bool(rng.random() < 0.8)}
+        if rng.random() < 0.5:
+            filters["city"] = catalog.cities[rng.integers(len(catalog.cities))]
+        elif rng.random() < 0.5:
+            filters["state"] = catalog.states[rng.integers(len(catalog.states))]
+        if rng.random() < 0.5:
+            filters["min_apy"] = float(rng.uniform(6.0, 10.0))
+        if rng.random() < 0.3:
+            filters["max_price"] = float(rng.uniform(35.0, 70.0))
+        start = time.perf_counter()
+        total, rows = catalog.query(
+            **filters, sort=SORT_KEYS[rng.integers(len(SORT_KEYS))], descending=bool(rng.random() < 0.8),
+            offset=int(rng.integers(0, 5)) * 20, limit=20,
+        )
+        [catalog.asset(int(i)) for i in rows]
+        samples.append(time.perf_counter() - start)
+        matched += total
+    _latencies("query + page of assets", samples)
+    print(f"  {matched / queries:,.0f} matching properties per query on average")
+
+
+def bench_history(transactions: int, users: int, lookups: int, backend: str, seed: int) -> None:
+    """Load synthetic transactions into a store, then serve history and portfolio lookups."""
+    print(f"history: {transactions:,} transactions from up to {users:,} users, {backend} store")
+    columns = _timed("generate", generate_transactions, transactions, users, 1000, seed)
+    with tempfile.TemporaryDirectory() as root:
+        store = SQLiteTransactionStore(os.path.join(root, "bench.db")) if backend == "sqlite" else InMemoryTransactionStore()
+        _timed("insert", lambda: [store.add(record) for record in transaction_records(columns)])
+
+        # Look up users in proportion to their activity, like real traffic
+        picks = np.random.default_rng(seed + 1).choice(columns["user"], lookups)
+        history, portfolio = [], []
+        for user in picks.tolist():
+            address = user_address(user)
+            start = time.perf_counter()
+            render_transaction_history(store.list_transactions(address))
+            history.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            render_portfolio(build_portfolio(address, store.portfolio_counters(address)))
+            portfolio.append(time.perf_counter() - start)
+        store.close()
+    _latencies("history (list + render)", history)
+    _latencies("portfolio (counters + render)", portfolio)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="RWA-GPT backend benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    yield_parser = subparsers.add_parser("yield", help="pro-rata yield distribution")
+    yield_parser.add_argument("--events", type=int, default=2_000_000)
+    yield_parser.add_argument("--investors", type=int, default=1_000_000)
+    yield_parser.add_argument("--wei", action="store_true", help="use wei-sized amounts")
+    yield_parser.add_argument("--seed", type=int, default=42)
+
+    catalog_parser = subparsers.add_parser("catalog", help="catalog generation, snapshot and load")
+    catalog_parser.add_argument("--properties", type=int, default=1_000_000)
+    catalog_parser.add_argument("--seed", type=int, default=42)
+
+    recommend_parser = subparsers.add_parser("recommend", help="filtered real estate listing queries")
+    recommend_parser.add_argument("--properties", type=int, default=1_000_000)
+    recommend_parser.add_argument("--queries", type=int, default=2000)
+    recommend_parser.add_argument("--seed", type=int, default=42)
+
+    history_parser = subparsers.add_parser("history", help="transaction history and portfolio lookups")
+    history_parser.add_argument("--transactions", type=int, default=200_000)
+    history_parser.add_argument("--users", type=int, default=20_000)
+    history_parser.add_argument("--lookups", type=int, default=1000)
+    history_parser.add_argument("--backend", choices=("memory", "sqlite"), default="memory")
+    history_parser.add_argument("--seed", type=int, default=42)
+
+    args = parser.parse_args()
+    if args.benchmark == "yield":
+        bench_yield(args.events, args.investors, args.wei, args.seed)
+    elif args.benchmark == "catalog":
+        bench_catalog(args.properties, args.seed)
+    elif args.benchmark == "recommend":
+        bench_recommend(args.properties, args.queries, args.seed)
+    elif args.benchmark == "history":
+        bench_history(args.transactions, args.users, args.lookups, args.backend, args.seed)
+
+
+if __name__ == "__main__":
+    main()
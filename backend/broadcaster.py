@@ -0,0 +1,152 @@
+"""
+In-process fan-out of transaction status changes to streaming clients.
+
+Clients used to poll "transaction history" to learn whether a pending
+investment had confirmed. ``/transactions/stream`` now subscribes a client
+here, and every status transition (from /update-transaction or the
+confirmation poller) is published once and copied to the subscribers of
+that record's address.
+
+Idle connections are cheap: a subscription is a small bounded
+``asyncio.Queue`` registered under its address. Publishing looks up only
+that address's subscribers, so the cost of an event does not grow with the
+number of idle connections. A subscriber that stops reading loses its
+oldest queued events rather than growing without bound. Clients can
+always re-read history to catch up.
+
+Events are process-local; with several workers a client only receives
+updates applied by the worker it is connected to.
+"""
+
+import asyncio
+import threading
+from typing import Any, Dict, Optional, Set
+
+# Subscription key for clients that watch every address
+ALL_ADDRESSES = "*"
+
+# Record fields included in published events
+EVENT_FIELDS = ("id", "tx_hash", "status", "user_address", "asset_id", "amount", "confirmed_at", "x402_payment_id")
+
+
+class SubscriberLimitError(Exception):
+    """Raised when the broadcaster already has ``max_subscribers`` connections."""
+
+
+class Subscription:
+    """One connected client: a bounded queue of events for an address."""
+
+    def __init__(self, broadcaster: "StatusBroadcaster", key: str, queue_size: int):
+        self.broadcaster = broadcaster
+        self.key = key
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def deliver(self, event: Dict[str, Any]) -> None:
+        if self.queue.full():
+            # Drop the oldest event so a stalled client cannot hold memory
+            self.queue.get_nowait()
+            self.dropped += 1
+            self.broadcaster.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self) -> Dict[str, Any]:
+        return await self.queue.get()
+
+    def close(self) -> None:
+        self.broadcaster.unsubscribe(self)
+
+
+class StatusBroadcaster:
+    """
+    Address-keyed pub/sub for transaction status events.
+
+    Args:
+        queue_size: Events buffered per subscriber before the oldest are dropped
+        max_subscribers: Concurrent subscriptions allowed
+    """
+
+    def __init__(self, queue_size: int = 64, max_subscribers: int = 10000):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._count = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    @staticmethod
+    def _key(address: Optional[str]) -> str:
+        return address.lower() if address else ALL_ADDRESSES
+
+    def subscribe(self, address: Optional[str] = None) -> Subscription:
+        """
+        Register a subscriber (must be called on the event loop).
+
+        Args:
+            address: Wallet address to follow; None follows every address
+
+        Raises:
+            SubscriberLimitError: If max_subscribers is reached
+        """
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(self, self._key(address), self.queue_size)
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                raise SubscriberLimitError(f"Too many stream subscribers (max {self.max_subscribers})")
+            self._subscribers.setdefault(subscription.key, set()).add(subscription)
+            self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.key)
+            if subscribers is None or subscription not in subscribers:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.key]
+            self._count -= 1
+
+    def publish(self, record: Dict[str, Any]) -> None:
+        """
+        Publish a transaction record's new status (safe to call from any thread).
+        """
+        key = self._key(record.get("user_address"))
+        with self._lock:
+            if key not in self._subscribers and ALL_ADDRESSES not in self._subscribers:
+                return
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        event = {field: record.get(field) for field in EVENT_FIELDS}
+        self.published += 1
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._dispatch(key, event)
+        else:
+            loop.call_soon_threadsafe(self._dispatch, key, event)
+
+    def _dispatch(self, key: str, event: Dict[str, Any]) -> None:
+        with self._lock:
+            targets = list(self._subscribers.get(key, ()))
+            if key != ALL_ADDRESSES:
+                targets += self._subscribers.get(ALL_ADDRESSES, ())
+        for subscription in targets:
+            subscription.deliver(event)
+        self.delivered += len(targets)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "subscribers": self._count,
+                "addresses": len(self._subscribers),
+                "published": self.published,
+                "delivered": self.delivered,
+                "dropped": self.dropped,
+            }
@@ -0,0 +1,204 @@
+"""
+Pooled, batching JSON-RPC client for EVM chains.
+
+Balance, receipt and ``MockRWAPool.totalInvested`` reads are served through
+one shared client instead of ad hoc RPC probing:
+
+- keep-alive connection pools per RPC endpoint
+- concurrent calls issued within a short window are sent as one JSON-RPC
+  batch request
+- requests go to the endpoint with the lowest observed latency (EWMA), and
+  fail over to the next endpoint when one errors, with a cool-down for the
+  failing endpoint
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .http_pool import get_session
+
+logger = logging.getLogger(__name__)
+
+# MockRWAPool method selectors (from the compiled artifact's methodIdentifiers)
+TOTAL_INVESTED_SELECTOR = "0x5216aeec"
+
+
+class RPCError(Exception):
+    """JSON-RPC error returned by the node for a single call."""
+
+    def __init__(self, code: Optional[int], message: str):
+        self.code = code
+        super().__init__(f"RPC error {code}: {message}")
+
+
+class RPCUnavailableError(Exception):
+    """Raised when every configured endpoint failed for a batch."""
+
+
+class RPCEndpoint:
+    """One RPC URL with its latency estimate and health state."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.session = get_session(f"rpc:{url}")
+        self.latency_ewma: Optional[float] = None
+        self.failures = 0
+        self.cooldown_until = 0.0
+
+    def available(self, now: float) -> bool:
+        return self.cooldown_until <= now
+
+    def record_success(self, latency: float) -> None:
+        self.failures = 0
+        self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+
+    def record_failure(self, base_cooldown: float) -> None:
+        self.failures += 1
+        self.cooldown_until = time.monotonic() + min(300.0, base_cooldown * (2 ** (self.failures - 1)))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "latency_ms": round(self.latency_ewma * 1000, 1) if self.latency_ewma is not None else None,
+            "failures": self.failures,
+            "available": self.available(time.monotonic()),
+        }
+
+
+class ChainClient:
+    """
+    JSON-RPC client that batches concurrent calls across a pool of endpoints.
+
+    Args:
+        urls: RPC endpoint URLs, in fallback preference order
+        batch_window: Seconds to collect concurrent calls before sending a batch
+        max_batch_size: Calls per batch request; a full batch is sent immediately
+        timeout: HTTP timeout per batch request in seconds
+        failure_cooldown: Initial seconds an endpoint is skipped after an error
+    """
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        batch_window: float = 0.005,
+        max_batch_size: int = 100,
+        timeout: float = 10.0,
+        failure_cooldown: float = 5.0,
+    ):
+        if not urls:
+            raise ValueError("ChainClient needs at least one RPC URL")
+        self.endpoints = [RPCEndpoint(url) for url in urls]
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.timeout = timeout
+        self.failure_cooldown = failure_cooldown
+        self._queue: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._next_id = 0
+
+    def _ordered_endpoints(self) -> List[RPCEndpoint]:
+        """Available endpoints fastest first (unmeasured ones first so they get measured), then cooling ones."""
+        now = time.monotonic()
+        available = [e for e in self.endpoints if e.available(now)]
+        cooling = sorted((e for e in self.endpoints if not e.available(now)), key=lambda e: e.cooldown_until)
+        available.sort(key=lambda e: -1.0 if e.latency_ewma is None else e.latency_ewma)
+        return available + cooling
+
+    def _post_batch(self, payload: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        last_error: Optional[Exception] = None
+        for endpoint in self._ordered_endpoints():
+            start = time.monotonic()
+            try:
+                response = endpoint.session.post(endpoint.url, json=payload, timeout=self.timeout)
+                response.raise_for_status()
+                results = response.json()
+                if not isinstance(results, list):
+                    raise ValueError(f"unexpected batch response: {str(results)[:200]}")
+                endpoint.record_success(time.monotonic() - start)
+                return results
+            except Exception as e:
+                last_error = e
+                endpoint.record_failure(self.failure_cooldown)
+                logger.warning(f"RPC endpoint {endpoint.url} failed, trying next: {e}")
+        raise RPCUnavailableError(f"All RPC endpoints failed: {last_error}")
+
+    async def call(self, method: str, params: Optional[list] = None) -> Any:
+        """
+        Queue one JSON-RPC call; it is sent with any others issued in the batch window.
+
+        Raises:
+            RPCError: If the node returned an error for this call
+            RPCUnavailableError: If no endpoint could serve the batch
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._next_id += 1
+        self._queue.append(({"jsonrpc": "2.0", "id": self._next_id, "method": method, "params": params or []}, future))
+
+        if len(self._queue) >= self.max_batch_size:
+            self._schedule_flush(loop, immediate=True)
+        elif self._flush_handle is None:
+            self._schedule_flush(loop)
+        return await future
+
+    def _schedule_flush(self, loop: asyncio.AbstractEventLoop, immediate: bool = False) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if immediate:
+            loop.create_task(self._flush())
+        else:
+            self._flush_handle = loop.call_later(self.batch_window, lambda: loop.create_task(self._flush()))
+
+    async def _flush(self) -> None:
+        self._flush_handle = None
+        batch, self._queue = self._queue[:self.max_batch_size], self._queue[self.max_batch_size:]
+        if self._queue:
+            self._schedule_flush(asyncio.get_running_loop())
+        if not batch:
+            return
+
+        futures = {request["id"]: future for request, future in batch}
+        try:
+            results = await asyncio.to_thread(self._post_batch, [request for request, _ in batch])
+        except Exception as e:
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for item in results:
+            future = futures.pop(item.get("id"), None)
+            if future is None or future.done():
+                continue
+            if item.get("error"):
+                error = item["error"]
+                future.set_exception(RPCError(error.get("code"), error.get("message", "unknown error")))
+            else:
+                future.set_result(item.get("result"))
+        for future in futures.values():
+            if not future.done():
+                future.set_exception(RPCError(None, "missing response in batch"))
+
+    async def get_balance(self, address: str, block: str = "latest") -> int:
+        """Native token balance in wei."""
+        return int(await self.call("eth_getBalance", [address, block]), 16)
+
+    async def get_transaction_receipt(self, tx_hash: str) -> Optional[Dict[str, Any]]:
+        """Receipt for a transaction, or None if it is not mined yet."""
+        return await self.call("eth_getTransactionReceipt", [tx_hash])
+
+    async def get_transaction_receipts(self, tx_hashes: Sequence[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Receipts for many transactions; concurrent lookups share batch requests."""
+        receipts = await asyncio.gather(*(self.get_transaction_receipt(h) for h in tx_hashes))
+        return dict(zip(tx_hashes, receipts))
+
+    async def total_invested(self, pool_address: str, block: str = "latest") -> int:
+        """MockRWAPool.totalInvested() in wei."""
+        result = await self.call("eth_call", [{"to": pool_address, "data": TOTAL_INVESTED_SELECTOR}, block])
+        return int(result, 16) if result and result != "0x" else 0
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [endpoint.snapshot() for endpoint in self.endpoints]
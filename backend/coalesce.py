@@ -0,0 +1,133 @@
+"""
+Request coalescing and short-lived caching for upstream calls.
+
+Concurrent requests (for example items of an /ask-agent/batch call) that need
+the same upstream result share a single in-flight call instead of each
+hitting RealT, the subgraph or the LLM. Successful results can additionally
+be kept for a short TTL so back-to-back requests reuse them.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Small LRU cache whose entries expire after a per-entry TTL.
+
+    Args:
+        max_entries: Maximum number of entries kept before evicting the oldest
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """Return (found, value) for a key, dropping it if it has expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one awaited call."""
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run ``factory()`` for this key unless an identical call is already running.
+
+        Args:
+            key: Identity of the upstream call
+            factory: Zero-argument callable returning the awaitable to run
+
+        Returns:
+            The result of the shared call (exceptions are shared too; if the
+            caller running the call is cancelled, waiting callers retry it)
+        """
+        while True:
+            future = self._in_flight.get(key)
+            if future is None:
+                break
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise  # this follower itself was cancelled
+                # The leader was cancelled (e.g. its client disconnected), not this
+                # caller: run again, as the new leader or behind whoever took over
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await factory()
+        except asyncio.CancelledError:
+            # Remove the entry before followers wake up so one of them can take over
+            self._in_flight.pop(key, None)
+            future.cancel()
+            raise
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+                # Mark retrieved so an unawaited shared failure isn't logged
+                future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if self._in_flight.get(key) is future:
+                self._in_flight.pop(key, None)
+
+upstream_cache = TTLCache()
+upstream_flights = SingleFlight()
+
+
+async def shared_call(
+    key: Hashable,
+    factory: Callable[[], Awaitable[Any]],
+    ttl: float = 0.0,
+    cache_if: Optional[Callable[[Any], bool]] = None,
+) -> Any:
+    """
+    Fetch an upstream result through the shared cache and in-flight table.
+
+    Args:
+        key: Identity of the upstream call
+        factory: Zero-argument callable returning the awaitable to run
+        ttl: Seconds to keep a successful result (0 disables caching)
+        cache_if: Optional predicate deciding whether a result may be cached
+
+    Returns:
+        The cached, shared or freshly fetched result
+    """
+    if ttl > 0:
+        found, value = upstream_cache.get(key)
+        if found:
+            return value
+
+    result = await upstream_flights.do(key, factory)
+
+    if ttl > 0 and (cache_if is None or cache_if(result)):
+        upstream_cache.set(key, result, ttl)
+    return result
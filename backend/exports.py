@@ -0,0 +1,62 @@
+"""
+Streaming NDJSON and CSV encoders for bulk exports.
+
+Export endpoints read their source one page at a time (see
+``TransactionStore.iter_transactions`` and
+``supabase_client.fetch_messages_page``) and pass the pages through these
+encoders to a ``StreamingResponse``. Each page is encoded into one chunk
+and sent before the next page is read. Memory therefore stays bounded by
+the page size, however many records are exported.
+"""
+
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Sequence
+
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# Message columns written to CSV exports
+MESSAGE_FIELDS = ("id", "role", "content", "timestamp", "created_at")
+
+
+def encode_page(records: List[Dict[str, Any]], export_format: str, fields: Sequence[str]) -> str:
+    """
+    Encode one page of records.
+
+    Args:
+        records: Records of the page
+        export_format: "ndjson" or "csv"
+        fields: CSV columns (keys missing from a record are written empty; extra keys are dropped)
+
+    Returns:
+        The encoded chunk (CSV without header)
+    """
+    if export_format == "ndjson":
+        return "".join(json.dumps(record, default=str) + "\n" for record in records)
+    buffer = io.StringIO()
+    csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore").writerows(records)
+    return buffer.getvalue()
+
+
+def csv_header(fields: Sequence[str]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(fields)
+    return buffer.getvalue()
+
+
+def stream_pages(pages: Iterable[List[Dict[str, Any]]], export_format: str, fields: Sequence[str]) -> Iterator[str]:
+    """Encode pages from a blocking source; StreamingResponse runs it in a worker thread."""
+    if export_format == "csv":
+        yield csv_header(fields)
+    for page in pages:
+        yield encode_page(page, export_format, fields)
+
+
+async def astream_pages(pages: AsyncIterator[List[Dict[str, Any]]], export_format: str, fields: Sequence[str]) -> AsyncIterator[str]:
+    """Encode pages from an async source."""
+    if export_format == "csv":
+        yield csv_header(fields)
+    async for page in pages:
+        yield encode_page(page, export_format, fields)
@@ -0,0 +1,41 @@
+"""
+Shared, keep-alive HTTP sessions for upstream APIs.
+
+``requests.get`` opens a fresh connection (DNS + TLS handshake) on every
+call. Upstream calls instead go through one pooled ``requests.Session`` per
+upstream, so concurrent quote fan-outs and repeated requests reuse warm
+connections.
+"""
+
+import threading
+from typing import Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Connections kept open per host; sized for concurrent quote fan-out
+POOL_MAXSIZE = 32
+
+_sessions: Dict[str, requests.Session] = {}
+_lock = threading.Lock()
+
+
+def get_session(name: str) -> requests.Session:
+    """
+    Return the shared session for an upstream, creating it on first use.
+
+    Args:
+        name: Upstream name (e.g. "1inch", "0x", "realt", "subgraph")
+
+    Returns:
+        requests.Session with a connection pool mounted for http and https
+    """
+    with _lock:
+        session = _sessions.get(name)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_MAXSIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[name] = session
+        return session
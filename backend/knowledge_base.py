@@ -0,0 +1,316 @@
+"""
+Local vector knowledge base for common RWA questions.
+
+Questions like "what is a tokenized treasury" or "compare Ondo vs
+Centrifuge" have stable answers, yet each one used to cost a Tavily search
+plus an OpenAI completion. Curated reference answers live in
+``knowledge/rwa_reference.json``; every document lists several phrasings
+of the questions it answers, and each phrasing is embedded once into a
+row of a float32 matrix saved as ``.npy``. At query time the matrix is
+memory-mapped and scored with one matrix-vector product (cosine similarity
+on L2-normalized rows). ``search_web`` returns the best document when its
+score clears the threshold and otherwise goes to the web as before.
+
+The index is rebuilt automatically whenever the documents or the embedder
+change (tracked by a fingerprint in the index metadata).
+
+Past good answers are kept too: when a user marks a web-search answer as
+helpful, ``add_answer`` stores it as a learned document in
+``learned_answers.json`` next to the index, and the same question is
+answered locally from then on. Questions about current data are never
+learned, since their answers go stale.
+
+Embedders:
+    hashing: signed feature hashing of word unigrams and bigrams; no network
+        calls or API cost (default)
+    openai: OpenAI embeddings via langchain_openai (one API call per query)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import zlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+KNOWLEDGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "knowledge")
+DEFAULT_DOCUMENTS_PATH = os.path.join(KNOWLEDGE_DIR, "rwa_reference.json")
+
+# Queries asking for current data must go to the web
+FRESHNESS_KEYWORDS = ("latest", "today", "news", "current", "now", "price", "prices", "this week", "this month", "recent")
+# Whole words only: "know" is not "now" and "pricing model" is not a price question
+_FRESHNESS_RE = re.compile(r"\b(?:" + "|".join(re.escape(keyword) for keyword in FRESHNESS_KEYWORDS) + r")\b")
+
+_STOPWORDS = frozenset(
+    "a an the is are was were be of in on for to and or with about me tell what who how do does i my "
+    "please can you explain vs versus between".split()
+)
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class HashingEmbedder:
+    """
+    Signed feature-hashing embedder over word unigrams and bigrams.
+
+    Args:
+        dim: Embedding dimension
+        bigrams: Also hash adjacent word pairs
+        binary: Count each feature once (set semantics) instead of by frequency
+        synonyms: Optional {word: canonical word} map applied before hashing
+    """
+
+    def __init__(self, dim: int = 4096, bigrams: bool = True, binary: bool = False, synonyms: Optional[Dict[str, str]] = None):
+        self.dim = dim
+        self.bigrams = bigrams
+        self.binary = binary
+        self.synonyms = synonyms or {}
+        self.name = f"hashing-{dim}" + ("" if bigrams else "-uni") + ("-bin" if binary else "") + ("-syn" if synonyms else "")
+
+    def _features(self, text: str) -> List[str]:
+        words = [w for w in _TOKEN_RE.findall(text.lower()) if w not in _STOPWORDS]
+        # Trailing plural "s" is dropped so "treasuries"/"treasury" and "rwas"/"rwa" collide
+        words = [w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w for w in words]
+        words = [self.synonyms.get(w, w) for w in words]
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])] if self.bigrams else words
+        return list(dict.fromkeys(features)) if self.binary else features
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                # crc32 is stable across processes, unlike hash()
+                h = zlib.crc32(feature.encode())
+                vectors[row, h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+        return _normalize(vectors)
+
+
+class OpenAIEmbedder:
+    """Embeddings from the OpenAI API (requires OPENAI_API_KEY)."""
+
+    def __init__(self, model: str = "text-embedding-3-small"):
+        from langchain_openai import OpenAIEmbeddings
+
+        self._client = OpenAIEmbeddings(model=model)
+        self.name = f"openai-{model}"
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        return _normalize(np.asarray(self._client.embed_documents(list(texts)), dtype=np.float32))
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class KnowledgeBase:
+    """
+    Cosine-similarity index over curated RWA documents.
+
+    Args:
+        documents_path: JSON file with {"documents": [{id, title, questions, answer}], "footer"}
+        index_dir: Directory for the .npy matrix and its metadata
+        embedder: Object with ``name`` and ``embed(texts) -> normalized float32 matrix``
+        min_similarity: Minimum cosine score for a document to be used as the answer
+        learned_path: JSON file of learned answers (default: learned_answers.json in index_dir)
+        max_learned: Learned answers kept; further ones are not added
+    """
+
+    def __init__(
+        self,
+        documents_path: str = DEFAULT_DOCUMENTS_PATH,
+        index_dir: Optional[str] = None,
+        embedder: Any = None,
+        min_similarity: float = 0.75,
+        learned_path: Optional[str] = None,
+        max_learned: int = 500,
+    ):
+        self.documents_path = documents_path
+        self.index_dir = index_dir or os.path.join(KNOWLEDGE_DIR, "index")
+        self.embedder = embedder or HashingEmbedder()
+        self.min_similarity = min_similarity
+        self.learned_path = learned_path or os.path.join(self.index_dir, "learned_answers.json")
+        self.max_learned = max_learned
+        self._lock = threading.RLock()
+
+        with open(documents_path, encoding="utf-8") as f:
+            data = json.load(f)
+        self.footer: str = data.get("footer", "")
+        self.learned: List[Dict[str, Any]] = self._load_learned()
+        self.documents: List[Dict[str, Any]] = data["documents"] + self.learned
+        self.matrix, self.row_documents = self._load_or_build()
+
+    def _load_learned(self) -> List[Dict[str, Any]]:
+        try:
+            with open(self.learned_path, encoding="utf-8") as f:
+                return json.load(f)["documents"]
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable learned answers {self.learned_path}: {e}")
+            return []
+
+    def _save_learned(self, learned: List[Dict[str, Any]]) -> None:
+        os.makedirs(os.path.dirname(self.learned_path) or ".", exist_ok=True)
+        tmp_path = f"{self.learned_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"documents": learned}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.learned_path)
+
+    def _fingerprint(self) -> str:
+        payload = json.dumps([self.embedder.name, self.documents], sort_keys=True).encode()
+        return hashlib.sha256(payload).hexdigest()
+
+    def _load_or_build(self):
+        matrix_path = os.path.join(self.index_dir, "embeddings.npy")
+        meta_path = os.path.join(self.index_dir, "meta.json")
+        fingerprint = self._fingerprint()
+
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("fingerprint") == fingerprint:
+                return np.load(matrix_path, mmap_mode="r"), np.asarray(meta["row_documents"], dtype=np.int32)
+        except (OSError, ValueError, KeyError):
+            pass
+
+        rows: List[str] = []
+        row_documents: List[int] = []
+        for doc_index, doc in enumerate(self.documents):
+            for text in [doc["title"], *doc.get("questions", [])]:
+                rows.append(text)
+                row_documents.append(doc_index)
+        matrix = self.embedder.embed(rows).astype(np.float32)
+
+        os.makedirs(self.index_dir, exist_ok=True)
+        # Write to temporary files and rename so concurrent workers never read a partial index
+        tmp_matrix = f"{matrix_path}.{os.getpid()}.tmp.npy"
+        tmp_meta = f"{meta_path}.{os.getpid()}.tmp"
+        np.save(tmp_matrix, matrix)
+        with open(tmp_meta, "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": fingerprint, "embedder": self.embedder.name, "row_documents": row_documents}, f)
+        os.replace(tmp_matrix, matrix_path)
+        os.replace(tmp_meta, meta_path)
+        logger.info(f"Built knowledge base index: {len(rows)} rows, {len(self.documents)} documents")
+        return np.load(matrix_path, mmap_mode="r"), np.asarray(row_documents, dtype=np.int32)
+
+    def search(self, query: str, k: int = 3) -> List[Dict[str, Any]]:
+        """
+        Best-matching documents for a query.
+
+        Returns:
+            Up to k {"score", "document"} dicts, best first, one per document
+        """
+        with self._lock:
+            matrix, row_documents, documents = self.matrix, self.row_documents, self.documents
+        if not len(row_documents):
+            return []
+        scores = np.asarray(matrix @ self.embedder.embed([query])[0])
+        # Best row per document
+        best = np.full(len(documents), -1.0, dtype=np.float32)
+        np.maximum.at(best, row_documents, scores)
+        top = np.argsort(-best)[:k]
+        return [{"score": float(best[i]), "document": documents[i]} for i in top if best[i] > -1.0]
+
+    def answer(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        The document answering ``query``, or None if nothing is similar enough
+        or the query asks for current information.
+        """
+        if _FRESHNESS_RE.search(query.lower()):
+            return None
+        hits = self.search(query, k=1)
+        if hits and hits[0]["score"] >= self.min_similarity:
+            return hits[0]
+        return None
+
+    def add_answer(self, prompt: str, answer: str) -> bool:
+        """
+        Learn an answer a user found helpful, so the prompt is answered locally next time.
+
+        Returns:
+            True if it was added; False if the prompt asks for current data, is already
+            answered by the knowledge base, or the learned store is full
+        """
+        prompt = _WHITESPACE_RE.sub(" ", prompt).strip()
+        if not prompt or not answer or _FRESHNESS_RE.search(prompt.lower()):
+            return False
+        with self._lock:
+            if self.answer(prompt) is not None:
+                return False
+            if len(self.learned) >= self.max_learned:
+                logger.info(f"Learned answer store is full ({self.max_learned}); not adding {prompt!r}")
+                return False
+            document = {
+                "id": "learned-" + hashlib.sha256(prompt.lower().encode()).hexdigest()[:12],
+                "title": prompt,
+                "questions": [],
+                "answer": answer,
+                "learned_at": datetime.now().isoformat(),
+            }
+            learned = self.learned + [document]
+            self._save_learned(learned)
+            # Append one row in memory; the persisted index is rebuilt from the documents on next load
+            row = self.embedder.embed([prompt]).astype(np.float32)
+            self.matrix = np.vstack([self.matrix, row])
+            self.row_documents = np.append(self.row_documents, np.int32(len(self.documents)))
+            self.documents = self.documents + [document]
+            self.learned = learned
+        logger.info(f"Learned knowledge base answer for {prompt!r}", extra={"event": "knowledge.learned"})
+        return True
+
+    def render(self, hit: Dict[str, Any]) -> str:
+        """Markdown for a search_web response built from a knowledge base hit."""
+        answer = hit["document"]["answer"]
+        return f"{answer}\n\n{self.footer}" if self.footer else answer
+
+
+_knowledge_base: Optional[KnowledgeBase] = None
+_knowledge_base_failed = False
+_knowledge_base_lock = threading.Lock()
+
+
+def get_knowledge_base() -> Optional[KnowledgeBase]:
+    """
+    Shared knowledge base configured from the environment, built on first use.
+
+    Returns:
+        KnowledgeBase, or None if disabled (KNOWLEDGE_BASE_ENABLED=false) or it failed to load
+    """
+    global _knowledge_base, _knowledge_base_failed
+    if os.getenv("KNOWLEDGE_BASE_ENABLED", "true").lower() != "true":
+        return None
+    with _knowledge_base_lock:
+        if _knowledge_base is None and not _knowledge_base_failed:
+            try:
+                embedder_name = os.getenv("KNOWLEDGE_EMBEDDER", "hashing").lower()
+                embedder = OpenAIEmbedder() if embedder_name == "openai" else HashingEmbedder()
+                _knowledge_base = KnowledgeBase(
+                    documents_path=os.getenv("KNOWLEDGE_DOCUMENTS_PATH", DEFAULT_DOCUMENTS_PATH),
+                    index_dir=os.getenv("KNOWLEDGE_INDEX_DIR") or None,
+                    embedder=embedder,
+                    min_similarity=float(os.getenv("KNOWLEDGE_MIN_SIMILARITY", "0.75")),
+                    learned_path=os.getenv("KNOWLEDGE_LEARNED_PATH") or None,
+                    max_learned=int(os.getenv("KNOWLEDGE_MAX_LEARNED", "500")),
+                )
+            except Exception as e:
+                _knowledge_base_failed = True
+                logger.error(f"Knowledge base unavailable, using web search only: {e}")
+        return _knowledge_base
+
+
+def knowledge_base_answer(query: str) -> Optional[str]:
+    """Rendered knowledge base answer for ``query``, or None to fall back to web search."""
+    knowledge_base = get_knowledge_base()
+    if knowledge_base is None:
+        return None
+    hit = knowledge_base.answer(query)
+    return knowledge_base.render(hit) if hit is not None else None
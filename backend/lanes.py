@@ -0,0 +1,179 @@
+"""
+Isolated execution lanes for /ask-agent intents.
+
+Multi-second LLM searches, aggregator/upstream API calls and local store
+reads used to share the same event loop slots and the default thread pool
+(which LangChain also uses for its sync tools), so a burst of search prompts
+made cheap history lookups wait. Each intent now runs in a lane with its own:
+
+- concurrency limit (semaphore)
+- bounded wait queue; when it is full the request is rejected right away
+  instead of piling up
+- thread pool for blocking work (``lane_to_thread``), so blocking calls in
+  one lane never wait for threads held by another
+
+The lane a request runs in is kept in a context variable, so helpers deep
+in a handler pick the right thread pool without it being passed around.
+
+While blocking work runs, the worker thread is recorded against the asyncio
+task awaiting it (``worker_thread``), so the request profiler can show what
+the thread is doing instead of an opaque wait.
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+_current_lane: contextvars.ContextVar[Optional["Lane"]] = contextvars.ContextVar("current_lane", default=None)
+
+# Awaiting task -> ident of the worker thread running its blocking call
+_worker_threads: Dict[asyncio.Task, int] = {}
+
+
+class LaneFullError(Exception):
+    """Raised when a lane's wait queue is full."""
+
+    def __init__(self, lane: str, retry_after: float = 1.0):
+        self.lane = lane
+        self.retry_after = retry_after
+        super().__init__(f"The {lane} lane is at capacity; retry shortly")
+
+
+class Lane:
+    """
+    One execution lane.
+
+    Args:
+        name: Lane name
+        max_concurrency: Requests running at once
+        max_queue: Requests allowed to wait for a slot before new ones are rejected
+        threads: Worker threads for blocking calls made from this lane
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, threads: int):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix=f"lane-{name}")
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.active = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_ewma = 0.0
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def run(self, factory: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run ``factory()`` in this lane once a slot is free.
+
+        Raises:
+            LaneFullError: If max_queue requests are already waiting
+        """
+        semaphore = self._get_semaphore()
+        if semaphore.locked() and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise LaneFullError(self.name)
+
+        self.waiting += 1
+        start = time.monotonic()
+        try:
+            await semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.wait_ewma = 0.9 * self.wait_ewma + 0.1 * (time.monotonic() - start)
+
+        token = _current_lane.set(self)
+        self.active += 1
+        try:
+            return await factory()
+        finally:
+            self.active -= 1
+            self.completed += 1
+            _current_lane.reset(token)
+            semaphore.release()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.wait_ewma * 1000, 2),
+        }
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class LaneScheduler:
+    """
+    Named lanes plus the intent -> lane routing.
+
+    Args:
+        lanes: Lanes by name
+        routes: {intent: lane name}
+        default_lane: Lane for intents without a route
+    """
+
+    def __init__(self, lanes: Dict[str, Lane], routes: Dict[str, str], default_lane: str):
+        self.lanes = lanes
+        self.routes = routes
+        self.default_lane = default_lane
+
+    def lane_for(self, intent: str) -> Lane:
+        return self.lanes[self.routes.get(intent, self.default_lane)]
+
+    async def run(self, intent: str, factory: Callable[[], Awaitable[T]]) -> T:
+        return await self.lane_for(intent).run(factory)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {name: lane.snapshot() for name, lane in self.lanes.items()}
+
+    def shutdown(self) -> None:
+        for lane in self.lanes.values():
+            lane.shutdown()
+
+
+async def lane_to_thread(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Like ``asyncio.to_thread`` but on the current lane's thread pool.
+
+    Outside a lane this falls back to the default executor.
+    """
+    task = asyncio.current_task()
+    lane = _current_lane.get()
+    if lane is None:
+        return await asyncio.to_thread(run_for_task, task, fn, *args, **kwargs)
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(lane.executor, functools.partial(ctx.run, run_for_task, task, fn, *args, **kwargs))
+
+
+def run_for_task(task: Optional[asyncio.Task], fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+    """Call ``fn`` in the current (worker) thread, recorded as running on behalf of ``task``."""
+    if task is None:
+        return fn(*args, **kwargs)
+    _worker_threads[task] = threading.get_ident()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _worker_threads.pop(task, None)
+
+
+def worker_thread(task: asyncio.Task) -> Optional[int]:
+    """Ident of the thread running blocking work for ``task`` right now, if any."""
+    return _worker_threads.get(task)
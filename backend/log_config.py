@@ -0,0 +1,167 @@
+"""
+Queue-backed, sampled structured logging for the API.
+
+Request handlers used to ``print`` directly to stdout. That is synchronous
+I/O on the request path, and every call site logged at full volume. This
+module sets up the root logger as follows:
+
+- Handlers only put records on a bounded queue (``QueueHandler``). A
+  ``QueueListener`` thread formats them and writes them to stdout. If the
+  queue is full, records are dropped and counted rather than blocking the
+  request.
+- High-volume records carry an ``event`` name (``extra={"event": ...}``) and
+  can be sampled per event with ``LOG_SAMPLE_RATES``. Sampling happens
+  before a record is queued, so a skipped record costs one random draw.
+  Warnings and errors are never sampled.
+- Output is JSON lines (``LOG_FORMAT=json``, default) or plain text. Extra
+  fields passed to a log call appear as JSON keys.
+- ``LOG_LEVEL`` sets the root level, and ``LOG_LEVELS`` sets per-logger
+  overrides, e.g. ``backend.tx_poller=DEBUG,httpx=WARNING``.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+# Attributes every LogRecord has; anything else was passed via ``extra``
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+_listener: Optional[QueueListener] = None
+
+
+def _parse_pairs(spec: str) -> Dict[str, str]:
+    pairs = {}
+    for item in spec.split(","):
+        name, sep, value = item.partition("=")
+        if sep and name.strip():
+            pairs[name.strip()] = value.strip()
+    return pairs
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including fields passed via ``extra``."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep a configured fraction of records per ``event`` name.
+
+    Args:
+        rates: {event name: fraction kept}; events not listed are always kept
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self.sampled_out: Dict[str, int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        event = getattr(record, "event", None)
+        if event is None or record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(event, 1.0)
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        self.sampled_out[event] = self.sampled_out.get(event, 0) + 1
+        return False
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of waiting when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(
+    level: Optional[str] = None,
+    json_format: Optional[bool] = None,
+    sample_rates: Optional[Dict[str, float]] = None,
+    queue_size: Optional[int] = None,
+) -> NonBlockingQueueHandler:
+    """
+    Route all logging through a sampled, non-blocking queue (replacing existing root handlers).
+
+    Arguments default to the LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_RATES
+    ("event=rate,...") and LOG_QUEUE_SIZE environment variables. Calling it
+    again reconfigures logging.
+
+    Returns:
+        The queue handler installed on the root logger
+    """
+    global _listener
+    level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    if json_format is None:
+        json_format = os.getenv("LOG_FORMAT", "json").lower() == "json"
+    if sample_rates is None:
+        sample_rates = {name: float(rate) for name, rate in _parse_pairs(os.getenv("LOG_SAMPLE_RATES", "")).items()}
+    queue_size = queue_size or int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+    shutdown_logging()
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if json_format else logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=queue_size))
+    handler.addFilter(SamplingFilter(sample_rates))
+    _listener = QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+    for name, logger_level in _parse_pairs(os.getenv("LOG_LEVELS", "")).items():
+        logging.getLogger(name).setLevel(logger_level.upper())
+    return handler
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+def logging_stats() -> Dict[str, object]:
+    """Dropped and sampled-out record counts of the installed queue handler."""
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, NonBlockingQueueHandler):
+            sampling = next((f for f in handler.filters if isinstance(f, SamplingFilter)), None)
+            return {
+                "queued": handler.queue.qsize(),
+                "dropped": handler.dropped,
+                "sampled_out": dict(sampling.sampled_out) if sampling else {},
+            }
+    return {}
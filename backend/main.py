@@ -1,26 +1,57 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, StreamingResponse
+from sse_starlette.sse import EventSourceResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, field_validator
 import json
 import os
 from dotenv import load_dotenv
-from .agent import query_rwa_database, get_1inch_swap_data, search_web
+from .agent import query_rwa_database, get_1inch_swap_data, search_web, tokens_for_chain, resolve_asset_token
+from .agent import fetch_all_investments, fetch_latest_yield_distribution, warm_agent
+from .resilience import breaker_snapshot
+from .coalesce import shared_call
+from .rendering import render_transaction_history, render_real_estate_listing, render_portfolio
+from .state import create_transaction_store, TRANSACTION_FIELDS
+from .broadcaster import StatusBroadcaster, SubscriberLimitError
+from .profiling import ProfilingMiddleware
+from .log_config import configure_logging, logging_stats
+from .exports import EXPORT_FORMATS, EXPORT_MEDIA_TYPES, MESSAGE_FIELDS, astream_pages, stream_pages
+from .portfolio import build_portfolio
+from .tx_poller import TransactionPoller
+from .chain_client import ChainClient, RPCError, RPCUnavailableError
+from .realt_catalog import RealTCatalogService, SORT_KEYS, REALT_TOKENS_URL
+from .synthetic import demo_catalog
+from .timeseries import AssetTimeSeries, HISTORY_RANGES
+from .yield_engine import distribute_yield, payouts_to_records
+from .rate_limit import RateLimiter, RateLimitExceeded
+from .lanes import Lane, LaneScheduler, LaneFullError, lane_to_thread
+from .http_pool import get_session
+from .token_registry import get_registry
+from .warmup import Warmup
+from .knowledge_base import HashingEmbedder, get_knowledge_base
+from .semantic_cache import SemanticCache, SEARCH_SYNONYMS
 import re
-import requests
+from contextlib import asynccontextmanager
 from datetime import datetime
-import random
+from decimal import Decimal, InvalidOperation
 import asyncio
 import logging
 # Optional x402 integration - doesn't break existing functionality
 try:
-    from x402_integration import X402PaymentProcessor, enhance_existing_payment_with_x402
+    try:
+        from .x402_integration import get_payment_processor, enhance_existing_payment_with_x402
+        from .x402_integration import payment_analytics, get_x402_payment_analytics, IdempotencyConflictError
+    except ImportError:
+        from x402_integration import get_payment_processor, enhance_existing_payment_with_x402
+        from x402_integration import payment_analytics, get_x402_payment_analytics, IdempotencyConflictError
     X402_AVAILABLE = True
 except ImportError:
     X402_AVAILABLE = False
 
 # Optional Supabase integration - doesn't break existing functionality
 try:
-    from supabase_client import insert_message, fetch_messages, initialize_supabase
+    from supabase_client import insert_message, fetch_messages, fetch_messages_page, initialize_supabase
     SUPABASE_AVAILABLE = True
 except ImportError:
     SUPABASE_AVAILABLE = False
@@ -28,8 +59,240 @@ except ImportError:
 # Load environment variables
 load_dotenv()
 
-# In-memory transaction storage (in production, use a database)
-TRANSACTION_HISTORY = []
+# Structured logging through a non-blocking queue; LOG_SAMPLE_RATES thins high-volume events
+configure_logging()
+logger = logging.getLogger(__name__)
+
+# Transaction storage; STATE_BACKEND=sqlite|redis shares it across uvicorn workers
+TRANSACTION_STORE = create_transaction_store()
+
+# Chain reads: comma-separated RPC endpoints, fastest healthy one is used
+CHAIN_RPC_URLS = [
+    url.strip()
+    for url in (os.getenv("CHAIN_RPC_URLS") or os.getenv("POLYGON_RPC", "https://rpc-amoy.polygon.technology/")).split(",")
+    if url.strip()
+]
+MOCK_RWA_POOL_ADDRESS = os.getenv("MOCK_RWA_POOL_ADDRESS")
+
+# Background receipt polling (set TX_POLLER_RPC_URL=http://127.0.0.1:8545 for a local Hardhat node)
+TX_POLLER_ENABLED = os.getenv("TX_POLLER_ENABLED", "false").lower() == "true"
+TX_POLLER_RPC_URL = os.getenv("TX_POLLER_RPC_URL")
+TX_POLLER_INTERVAL = float(os.getenv("TX_POLLER_INTERVAL", "15"))
+
+# Local RealT catalog snapshot, refreshed from the RealT API in the background
+REALT_SNAPSHOT_DIR = os.getenv("REALT_SNAPSHOT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "realt"))
+REALT_REFRESH_ENABLED = os.getenv("REALT_REFRESH_ENABLED", "true").lower() == "true"
+REALT_REFRESH_INTERVAL = float(os.getenv("REALT_REFRESH_INTERVAL", "900"))
+# Downsampled APY/price history, appended on every catalog load and refresh
+ASSET_HISTORY = AssetTimeSeries((
+    ("minute", 60, int(os.getenv("ASSET_HISTORY_MINUTES", "720"))),
+    ("hour", 3600, int(os.getenv("ASSET_HISTORY_HOURS", "720"))),
+    ("day", 86400, int(os.getenv("ASSET_HISTORY_DAYS", "730"))),
+))
+REALT_CATALOG = RealTCatalogService(
+    REALT_SNAPSHOT_DIR, refresh_interval=REALT_REFRESH_INTERVAL, on_catalog=ASSET_HISTORY.record_catalog
+)
+
+# Batch processing limits for /ask-agent/batch
+BATCH_MAX_MESSAGES = int(os.getenv("BATCH_MAX_MESSAGES", "100"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+
+# Quote grid limits for /quotes
+QUOTES_MAX_ITEMS = int(os.getenv("QUOTES_MAX_ITEMS", "200"))
+QUOTES_MAX_CONCURRENCY = int(os.getenv("QUOTES_MAX_CONCURRENCY", "8"))
+
+# How long shared upstream results are reused across requests (seconds)
+SEARCH_CACHE_TTL = 300
+REAL_ESTATE_CACHE_TTL = 60
+
+# Records read per page by the streaming export endpoints
+EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", "500"))
+
+# Real estate listing pages
+REAL_ESTATE_PAGE_SIZE = 5
+REAL_ESTATE_MAX_PAGE_SIZE = 100
+SUBGRAPH_CACHE_TTL = 30
+
+# /ask-agent intent keywords
+SEARCH_KEYWORDS = ["search", "what is", "who is", "explain", "best", "top", "latest", "find", "tell me about", "compare", "how to"]
+INVEST_TOKENS = ["usdc", "dai", "tcb", "pcr", "rwa"]
+PORTFOLIO_KEYWORDS = ["my portfolio", "portfolio summary", "my holdings"]
+HISTORY_KEYWORDS = ["transaction history", "my transactions", "transaction list", "history", "past transactions"]
+RAW_DATA_MESSAGES = ["subgraph data", "raw data"]
+REAL_ESTATE_KEYWORDS = ["real estate", "property", "rental", "realt", "rwa", "investment"]
+
+# Per-client admission control: LLM-backed intents get their own, smaller bucket
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMITER = RateLimiter({
+    "llm": (float(os.getenv("RATE_LIMIT_LLM_PER_MINUTE", "12")), float(os.getenv("RATE_LIMIT_LLM_BURST", "5"))),
+    "standard": (float(os.getenv("RATE_LIMIT_STANDARD_PER_MINUTE", "120")), float(os.getenv("RATE_LIMIT_STANDARD_BURST", "30"))),
+    # /ask-agent/batch is admitted once, at one token per message
+    "batch": (float(os.getenv("RATE_LIMIT_BATCH_PER_MINUTE", "60")), float(os.getenv("RATE_LIMIT_BATCH_BURST", str(BATCH_MAX_MESSAGES)))),
+})
+INTENT_TIERS = {
+    "search": "llm",
+    "general": "llm",  # unmatched messages fall back to web search
+    "portfolio": "standard",
+    "history": "standard",
+    "raw_data": "standard",
+    "invest": "standard",
+    "real_estate": "standard",
+}
+
+# Execution lanes: LLM search, aggregator/upstream API calls and local store reads
+# each get their own concurrency limit, wait queue and thread pool
+LANE_SCHEDULER = LaneScheduler(
+    lanes={
+        "llm": Lane("llm", max_concurrency=int(os.getenv("LANE_LLM_CONCURRENCY", "8")), max_queue=int(os.getenv("LANE_LLM_QUEUE", "64")), threads=8),
+        "aggregator": Lane("aggregator", max_concurrency=int(os.getenv("LANE_AGGREGATOR_CONCURRENCY", "16")), max_queue=int(os.getenv("LANE_AGGREGATOR_QUEUE", "128")), threads=16),
+        "local": Lane("local", max_concurrency=int(os.getenv("LANE_LOCAL_CONCURRENCY", "64")), max_queue=int(os.getenv("LANE_LOCAL_QUEUE", "1024")), threads=4),
+    },
+    routes={
+        "search": "llm",
+        "general": "llm",
+        "invest": "aggregator",
+        "raw_data": "aggregator",
+        # Listings are read from the local catalog snapshot (or the demo catalog), never downloaded per request
+        "real_estate": "local",
+        "portfolio": "local",
+        "history": "local",
+    },
+    default_lane="llm",
+)
+
+def classify_intent(message: str, allow_search: bool = True) -> str:
+    """
+    Classify a lower-cased /ask-agent message; answer_message dispatches on the result
+
+    Args:
+        message: Lower-cased message
+        allow_search: False to classify as if search had been ruled out (used when it fails)
+    """
+    is_direct_investment_command = "invest" in message and any(token in message for token in INVEST_TOKENS)
+    is_portfolio_request = any(keyword in message for keyword in PORTFOLIO_KEYWORDS)
+    if allow_search and any(keyword in message for keyword in SEARCH_KEYWORDS) and not (is_direct_investment_command or is_portfolio_request):
+        return "search"
+    if is_portfolio_request:
+        return "portfolio"
+    if any(keyword in message for keyword in HISTORY_KEYWORDS):
+        return "history"
+    if message in RAW_DATA_MESSAGES:
+        return "raw_data"
+    if is_direct_investment_command:
+        return "invest"
+    if any(keyword in message for keyword in REAL_ESTATE_KEYWORDS):
+        return "real_estate"
+    return "general"
+
+# Listing filters understood in real estate chat messages
+_LISTING_LOCATION_RE = re.compile(
+    r"\bin ([a-z][a-z .'-]*?(?:, ?[a-z]{2})?)(?=\s+(?:with|under|below|over|above|between|sorted|by|page|paying|yielding|priced|and)\b|[?.!]|$)"
+)
+_BOUND_WORDS = r"above|over|at least|more than|greater than|below|under|less than|at most|cheaper than"
+_UPPER_BOUND_WORDS = ("below", "under", "less than", "at most", "cheaper than")
+
+def _listing_bound_re(subject: str, unit: str = "") -> re.Pattern:
+    """'<subject> <comparator> N' or '<subject> between N and M'; groups: comparator, N, low, high"""
+    number = rf"\$?(\d+(?:\.\d+)?){unit}"
+    return re.compile(
+        rf"\b(?:{subject})\b(?:\s+(?:of|is|at|per month|monthly))?\s*"
+        rf"(?:({_BOUND_WORDS})\s*{number}|between\s*{number}\s*(?:and|to|-)\s*{number})"
+    )
+
+# (filter name, pattern) in matching order; each match is removed before the next pattern runs,
+# so a number is bound at most once and only to the quantity named before it
+_LISTING_BOUND_RES = (
+    ("apy", _listing_bound_re(r"apy|yields?|returns?|paying|yielding", r"\s*%?")),
+    ("rent", _listing_bound_re(r"rents?|monthly rent|rental income", r"(?:\s*(?:usdc|usd|dollars))?")),
+    ("price", _listing_bound_re(r"prices?|priced|tokens?|costs?|costing|(?=cheaper than)", r"(?:\s*(?:usdc|usd|dollars))?")),
+    # A bare percentage can only be an APY
+    ("apy", re.compile(
+        rf"(?:({_BOUND_WORDS})\s*(\d+(?:\.\d+)?)\s*%|between\s*(\d+(?:\.\d+)?)\s*%?\s*(?:and|to|-)\s*(\d+(?:\.\d+)?)\s*%)"
+    )),
+)
+_LISTING_PAGE_RE = re.compile(r"\bpage (\d+)\b")
+
+def parse_listing_request(message: str, resolve_location=None) -> dict:
+    """
+    Extract real estate listing filters from a lower-cased chat message.
+
+    Args:
+        message: Lower-cased /ask-agent message
+        resolve_location: Callable mapping location text to {"city"/"state": ...} filters
+
+    Returns:
+        {"filters": {...}, "sort": str, "descending": bool, "page": int}
+    """
+    filters = {"rented_only": True}
+    remainder = message
+    for name, pattern in _LISTING_BOUND_RES:
+        for match in pattern.finditer(remainder):
+            word, value, low, high = match.groups()
+            if word:
+                filters[f"max_{name}" if word in _UPPER_BOUND_WORDS else f"min_{name}"] = float(value)
+            else:
+                low, high = sorted((float(low), float(high)))
+                filters[f"min_{name}"], filters[f"max_{name}"] = low, high
+        remainder = pattern.sub(" ", remainder)
+
+    location = _LISTING_LOCATION_RE.search(message)
+    if location and resolve_location is not None:
+        filters.update(resolve_location(location.group(1)))
+
+    sort, descending = "apy", True
+    if "cheapest" in message or "lowest price" in message:
+        sort, descending = "price", False
+    elif "occupancy" in message:
+        sort = "occupancy"
+    elif "rent" in message and "rental" not in message:
+        sort = "rent"
+
+    page = _LISTING_PAGE_RE.search(message)
+    return {"filters": filters, "sort": sort, "descending": descending, "page": max(1, int(page.group(1))) if page else 1}
+
+# Helpful search answers (per /search-cache/feedback) become knowledge base documents
+KNOWLEDGE_LEARN_ENABLED = os.getenv("KNOWLEDGE_LEARN_ENABLED", "true").lower() == "true"
+
+# Semantic cache in front of search_web: rephrased prompts reuse stored answers
+SEARCH_SEMANTIC_CACHE = SemanticCache(
+    # Bigrams keep "high risk" apart from "best"; entity names and numbers must also match
+    HashingEmbedder(bigrams=True, binary=True, synonyms=SEARCH_SYNONYMS),
+    threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9")),
+    max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "512")),
+    ttl=float(os.getenv("SEMANTIC_CACHE_TTL", "3600")),
+    audit_rate=float(os.getenv("SEMANTIC_CACHE_AUDIT_RATE", "0.05")),
+) if os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true" else None
+_semantic_audits = set()
+
+def _is_search_success(result) -> bool:
+    return isinstance(result, str) and not result.startswith("Error searching web:")
+
+async def audit_semantic_hit(query: str, hit) -> None:
+    """Answer a semantically cached prompt for real and record whether the cached answer agreed"""
+    fresh = await search_web(query)
+    if _is_search_success(fresh) and SEARCH_SEMANTIC_CACHE.record_audit(hit, fresh):
+        logging.warning(f"Semantic cache false hit: '{query}' was served the answer for '{hit.cached_prompt}'")
+
+async def shared_search_web(query: str) -> str:
+    """Run search_web, sharing identical in-flight and recent queries and reusing answers to similar ones"""
+    if SEARCH_SEMANTIC_CACHE is not None:
+        hit = SEARCH_SEMANTIC_CACHE.lookup(query)
+        if hit is not None:
+            if SEARCH_SEMANTIC_CACHE.should_audit(hit):
+                task = asyncio.get_running_loop().create_task(audit_semantic_hit(query, hit))
+                _semantic_audits.add(task)
+                task.add_done_callback(_semantic_audits.discard)
+            return hit.answer
+
+    result = await shared_call(
+        ("search_web", query.strip().lower()),
+        lambda: search_web(query),
+        ttl=SEARCH_CACHE_TTL,
+        cache_if=_is_search_success,
+    )
+    if SEARCH_SEMANTIC_CACHE is not None and _is_search_success(result):
+        SEARCH_SEMANTIC_CACHE.store(query, result)
+    return result
 
 async def store_agent_response(response_text: str) -> None:
     """Helper function to store agent response in Supabase if available"""
@@ -43,31 +306,57 @@ async def store_agent_response(response_text: str) -> None:
         except Exception as e:
             logging.warning(f"Failed to store agent response in Supabase: {e}")
 
+# Pushes status transitions to /transactions/stream subscribers
+STATUS_BROADCASTER = StatusBroadcaster(
+    queue_size=int(os.getenv("TX_STREAM_QUEUE_SIZE", "64")),
+    max_subscribers=int(os.getenv("TX_STREAM_MAX_SUBSCRIBERS", "10000")),
+)
+TX_STREAM_PING_SECONDS = int(os.getenv("TX_STREAM_PING_SECONDS", "15"))
+
 def update_transaction_status(tx_hash: str, status: str = "confirmed"):
     """Update transaction status after blockchain confirmation"""
-    print(f"Updating transaction {tx_hash} to {status}")
-    print(f"Current transaction history: {TRANSACTION_HISTORY}")
-    
-    for tx in TRANSACTION_HISTORY:
-        print(f"Checking transaction: {tx.get('tx_hash')} == {tx_hash}")
-        if tx.get("tx_hash") == tx_hash:
-            tx["status"] = status
-            tx["confirmed_at"] = datetime.now().isoformat()
-            print(f"Updated transaction {tx_hash} to {status}")
-            return True
+    record = TRANSACTION_STORE.update_status(tx_hash, status, datetime.now().isoformat())
+    if record:
+        logger.info("Transaction status updated", extra={"event": "tx.status_updated", "tx_hash": tx_hash, "status": status})
+        record_x402_outcomes([record])
+        STATUS_BROADCASTER.publish(record)
+        return True
     
-    print(f"Transaction {tx_hash} not found in history")
+    logger.warning("Transaction not found for status update", extra={"event": "tx.not_found", "tx_hash": tx_hash, "status": status})
     return False
 
-def cleanup_duplicate_transactions():
-    """Remove duplicate transactions and merge x402 payments with blockchain transactions"""
-    global TRANSACTION_HISTORY
-    
+def record_x402_outcomes(records: list) -> None:
+    """Feed final statuses of x402-backed transactions into the payment analytics"""
+    if not X402_AVAILABLE:
+        return
+    for record in records:
+        if record.get("x402_payment_id"):
+            payment_analytics.record_outcome(record["x402_payment_id"], record["status"])
+
+def apply_status_updates(updates: dict) -> list:
+    """Apply bulk {tx_hash: status} updates from the confirmation poller"""
+    records = TRANSACTION_STORE.update_statuses(updates, datetime.now().isoformat())
+    record_x402_outcomes(records)
+    for record in records:
+        STATUS_BROADCASTER.publish(record)
+    return records
+
+chain_client = ChainClient(CHAIN_RPC_URLS)
+
+tx_poller = TransactionPoller(
+    TRANSACTION_STORE,
+    ChainClient([TX_POLLER_RPC_URL]) if TX_POLLER_RPC_URL else chain_client,
+    interval=TX_POLLER_INTERVAL,
+    apply_updates=apply_status_updates,
+)
+
+def cleanup_duplicate_transactions(transactions: list) -> list:
+    """Merge x402 payments with their blockchain transactions, newest first"""
     # Group transactions by x402 payment ID
     x402_groups = {}
     standalone_transactions = []
     
-    for tx in TRANSACTION_HISTORY:
+    for tx in transactions:
         x402_id = tx.get("x402_payment_id")
         if x402_id:
             if x402_id not in x402_groups:
@@ -99,7 +388,7 @@ def cleanup_duplicate_transactions():
                 "confirmed_at": blockchain_tx.get("confirmed_at")
             }
             cleaned_transactions.append(merged_tx)
-            print(f"Merged x402 {x402_id} with blockchain transaction")
+            logger.debug("Merged x402 payment with blockchain transaction", extra={"event": "tx.merged", "x402_payment_id": x402_id})
         elif blockchain_tx:
             cleaned_transactions.append(blockchain_tx)
         elif x402_only_tx:
@@ -111,8 +400,7 @@ def cleanup_duplicate_transactions():
     # Sort by timestamp (newest first)
     cleaned_transactions.sort(key=lambda x: x["timestamp"], reverse=True)
     
-    TRANSACTION_HISTORY = cleaned_transactions
-    print(f"Cleaned up transactions. New count: {len(TRANSACTION_HISTORY)}")
+    return cleaned_transactions
 
 # Enhanced RWA Investment Database with detailed options
 RWA_INVESTMENT_OPTIONS = {
@@ -265,107 +553,54 @@ def analyze_prompt_and_recommend(prompt: str) -> list:
     # Return top 3 recommendations
     return recommendations[:3]
 
-def fetch_real_estate_rwa_data():
+def fetch_real_estate_rwa_data(filters: dict | None = None, sort: str = "apy", descending: bool = True,
+                               page: int = 1, page_size: int = REAL_ESTATE_PAGE_SIZE) -> dict:
     """
-    Fetch real-time Real Estate RWA data from multiple sources
-    Focus on Real Estate for hackathon simplicity
+    Fetch a page of Real Estate RWA listings from the full RealT catalog
+
+    Args:
+        filters: RealTCatalog.query filters (city, state, min/max_apy, min/max_price, min/max_rent, rented_only)
+        sort: One of SORT_KEYS
+        descending: Sort order
+        page: 1-based page number
+        page_size: Listings per page
+
+    Returns:
+        {"total", "page", "page_size", "source", "assets"}
     """
     real_estate_assets = []
+    total = None
+    source = "realt"
     
     try:
-        # Source 1: RealT API (Real Estate Tokenization Platform)
+        # Source 1: RealT catalog snapshot (Real Estate Tokenization Platform),
+        # memory-mapped from disk and refreshed from the RealT API in the background.
+        # Never downloaded here: until the first snapshot exists, the demo catalog is served
         try:
-            realt_url = "https://api.realt.community/v1/token"
-            response = requests.get(realt_url, timeout=10)
-            if response.status_code == 200:
-                realt_data = response.json()
-                # Process first 5 properties
-                for i, property_data in enumerate(realt_data[:5]):
-                    if property_data.get('rentedUnits', 0) > 0:
-                        asset = {
-                            "asset_id": f"REALT-{i+1:03d}",
-                            "asset_type": "Real Estate Token",
-                            "protocol": "RealT",
-                            "property_name": property_data.get('fullName', 'Unknown Property'),
-                            "location": f"{property_data.get('city', 'Unknown')}, {property_data.get('state', 'US')}",
-                            "yield_apy": round(float(property_data.get('annualPercentageYield', 0)), 2),
-                            "token_price": round(float(property_data.get('tokenPrice', 0)), 2),
-                            "total_tokens": property_data.get('totalTokens', 0),
-                            "rented_units": property_data.get('rentedUnits', 0),
-                            "total_units": property_data.get('totalUnits', 0),
-                            "min_investment": f"{property_data.get('tokenPrice', 50)} USDC",
-                            "status": "Active" if property_data.get('rentedUnits', 0) > 0 else "Inactive",
-                            "last_updated": datetime.now().isoformat(),
-                            "source": "RealT API"
-                        }
-                        real_estate_assets.append(asset)
+            catalog = REALT_CATALOG.catalog
+            if catalog is not None and len(catalog):
+                total, rows = catalog.query(
+                    **(filters or {}), sort=sort, descending=descending,
+                    offset=(page - 1) * page_size, limit=page_size,
+                )
+                real_estate_assets = [catalog.asset(int(i)) for i in rows]
         except Exception as e:
-            print(f"RealT API error: {e}")
+            logger.warning(f"RealT catalog error: {e}")
         
-        # Source 2: Fallback with synthetic real-time data (for demo reliability)
-        if len(real_estate_assets) < 3:
-            synthetic_properties = [
-                {
-                    "property_name": "Detroit Residential Complex A",
-                    "location": "Detroit, MI",
-                    "base_apy": 8.2,
-                    "base_price": 62.50
-                },
-                {
-                    "property_name": "Cleveland Multi-Family B", 
-                    "location": "Cleveland, OH",
-                    "base_apy": 7.8,
-                    "base_price": 45.00
-                },
-                {
-                    "property_name": "Memphis Rental Portfolio C",
-                    "location": "Memphis, TN", 
-                    "base_apy": 9.1,
-                    "base_price": 38.75
-                },
-                {
-                    "property_name": "Birmingham Investment Property D",
-                    "location": "Birmingham, AL",
-                    "base_apy": 7.5,
-                    "base_price": 55.25
-                },
-                {
-                    "property_name": "Toledo Residential Units E",
-                    "location": "Toledo, OH",
-                    "base_apy": 8.7,
-                    "base_price": 41.80
-                }
-            ]
-            
-            current_time = datetime.now()
-            for i, prop in enumerate(synthetic_properties[:5]):
-                # Add some realistic variation
-                apy_variation = random.uniform(-0.5, 0.8)
-                price_variation = random.uniform(-2.0, 3.0)
-                
-                asset = {
-                    "asset_id": f"RE-{i+1:03d}",
-                    "asset_type": "Real Estate Token",
-                    "protocol": "RWA-GPT Demo",
-                    "property_name": prop["property_name"],
-                    "location": prop["location"],
-                    "yield_apy": round(prop["base_apy"] + apy_variation, 2),
-                    "token_price": round(prop["base_price"] + price_variation, 2),
-                    "total_tokens": random.randint(800, 2000),
-                    "rented_units": random.randint(12, 24),
-                    "total_units": random.randint(15, 30),
-                    "min_investment": f"{round(prop['base_price'] + price_variation, 2)} USDC",
-                    "occupancy_rate": round(random.uniform(85, 98), 1),
-                    "monthly_rent": random.randint(800, 1500),
-                    "status": "Active",
-                    "last_updated": current_time.isoformat(),
-                    "source": "Real-time Demo Data"
-                }
-                real_estate_assets.append(asset)
+        # Source 2: Fallback to the seeded synthetic demo catalog (for demo reliability)
+        if total is None:
+            source = "synthetic"
+            catalog = demo_catalog()
+            total, rows = catalog.query(
+                **(filters or {}), sort=sort, descending=descending,
+                offset=(page - 1) * page_size, limit=page_size,
+            )
+            real_estate_assets = [catalog.asset(int(i)) for i in rows]
 
     except Exception as e:
-        print(f"Error fetching real estate data: {e}")
+        logger.error(f"Error fetching real estate data: {e}")
         # Ultimate fallback
+        source = "fallback"
         real_estate_assets = [{
             "asset_id": "RE-FALLBACK",
             "asset_type": "Real Estate Token", 
@@ -379,10 +614,103 @@ def fetch_real_estate_rwa_data():
             "last_updated": datetime.now().isoformat(),
             "source": "Fallback Data"
         }]
+        total = 1
     
-    return real_estate_assets[:5]  # Return top 5 properties
+    return {
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "source": source,
+        "assets": real_estate_assets,
+    }
+
+async def cached_real_estate_listing(listing: dict) -> dict:
+    """Listing page for a parse_listing_request result, shared across identical requests"""
+    listing_key = (tuple(sorted(listing["filters"].items())), listing["sort"], listing["descending"], listing["page"])
+    return await shared_call(
+        ("real_estate", listing_key),
+        lambda: lane_to_thread(
+            fetch_real_estate_rwa_data,
+            listing["filters"], listing["sort"], listing["descending"], listing["page"],
+        ),
+        ttl=REAL_ESTATE_CACHE_TTL,
+    )
+
+# Startup warm-up: /health answers 503 "warming" until it has finished
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "20"))
+WARMUP_AGENT_INVOKE = os.getenv("WARMUP_AGENT_INVOKE", "false").lower() == "true"
+
+# Pooled sessions and the hosts they talk to; one request each opens a keep-alive connection
+WARMUP_UPSTREAMS = {
+    "1inch": ["https://api.1inch.dev"],
+    "0x": [chain.zerox_url for chain in get_registry().chains() if chain.zerox_url],
+    "realt": [REALT_TOKENS_URL],
+}
+
+def _open_connection(session_name: str, url: str) -> int:
+    # HEAD is enough: DNS, TCP and TLS happen and the connection returns to the pool
+    return get_session(session_name).head(url, timeout=WARMUP_TIMEOUT).status_code
+
+async def warm_connection_pools() -> dict:
+    targets = [(name, url) for name, urls in WARMUP_UPSTREAMS.items() for url in urls]
+    if os.getenv("SUBGRAPH_URL"):
+        targets.append(("subgraph", os.getenv("SUBGRAPH_URL")))
+    targets += [(f"rpc:{url}", url) for url in CHAIN_RPC_URLS]
+    results = await asyncio.gather(
+        *(asyncio.to_thread(_open_connection, name, url) for name, url in targets), return_exceptions=True
+    )
+    # Any HTTP status means the connection is open; only transport errors are reported
+    return {url: (type(result).__name__ if isinstance(result, Exception) else result) for (_, url), result in zip(targets, results)}
+
+async def warm_listings() -> dict:
+    # Downloads the catalog if there was no snapshot; ASSET_HISTORY records it on load
+    catalog = await asyncio.to_thread(REALT_CATALOG.get)
+    await asyncio.to_thread(demo_catalog)
+    listing = parse_listing_request("real estate", catalog.match_location if catalog is not None else None)
+    real_estate_data = await cached_real_estate_listing(listing)
+    render_real_estate_listing(real_estate_data["assets"], datetime.now().strftime('%Y-%m-%d %H:%M:%S'), total=real_estate_data["total"])
+    return {"source": real_estate_data["source"], "total": real_estate_data["total"]}
+
+async def warm_knowledge_base() -> dict:
+    knowledge_base = await asyncio.to_thread(get_knowledge_base)
+    return {"loaded": knowledge_base is not None}
+
+async def warm_supabase() -> dict:
+    if not SUPABASE_AVAILABLE:
+        return {"available": False}
+    await fetch_messages_page(None, 1)
+    return {"available": True}
+
+WARMUP = Warmup(
+    {
+        "connection_pools": warm_connection_pools,
+        "listings": warm_listings,
+        "knowledge_base": warm_knowledge_base,
+        "agent_graph": lambda: warm_agent(invoke=WARMUP_AGENT_INVOKE),
+        "supabase": warm_supabase,
+    },
+    timeout=WARMUP_TIMEOUT,
+    enabled=WARMUP_ENABLED,
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if TX_POLLER_ENABLED:
+        tx_poller.start()
+    # Serve listings from the last snapshot right away; refresh in the background
+    await asyncio.to_thread(REALT_CATALOG.load_snapshot)
+    if REALT_REFRESH_ENABLED:
+        REALT_CATALOG.start()
+    # Warm up in the background so the server accepts connections (and /health) meanwhile
+    WARMUP.start()
+    yield
+    await WARMUP.stop()
+    await tx_poller.stop()
+    await REALT_CATALOG.stop()
+    LANE_SCHEDULER.shutdown()
 
-app = FastAPI(title="RWA-GPT API", version="1.0.0")
+app = FastAPI(title="RWA-GPT API", version="1.0.0", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -397,9 +725,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in request profiling: "X-Profile: <PROFILING_ADMIN_TOKEN>" or PROFILING_SAMPLE_RATE
+app.add_middleware(
+    ProfilingMiddleware,
+    output_dir=os.getenv("PROFILING_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "profiles")),
+    paths=[p.strip() for p in os.getenv("PROFILING_PATHS", "/ask-agent").split(",") if p.strip()],
+    sample_rate=float(os.getenv("PROFILING_SAMPLE_RATE", "0")),
+    admin_token=os.getenv("PROFILING_ADMIN_TOKEN") or None,
+    max_files=int(os.getenv("PROFILING_MAX_FILES", "200")),
+    backend=os.getenv("PROFILING_BACKEND", "auto"),
+)
+
 @app.get("/")
 async def root():
-    return {"status": "ok", "endpoints": ["/health", "/ask-agent", "/update-transaction", "/store-transaction"]}
+    return {"status": "ok", "endpoints": ["/health", "/ask-agent", "/ask-agent/batch", "/quotes", "/quotes/best-route", "/chains", "/real-estate", "/assets/{asset_id}/history", "/transactions/stream", "/export/transactions", "/export/messages", "/update-transaction", "/store-transaction", "/portfolio/{address}", "/chain/balance/{address}", "/chain/receipt/{tx_hash}", "/pool/total-invested", "/yield/distribute", "/x402/analytics", "/search-cache/stats", "/search-cache/feedback"]}
 
 @app.post("/update-transaction")
 async def update_transaction(request: dict):
@@ -426,7 +765,8 @@ async def store_transaction(request: dict):
     """Store transaction hash when transaction is first submitted"""
     try:
         tx_hash = request.get("tx_hash")
-        amount = request.get("amount", "unknown")
+        # Clients may send a JSON number; records always hold the amount as text
+        amount = str(request.get("amount", "unknown"))
         asset_id = request.get("asset_id", "RE-001")
         status = request.get("status", "pending")
         x402_payment_id = request.get("x402_payment_id")
@@ -434,27 +774,13 @@ async def store_transaction(request: dict):
         if not tx_hash:
             return {"error": "tx_hash is required"}
         
-        print(f"Storing transaction hash: {tx_hash}")
-        print(f"x402 payment ID: {x402_payment_id}")
-        print(f"Current history before update: {TRANSACTION_HISTORY}")
-        
-        # Find the most recent pending transaction with matching x402 payment ID
-        updated = False
-        for tx in reversed(TRANSACTION_HISTORY):
-            # Match by x402 payment ID if provided, otherwise match by pending status
-            if x402_payment_id and tx.get("x402_payment_id") == x402_payment_id:
-                tx["tx_hash"] = tx_hash
-                updated = True
-                print(f"Updated x402 transaction {x402_payment_id} with hash: {tx_hash}")
-                break
-            elif not x402_payment_id and tx["status"] == "pending" and tx["tx_hash"] is None:
-                tx["tx_hash"] = tx_hash
-                updated = True
-                print(f"Updated pending transaction with hash: {tx_hash}")
-                break
-        
-        if not updated:
-            print("No matching transaction found, creating new entry")
+        # Match by x402 payment ID if provided, otherwise the most recent unhashed pending transaction
+        updated = TRANSACTION_STORE.attach_tx_hash(tx_hash, x402_payment_id) is not None
+        if x402_payment_id and X402_AVAILABLE:
+            payment_analytics.record_hash_attached(x402_payment_id)
+        if updated:
+            logger.info("Transaction hash attached", extra={"event": "tx.hash_attached", "tx_hash": tx_hash, "x402_payment_id": x402_payment_id})
+        else:
             # Create a new transaction record if none found
             new_transaction = {
                 "timestamp": datetime.now().isoformat(),
@@ -468,10 +794,11 @@ async def store_transaction(request: dict):
                 "tx_hash": tx_hash,
                 "confirmed_at": None
             }
-            TRANSACTION_HISTORY.append(new_transaction)
-            print(f"Created new transaction record: {new_transaction}")
-        
-        print(f"History after update: {TRANSACTION_HISTORY}")
+            new_transaction = TRANSACTION_STORE.add(new_transaction)
+            logger.info(
+                "No matching transaction; created a new record",
+                extra={"event": "tx.created", "tx_id": new_transaction["id"], "tx_hash": tx_hash, "x402_payment_id": x402_payment_id},
+            )
         
         return {
             "success": True,
@@ -485,14 +812,97 @@ class MessageRequest(BaseModel):
     message: str
     chainId: int | None = None
     fromAddress: str | None = None
+    # Opt-in: return typed data in `data` and only a short summary in `response`
+    structured: bool = False
+    # Retries with the same key reuse the original x402 payment intent
+    idempotencyKey: str | None = None
+
+class AssetData(BaseModel):
+    asset_id: str
+    asset_type: str | None = None
+    protocol: str | None = None
+    property_name: str | None = None
+    location: str | None = None
+    yield_apy: float | None = None
+    token_price: float | None = None
+    min_investment: str | None = None
+    occupancy_rate: float | None = None
+    rented_units: int | None = None
+    total_units: int | None = None
+    monthly_rent: float | None = None
+    status: str | None = None
+    source: str | None = None
+    last_updated: str | None = None
+
+class TransactionData(BaseModel):
+    timestamp: str
+    user_address: str
+    amount: str
+    asset_id: str
+    transaction_type: str
+    status: str
+    chain_id: int
+    tx_hash: str | None = None
+    confirmed_at: str | None = None
+    x402_payment_id: str | None = None
+
+    @field_validator("amount", mode="before")
+    @classmethod
+    def _amount_as_text(cls, value):
+        # Records stored before amounts were normalized may hold JSON numbers
+        return str(value)
+
+class QuoteData(BaseModel):
+    amount: str
+    chain_id: int
+    src_token: str
+    dst_token: str
+    source: str | None = None
+    to_amount: str | None = None
+    fallback: bool = False
+
+class StructuredData(BaseModel):
+    kind: str  # "transactions" | "assets" | "quote" | "portfolio"
+    assets: list[AssetData] | None = None
+    transactions: list[TransactionData] | None = None
+    quote: QuoteData | None = None
+    portfolio: dict | None = None
 
 class MessageResponse(BaseModel):
     response: str
     is_transaction: bool = False
     transaction_data: dict | None = None
+    data: StructuredData | None = None
+
+def rate_limit_client_key(http_request: Request | None) -> str:
+    """Rate-limit by client IP; the body's wallet address is caller-chosen, so rotating it must not reset the bucket"""
+    if http_request is not None and http_request.client is not None:
+        return f"ip:{http_request.client.host}"
+    return "anonymous"
 
 @app.post("/ask-agent", response_model=MessageResponse)
-async def ask_agent(request: MessageRequest):
+async def ask_agent(request: MessageRequest, http_request: Request = None):
+    intent = classify_intent(request.message.lower())
+
+    # Reject over-limit clients up front, before any upstream work
+    if RATE_LIMIT_ENABLED:
+        try:
+            RATE_LIMITER.check(INTENT_TIERS[intent], rate_limit_client_key(http_request))
+        except RateLimitExceeded as e:
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": e.retry_after_header})
+
+    return await run_message(request, intent)
+
+async def run_message(request: MessageRequest, intent: str) -> MessageResponse:
+    """Answer one already-admitted message; callers apply the rate limit"""
+    # Run in the intent's lane so cheap reads never queue behind LLM calls
+    try:
+        return await LANE_SCHEDULER.run(intent, lambda: answer_message(request, intent))
+    except LaneFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(int(e.retry_after))})
+
+async def answer_message(request: MessageRequest, intent: str) -> MessageResponse:
+    """Dispatch one /ask-agent message to the handler for its classify_intent result"""
     try:
         message = request.message.lower()
         
@@ -509,12 +919,9 @@ async def ask_agent(request: MessageRequest):
 
         # Priority 1: Check for web search intent first.
         # This is to distinguish "best investments" (search) from "invest 100 usdc" (action).
-        search_keywords = ["search", "what is", "who is", "explain", "best", "top", "latest", "find", "tell me about", "compare", "how to"]
-        is_direct_investment_command = "invest" in message and any(token in message for token in ["usdc", "dai", "tcb", "pcr", "rwa"])
-
-        if any(keyword in message for keyword in search_keywords) and not is_direct_investment_command:
+        if intent == "search":
             try:
-                search_result = await search_web(request.message)
+                search_result = await shared_search_web(request.message)
                 await store_agent_response(search_result)
                 return MessageResponse(
                     response=search_result,
@@ -522,57 +929,55 @@ async def ask_agent(request: MessageRequest):
                 )
             except Exception as e:
                 logging.error(f"Web search failed: {e}")
-                # If search fails, we can fall through to other handlers.
-                pass
+                # If search fails, fall through to the handler the message would get without it
+                intent = classify_intent(message, allow_search=False)
         
-        # Check if user wants to see transaction history
-        if any(keyword in message for keyword in ["transaction history", "my transactions", "transaction list", "history", "past transactions"]):
-            # Clean up duplicate transactions before showing history
-            cleanup_duplicate_transactions()
-            
+        # Portfolio totals come from the store's incrementally maintained counters
+        if intent == "portfolio":
             user_address = request.fromAddress or "0x1234567890123456789012345678901234567890"
-            
-            # Filter transactions for this user
-            user_transactions = [tx for tx in TRANSACTION_HISTORY if tx["user_address"].lower() == user_address.lower()]
-            
-            if not user_transactions:
-                response_text = "📋 **Your Transaction History**\n\nNo transactions found yet.\n\n💡 Try making an investment first:\n• 'invest 100 USDC in RE-001'\n• 'invest 50 USDC in RE-002'"
+            counters = await lane_to_thread(TRANSACTION_STORE.portfolio_counters, user_address)
+            portfolio = build_portfolio(user_address, counters)
+
+            if request.structured:
+                response_text = f"Portfolio: {portfolio['total_invested']} USDC invested"
                 await store_agent_response(response_text)
                 return MessageResponse(
                     response=response_text,
-                    is_transaction=False
+                    is_transaction=False,
+                    data=StructuredData(kind="portfolio", portfolio=portfolio)
                 )
+
+            response_text = render_portfolio(portfolio)
+            await store_agent_response(response_text)
+            return MessageResponse(
+                response=response_text,
+                is_transaction=False
+            )
+
+        # Check if user wants to see transaction history
+        elif intent == "history":
+            user_address = request.fromAddress or "0x1234567890123456789012345678901234567890"
+            
+            # Merge x402/blockchain duplicates, then filter transactions for this user
+            all_transactions = cleanup_duplicate_transactions(await lane_to_thread(TRANSACTION_STORE.list_transactions))
+            user_transactions = [tx for tx in all_transactions if tx["user_address"].lower() == user_address.lower()]
             
             # Sort by timestamp (newest first)
             user_transactions.sort(key=lambda x: x["timestamp"], reverse=True)
-            
-            response_text = f"📋 **Your Transaction History**\n\n"
-            response_text += f"Found {len(user_transactions)} transaction(s)\n\n"
-            
-            for i, tx in enumerate(user_transactions, 1):
-                response_text += f"🔹 **Transaction #{i}**\n"
-                response_text += f"   💰 Amount: {tx['amount']} USDC\n"
-                response_text += f"   🏠 Asset: {tx['asset_id']}\n"
-                response_text += f"   📅 Time: {tx['timestamp'][:19].replace('T', ' ')}\n"
-                response_text += f"   🔗 Chain: Polygon Amoy (ID: {tx['chain_id']})\n"
-                
-                # Status with emoji
-                status_emoji = "✅" if tx['status'] == "confirmed" else "⏳" if tx['status'] == "pending" else "❌"
-                response_text += f"   📊 Status: {status_emoji} {tx['status'].title()}\n"
-                
-                if tx.get('tx_hash'):
-                    response_text += f"   🔗 TX Hash: {tx['tx_hash']}\n"
-                if tx.get('confirmed_at'):
-                    response_text += f"   ✅ Confirmed: {tx['confirmed_at'][:19].replace('T', ' ')}\n"
-                if tx.get('x402_payment_id'):
-                    response_text += f"   🤖 x402 ID: {tx['x402_payment_id']}\n"
-                response_text += "\n"
-            
-            response_text += "💡 **Commands:**\n"
-            response_text += "• 'invest 100 USDC in RE-001' - Make new investment\n"
-            response_text += "• 'show real estate investments' - View available options\n"
-            response_text += "• 'transaction history' - View this list again\n"
-            
+
+            if request.structured:
+                response_text = f"Found {len(user_transactions)} transaction(s)"
+                await store_agent_response(response_text)
+                return MessageResponse(
+                    response=response_text,
+                    is_transaction=False,
+                    data=StructuredData(
+                        kind="transactions",
+                        transactions=[TransactionData(**tx) for tx in user_transactions]
+                    )
+                )
+
+            response_text = render_transaction_history(user_transactions)
             await store_agent_response(response_text)
             return MessageResponse(
                 response=response_text,
@@ -580,10 +985,15 @@ async def ask_agent(request: MessageRequest):
             )
         
         # Check if user wants to see RAW subgraph data (very specific request)
-        elif message in ["subgraph data", "raw data"]:
+        elif intent == "raw_data":
             subgraph_url = os.getenv("SUBGRAPH_URL")
             if subgraph_url:
-                live_data = query_rwa_database(subgraph_url)
+                live_data = await shared_call(
+                    ("subgraph", subgraph_url),
+                    lambda: lane_to_thread(query_rwa_database, subgraph_url),
+                    ttl=SUBGRAPH_CACHE_TTL,
+                    cache_if=lambda data: data is not None,
+                )
                 if live_data:
                     response_text = f"Raw investment data from subgraph:\n{json.dumps(live_data, indent=2)}"
                     await store_agent_response(response_text)
@@ -660,32 +1070,26 @@ async def ask_agent(request: MessageRequest):
                 )
         
         # Check if user wants to invest (more flexible matching)
-        elif is_direct_investment_command:
+        elif intent == "invest":
             try:
                 # Extract amount from message (simple parse; default 100)
                 m = re.search(r"(\d+(?:\.\d+)?)", request.message)
                 amount = m.group(1) if m else "100"
                 from_address = request.fromAddress or "0x1234567890123456789012345678901234567890"  # Placeholder
-                chain_id = 80002  # Force Polygon Amoy Testnet for testing
+                # The wallet's chain; the registry's default chain (Polygon Amoy) when not sent
+                chain_id = request.chainId or get_registry().default_chain
                 
-                # Get correct token addresses for the testnet
-                from .agent import tokens_for_chain
+                # USDC -> WETH on that chain; unsupported chains are reported, not remapped
                 src_token, dst_token, src_decimals = tokens_for_chain(chain_id)
                 
-                # Get swap data from 1inch
-                swap_data = get_1inch_swap_data(
-                    chain_id=chain_id,
-                    src_token=src_token,  # USDC on Amoy Testnet
-                    dst_token=dst_token,  # WETH on Amoy Testnet
-                    amount_human=amount,
-                    src_token_decimals=src_decimals,
-                    from_address=from_address,
-                )
+                # Get swap data from 1inch (identical in-flight quotes are shared)
+                swap_data = await fetch_swap_quote(chain_id, src_token, dst_token, amount, src_decimals, from_address)
                 
                 is_tx = bool(swap_data and isinstance(swap_data, dict) and (swap_data.get("tx") or swap_data.get("to")))
 
                 # Demo fallback: if no tx from aggregators, return a safe no-op tx
                 tx_payload = None
+                is_fallback = not is_tx
                 if not is_tx:
                     tx = {
                         "to": from_address,
@@ -696,26 +1100,36 @@ async def ask_agent(request: MessageRequest):
                     tx_payload = tx
                     is_tx = True
                 else:
-                    tx_payload = swap_data.get("tx") or swap_data
+                    # Copy: swap_data may be shared with concurrent identical requests
+                    tx_payload = dict(swap_data.get("tx") or swap_data)
 
                 # Optional x402 enhancement (doesn't break existing flow)
                 response_text = f"1inch swap data for {amount} USDC:"
                 x402_payment_id = None
+                is_replay = False
                 if X402_AVAILABLE:
                     try:
-                        x402_processor = X402PaymentProcessor()
-                        x402_result = x402_processor.process_agent_payment(
+                        x402_result = get_payment_processor().process_agent_payment(
                             investment_request=request.message,
                             amount=amount,
                             asset_id="RE-001",  # Extract from message in production
-                            user_address=from_address
+                            user_address=from_address,
+                            idempotency_key=request.idempotencyKey,
+                            chain_id=chain_id
                         )
                         if x402_result["status"] == "processed":
                             x402_payment_id = x402_result['x402_payment_id']
+                            is_replay = x402_result.get("idempotent_replay", False)
                             response_text += f"\n\n🤖 x402 Agentic Payment Available:\n{x402_result['agent_response']}\n💡 Payment ID: {x402_payment_id}"
                             # Add x402 metadata to transaction
                             if isinstance(tx_payload, dict):
                                 tx_payload["x402_metadata"] = x402_result
+                    except IdempotencyConflictError as e:
+                        # A reused key for a different payment: neither replay nor create a new one
+                        return MessageResponse(
+                            response=f"❌ {e}. Use a new idempotency key for a new investment.",
+                            is_transaction=False
+                        )
                     except Exception as e:
                         # Silently continue with existing flow if x402 fails
                         pass
@@ -733,12 +1147,30 @@ async def ask_agent(request: MessageRequest):
                     "tx_hash": None,  # Will be updated when transaction is executed
                     "confirmed_at": None
                 }
-                TRANSACTION_HISTORY.append(transaction_record)
+                # A retried request already stored its record with the original intent
+                if not is_replay:
+                    await lane_to_thread(TRANSACTION_STORE.add, transaction_record)
+
+                structured_data = None
+                if request.structured:
+                    structured_data = StructuredData(
+                        kind="quote",
+                        quote=QuoteData(
+                            amount=amount,
+                            chain_id=chain_id,
+                            src_token=src_token,
+                            dst_token=dst_token,
+                            source=None if is_fallback else swap_data.get("_source", "1inch"),
+                            to_amount=None if is_fallback else swap_data.get("toAmount"),
+                            fallback=is_fallback
+                        )
+                    )
 
                 return MessageResponse(
                     response=response_text,
                     is_transaction=is_tx,
-                    transaction_data=tx_payload
+                    transaction_data=tx_payload,
+                    data=structured_data
                 )
             except Exception as e:
                 return MessageResponse(
@@ -749,34 +1181,27 @@ async def ask_agent(request: MessageRequest):
         # Real-time RWA data (focused on Real Estate for hackathon)
         else:
             # Check if user is asking for real estate or general investments
-            if any(keyword in message for keyword in ["real estate", "property", "rental", "realt", "rwa", "investment"]) and not is_direct_investment_command:
-                # Fetch real-time real estate data
-                real_estate_data = fetch_real_estate_rwa_data()
-                
-                response_text = f"🏠 **REAL-TIME REAL ESTATE RWA INVESTMENTS**\n"
-                response_text += f"📊 Live data updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-                
-                for i, asset in enumerate(real_estate_data, 1):
-                    response_text += f"🏆 #{i} - {asset['asset_id']}\n"
-                    response_text += f"🏢 Property: {asset['property_name']}\n"
-                    response_text += f"📍 Location: {asset['location']}\n"
-                    response_text += f"💰 APY: {asset['yield_apy']}% | Token Price: ${asset['token_price']}\n"
-                    
-                    if asset.get('occupancy_rate'):
-                        response_text += f"🏠 Occupancy: {asset['occupancy_rate']}% | Units: {asset['rented_units']}/{asset['total_units']}\n"
-                    if asset.get('monthly_rent'):
-                        response_text += f"💵 Monthly Rent: ${asset['monthly_rent']}\n"
-                    
-                    response_text += f"🔵 Min Investment: {asset['min_investment']}\n"
-                    response_text += f"📈 Status: {asset['status']} | Source: {asset['source']}\n"
-                    response_text += f"⚡ To invest: 'invest 100 USDC in {asset['asset_id']}'\n\n"
+            if intent == "real_estate":
+                # Fetch real-time real estate data, filtered by location/APY/price in the message
+                catalog = REALT_CATALOG.catalog
+                listing = parse_listing_request(message, catalog.match_location if catalog is not None else None)
+                real_estate_data = await cached_real_estate_listing(listing)
                 
-                response_text += "🎯 **Why Real Estate RWA?**\n"
-                response_text += "• Fractional ownership of real properties\n"
-                response_text += "• Monthly rental income distributions\n"
-                response_text += "• Transparent, blockchain-verified ownership\n"
-                response_text += "• Lower minimum investments than traditional REITs\n\n"
-                response_text += "💡 Try: 'invest 50 USDC in RE-001' or 'show me more properties'\n"
+                if request.structured:
+                    return MessageResponse(
+                        response=f"{real_estate_data['total']} real estate RWA investment(s) available",
+                        is_transaction=False,
+                        data=StructuredData(
+                            kind="assets",
+                            assets=[AssetData(**asset) for asset in real_estate_data["assets"]]
+                        )
+                    )
+
+                response_text = render_real_estate_listing(
+                    real_estate_data["assets"], datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                    total=real_estate_data["total"],
+                    start=(real_estate_data["page"] - 1) * real_estate_data["page_size"] + 1,
+                )
                 
                 return MessageResponse(
                     response=response_text,
@@ -785,7 +1210,7 @@ async def ask_agent(request: MessageRequest):
             else:
                 # Fallback to web search if no other handlers match
                 try:
-                    search_result = await search_web(request.message)
+                    search_result = await shared_search_web(request.message)
                     await store_agent_response(search_result)
                     return MessageResponse(
                         response=search_result,
@@ -802,6 +1227,491 @@ async def ask_agent(request: MessageRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+class BatchMessageRequest(BaseModel):
+    messages: list[MessageRequest]
+    max_concurrency: int | None = None
+
+class BatchItemResult(BaseModel):
+    index: int
+    ok: bool
+    result: MessageResponse | None = None
+    error: str | None = None
+
+class BatchMessageResponse(BaseModel):
+    results: list[BatchItemResult]
+    succeeded: int
+    failed: int
+
+@app.post("/ask-agent/batch", response_model=BatchMessageResponse)
+async def ask_agent_batch(request: BatchMessageRequest, http_request: Request):
+    """Answer many messages concurrently, returning results in request order"""
+    if len(request.messages) > BATCH_MAX_MESSAGES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch too large: {len(request.messages)} messages (max {BATCH_MAX_MESSAGES})"
+        )
+
+    # Admit the whole batch once; its items then skip the per-request limiter
+    if RATE_LIMIT_ENABLED:
+        _, batch_burst = RATE_LIMITER.tiers["batch"]
+        if len(request.messages) > batch_burst:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Batch too large: {len(request.messages)} messages (rate limit allows {int(batch_burst)} at once)"
+            )
+        try:
+            RATE_LIMITER.check("batch", rate_limit_client_key(http_request), cost=len(request.messages))
+        except RateLimitExceeded as e:
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": e.retry_after_header})
+
+    concurrency = min(request.max_concurrency or BATCH_MAX_CONCURRENCY, BATCH_MAX_CONCURRENCY)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run_item(index: int, item: MessageRequest) -> BatchItemResult:
+        async with semaphore:
+            try:
+                result = await run_message(item, classify_intent(item.message.lower()))
+                return BatchItemResult(index=index, ok=True, result=result)
+            except HTTPException as e:
+                return BatchItemResult(index=index, ok=False, error=str(e.detail))
+            except Exception as e:
+                return BatchItemResult(index=index, ok=False, error=str(e))
+            except asyncio.CancelledError:
+                # Re-raise when the batch itself is cancelled; a cancellation leaking
+                # out of a shared call only fails this item
+                if asyncio.current_task().cancelling():
+                    raise
+                return BatchItemResult(index=index, ok=False, error="cancelled")
+
+    results = await asyncio.gather(*(run_item(i, item) for i, item in enumerate(request.messages)))
+    succeeded = sum(1 for r in results if r.ok)
+    return BatchMessageResponse(
+        results=list(results),
+        succeeded=succeeded,
+        failed=len(results) - succeeded
+    )
+
+async def fetch_swap_quote(chain_id: int, src_token: str, dst_token: str, amount: str, src_decimals: int, from_address: str) -> dict:
+    """Aggregator swap data; identical in-flight quotes share one upstream call"""
+    return await shared_call(
+        ("swap", chain_id, src_token, dst_token, amount, from_address.lower()),
+        lambda: lane_to_thread(
+            get_1inch_swap_data,
+            chain_id=chain_id,
+            src_token=src_token,
+            dst_token=dst_token,
+            amount_human=amount,
+            src_token_decimals=src_decimals,
+            from_address=from_address,
+        ),
+    )
+
+class QuoteItem(BaseModel):
+    asset: str
+    amount: str
+    chainId: int = 137
+
+class QuoteGridRequest(BaseModel):
+    items: list[QuoteItem]
+    fromAddress: str | None = None
+
+def summarize_quote(swap_data: dict) -> dict:
+    """Reduce aggregator swap data to the fields a quote table needs"""
+    if not isinstance(swap_data, dict) or swap_data.get("error"):
+        error = swap_data.get("error") if isinstance(swap_data, dict) else "invalid aggregator response"
+        return {"ok": False, "error": error}
+    tx = swap_data.get("tx") or (swap_data if swap_data.get("to") else None)
+    return {
+        "ok": True,
+        "source": swap_data.get("_source", "1inch"),
+        "toAmount": swap_data.get("toAmount") or swap_data.get("dstAmount"),
+        "executable": bool(tx),
+        "tx": tx,
+    }
+
+@app.post("/quotes")
+async def get_quotes(request: QuoteGridRequest):
+    """Fetch a grid of (asset, amount, chain) quotes concurrently, deduplicating identical pairs"""
+    if len(request.items) > QUOTES_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many quotes: {len(request.items)} (max {QUOTES_MAX_ITEMS})"
+        )
+
+    from_address = request.fromAddress or "0x1234567890123456789012345678901234567890"
+    semaphore = asyncio.Semaphore(max(1, QUOTES_MAX_CONCURRENCY))
+
+    # Normalize each item to a lookup key so "100" and "100.0" share one upstream call
+    item_keys = []
+    errors = {}
+    for index, item in enumerate(request.items):
+        try:
+            amount = Decimal(item.amount)
+            if amount <= 0:
+                raise ValueError("amount must be positive")
+            src_token, _, src_decimals = tokens_for_chain(item.chainId)
+            dst_token = resolve_asset_token(item.chainId, item.asset)
+            item_keys.append((item.chainId, src_token, dst_token, format(amount.normalize(), "f"), src_decimals))
+        except InvalidOperation:
+            item_keys.append(None)
+            errors[index] = f"Invalid amount '{item.amount}'"
+        except ValueError as e:
+            item_keys.append(None)
+            errors[index] = str(e)
+
+    async def fetch_quote(key):
+        chain_id, src_token, dst_token, amount, src_decimals = key
+        async with semaphore:
+            swap_data = await fetch_swap_quote(chain_id, src_token, dst_token, amount, src_decimals, from_address)
+        return summarize_quote(swap_data)
+
+    unique_keys = list(dict.fromkeys(key for key in item_keys if key is not None))
+    try:
+        fetched = await LANE_SCHEDULER.lanes["aggregator"].run(
+            lambda: asyncio.gather(*(fetch_quote(key) for key in unique_keys))
+        )
+    except LaneFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(int(e.retry_after))})
+    quotes_by_key = dict(zip(unique_keys, fetched))
+
+    results = []
+    for index, (item, key) in enumerate(zip(request.items, item_keys)):
+        if key is None:
+            results.append({"asset": item.asset, "amount": item.amount, "chainId": item.chainId, "ok": False, "error": errors[index]})
+        else:
+            # Report the normalized amount so equivalent inputs land in the same matrix column
+            results.append({"asset": item.asset, "amount": key[3], "chainId": item.chainId, **quotes_by_key[key]})
+
+    # Per-chain matrix: rows are assets, columns are amounts (None where not requested)
+    matrix = {}
+    for result in results:
+        chain = matrix.setdefault(str(result["chainId"]), {"assets": [], "amounts": [], "cells": {}})
+        if result["asset"] not in chain["assets"]:
+            chain["assets"].append(result["asset"])
+        if result["amount"] not in chain["amounts"]:
+            chain["amounts"].append(result["amount"])
+        chain["cells"][(result["asset"], result["amount"])] = result
+    for chain in matrix.values():
+        cells = chain.pop("cells")
+        chain["quotes"] = [
+            [cells.get((asset, amount)) for amount in chain["amounts"]]
+            for asset in chain["assets"]
+        ]
+
+    return {
+        "results": results,
+        "matrix": matrix,
+        "requested": len(request.items),
+        "upstream_requests": len(unique_keys),
+    }
+
+def _quantity(value) -> int:
+    """Integer from an aggregator field: hex string, decimal string or number"""
+    if isinstance(value, str) and value.lower().startswith("0x"):
+        return int(value, 16)
+    return int(Decimal(str(value)))
+
+def gas_cost_native(tx: dict | None) -> Decimal | None:
+    """Gas limit x gas price of a swap transaction, in the chain's native token (None when not quoted)"""
+    if not tx or tx.get("gas") is None or tx.get("gasPrice") is None:
+        return None
+    try:
+        return Decimal(_quantity(tx["gas"]) * _quantity(tx["gasPrice"])) / (Decimal(10) ** 18)
+    except (InvalidOperation, ValueError, TypeError):
+        return None
+
+class BestRouteRequest(BaseModel):
+    amount: str
+    asset: str = "WETH"
+    fromAsset: str = "USDC"
+    # Chains to compare; every mainnet chain listing both assets when omitted
+    chainIds: list[int] | None = None
+    fromAddress: str | None = None
+
+@app.post("/quotes/best-route")
+async def get_best_route(request: BestRouteRequest):
+    """
+    Quote the same swap on several chains concurrently and return the best executable route.
+
+    Routes are ranked on output net of gas: gas limit x gas price, converted into the
+    output token with the aggregator's native rate (or 1:1 when the output is the
+    chain's wrapped native token). If any executable route's gas cannot be converted,
+    all are ranked on gross output and ``rankedBy`` says so.
+    """
+    try:
+        amount = Decimal(request.amount)
+    except InvalidOperation:
+        raise HTTPException(status_code=400, detail=f"Invalid amount '{request.amount}'")
+    if amount <= 0:
+        raise HTTPException(status_code=400, detail="amount must be positive")
+
+    registry = get_registry()
+    chain_ids = list(dict.fromkeys(request.chainIds)) if request.chainIds else registry.chains_with(request.fromAsset, request.asset)
+    if not chain_ids:
+        raise HTTPException(status_code=400, detail=f"No configured chain lists both {request.fromAsset} and {request.asset}")
+    if len(chain_ids) > QUOTES_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Too many chains: {len(chain_ids)} (max {QUOTES_MAX_ITEMS})")
+
+    from_address = request.fromAddress or "0x1234567890123456789012345678901234567890"
+    amount_text = format(amount.normalize(), "f")
+    semaphore = asyncio.Semaphore(max(1, QUOTES_MAX_CONCURRENCY))
+
+    async def quote_chain(chain_id: int) -> dict:
+        route = {"chainId": chain_id, "chainName": registry.chain_name(chain_id)}
+        try:
+            src = registry.token(chain_id, request.fromAsset)
+            dst = registry.token(chain_id, request.asset)
+        except ValueError as e:
+            return {**route, "ok": False, "executable": False, "error": str(e)}
+        async with semaphore:
+            swap_data = await fetch_swap_quote(chain_id, src.address, dst.address, amount_text, src.decimals, from_address)
+        quote = summarize_quote(swap_data)
+        route.update(quote)
+        if quote["ok"] and quote.get("toAmount") is not None:
+            try:
+                # Output in whole tokens, so chains with different decimals compare directly
+                to_amount = dst.from_units(quote["toAmount"])
+            except InvalidOperation:
+                route["executable"] = False
+                return route
+            route["toAmountDecimal"] = format(to_amount.normalize(), "f")
+            chain = registry.chain(chain_id)
+            gas_native = gas_cost_native(quote.get("tx"))
+            if gas_native is None:
+                return route
+            route["gasCostNative"] = format(gas_native.normalize(), "f")
+            route["nativeSymbol"] = chain.native
+            rate = swap_data.get("buyTokenToNativeRate")
+            try:
+                if rate is not None:
+                    gas_output = gas_native * Decimal(str(rate))
+                elif dst.symbol == chain.wrapped_native:
+                    gas_output = gas_native
+                else:
+                    return route
+            except InvalidOperation:
+                return route
+            route["gasCostDecimal"] = format(gas_output.normalize(), "f")
+            route["netToAmountDecimal"] = format((to_amount - gas_output).normalize(), "f")
+        return route
+
+    try:
+        routes = await LANE_SCHEDULER.lanes["aggregator"].run(
+            lambda: asyncio.gather(*(quote_chain(chain_id) for chain_id in chain_ids))
+        )
+    except LaneFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(int(e.retry_after))})
+
+    # Most output first among executable routes, net of gas when every route's gas converts; the rest keep request order
+    executable = [route for route in routes if route.get("executable") and "toAmountDecimal" in route]
+    ranked_by = "net" if all("netToAmountDecimal" in route for route in executable) else "gross"
+    rank_field = "netToAmountDecimal" if ranked_by == "net" else "toAmountDecimal"
+    executable.sort(key=lambda route: Decimal(route[rank_field]), reverse=True)
+    others = [route for route in routes if not (route.get("executable") and "toAmountDecimal" in route)]
+    return {
+        "amount": amount_text,
+        "fromAsset": request.fromAsset,
+        "asset": request.asset,
+        "rankedBy": ranked_by,
+        "best": executable[0] if executable else None,
+        "routes": executable + others,
+    }
+
+@app.get("/chains")
+async def list_chains():
+    return get_registry().snapshot()
+
+@app.get("/real-estate")
+async def list_real_estate(
+    city: str | None = None,
+    state: str | None = None,
+    min_apy: float | None = None,
+    max_apy: float | None = None,
+    min_price: float | None = None,
+    max_price: float | None = None,
+    min_rent: float | None = None,
+    max_rent: float | None = None,
+    rented_only: bool = False,
+    sort: str = "apy",
+    order: str = "desc",
+    page: int = 1,
+    page_size: int = 20,
+):
+    """Filtered, sorted and paginated listings over the full RealT catalog"""
+    if sort not in SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"Unknown sort '{sort}' (expected one of {', '.join(SORT_KEYS)})")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+    if page < 1 or not 1 <= page_size <= REAL_ESTATE_MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"page must be >= 1 and page_size between 1 and {REAL_ESTATE_MAX_PAGE_SIZE}")
+
+    filters = {
+        key: value for key, value in {
+            "city": city, "state": state, "min_apy": min_apy, "max_apy": max_apy,
+            "min_price": min_price, "max_price": max_price, "min_rent": min_rent, "max_rent": max_rent,
+        }.items() if value is not None
+    }
+    filters["rented_only"] = rented_only
+    return await asyncio.to_thread(fetch_real_estate_rwa_data, filters, sort, order == "desc", page, page_size)
+
+@app.get("/assets/{asset_id}/history")
+async def get_asset_history(asset_id: str, range: str = "7d", resolution: str | None = None):
+    """APY and token price history for a RealT asset (its asset ID, i.e. token symbol), downsampled for charts"""
+    if range not in HISTORY_RANGES:
+        raise HTTPException(status_code=400, detail=f"Unknown range '{range}' (expected one of {', '.join(HISTORY_RANGES)})")
+
+    catalog = REALT_CATALOG.catalog
+    row = catalog.row_for_asset_id(asset_id) if catalog is not None else None
+    key = catalog.stable_key(row) if row is not None else asset_id
+
+    end = datetime.now().timestamp()
+    span = HISTORY_RANGES[range]
+    try:
+        history = ASSET_HISTORY.history(key, end - span if span else 0.0, end, resolution)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if history is None:
+        raise HTTPException(status_code=404, detail=f"No history for asset {asset_id}")
+    return {"asset_id": asset_id, "key": key, "range": range, **history}
+
+@app.get("/portfolio/{address}")
+async def get_portfolio(address: str):
+    """Portfolio totals for an address, read from the store's aggregate counters"""
+    counters = await asyncio.to_thread(TRANSACTION_STORE.portfolio_counters, address)
+    return build_portfolio(address, counters)
+
+@app.get("/chain/balance/{address}")
+async def get_chain_balance(address: str):
+    """Native token balance for an address via the pooled RPC client"""
+    try:
+        balance = await chain_client.get_balance(address)
+    except RPCError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RPCUnavailableError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    return {"address": address, "balance_wei": str(balance)}
+
+@app.get("/chain/receipt/{tx_hash}")
+async def get_chain_receipt(tx_hash: str):
+    """Transaction receipt via the pooled RPC client (null receipt while unmined)"""
+    try:
+        receipt = await chain_client.get_transaction_receipt(tx_hash)
+    except RPCError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RPCUnavailableError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    return {"tx_hash": tx_hash, "mined": receipt is not None, "receipt": receipt}
+
+@app.get("/pool/total-invested")
+async def get_pool_total_invested(pool_address: str | None = None):
+    """MockRWAPool.totalInvested() read via the pooled RPC client"""
+    pool_address = pool_address or MOCK_RWA_POOL_ADDRESS
+    if not pool_address:
+        raise HTTPException(status_code=400, detail="pool_address is required (or set MOCK_RWA_POOL_ADDRESS)")
+    try:
+        total = await chain_client.total_invested(pool_address)
+    except RPCError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RPCUnavailableError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    return {"pool_address": pool_address, "total_invested_wei": str(total)}
+
+class InvestedEvent(BaseModel):
+    investor: str
+    amount: str  # base units
+
+class YieldDistributionRequest(BaseModel):
+    # Defaults to the latest indexed YieldDistributed amount
+    total_amount: str | None = None
+    # Defaults to every indexed Invested event
+    events: list[InvestedEvent] | None = None
+    dust_policy: str = "largest_remainder"
+    # Maximum payouts returned in the response (totals always cover everyone)
+    limit: int | None = 1000
+
+@app.post("/yield/distribute")
+async def compute_yield_distribution(request: YieldDistributionRequest):
+    """Compute each investor's pro-rata share of a MockRWAPool yield distribution"""
+    subgraph_url = os.getenv("SUBGRAPH_URL")
+    total_amount = request.total_amount
+    distribution = None
+    try:
+        if total_amount is None:
+            if not subgraph_url:
+                raise HTTPException(status_code=400, detail="total_amount is required when SUBGRAPH_URL is not configured")
+            distribution = await asyncio.to_thread(fetch_latest_yield_distribution, subgraph_url)
+            if distribution is None:
+                raise HTTPException(status_code=404, detail="No indexed YieldDistributed events")
+            total_amount = distribution["amount"]
+
+        if request.events is not None:
+            events = [event.model_dump() for event in request.events]
+        elif subgraph_url:
+            events = await asyncio.to_thread(fetch_all_investments, subgraph_url)
+        else:
+            raise HTTPException(status_code=400, detail="events are required when SUBGRAPH_URL is not configured")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Subgraph unavailable: {e}")
+
+    try:
+        result = await asyncio.to_thread(distribute_yield, events, int(total_amount), request.dust_policy)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "distribution": distribution,
+        "total_amount": str(result["total_amount"]),
+        "total_stake": str(result["total_stake"]),
+        "distributed": str(result["distributed"]),
+        "dust": str(result["dust"]),
+        "dust_policy": result["dust_policy"],
+        "investor_count": len(result["investors"]),
+        "event_count": len(events),
+        "payouts": payouts_to_records(result, request.limit),
+    }
+
+@app.get("/x402/analytics")
+async def x402_analytics(payment_id: str | None = None, window_seconds: float | None = None):
+    """Measured x402 payment timings: percentiles and success rates per window"""
+    if not X402_AVAILABLE:
+        raise HTTPException(status_code=503, detail="x402 integration is not available")
+    if window_seconds is not None and window_seconds <= 0:
+        raise HTTPException(status_code=400, detail="window_seconds must be positive")
+    return get_x402_payment_analytics(payment_id, window_seconds)
+
+class SearchFeedbackRequest(BaseModel):
+    query: str
+    helpful: bool
+
+@app.get("/search-cache/stats")
+async def search_cache_stats():
+    """Semantic search cache hit rates and false-hit audit metrics"""
+    if SEARCH_SEMANTIC_CACHE is None:
+        return {"enabled": False}
+    return {"enabled": True, **SEARCH_SEMANTIC_CACHE.stats()}
+
+@app.post("/search-cache/feedback")
+async def search_cache_feedback(request: SearchFeedbackRequest):
+    """
+    Report whether a search answer was helpful.
+
+    Unhelpful cached answers are evicted; helpful ones are added to the knowledge base
+    (KNOWLEDGE_LEARN_ENABLED) so the question is answered locally next time.
+    """
+    learned = False
+    if SEARCH_SEMANTIC_CACHE is None:
+        return {"success": True, "matched_cached_answer": False, "learned": learned}
+    # The answer is taken from the server's cache, never from the client
+    answer = SEARCH_SEMANTIC_CACHE.answer_for(request.query)
+    matched = SEARCH_SEMANTIC_CACHE.report_feedback(request.query, request.helpful)
+    if request.helpful and answer and KNOWLEDGE_LEARN_ENABLED:
+        knowledge_base = await asyncio.to_thread(get_knowledge_base)
+        if knowledge_base is not None:
+            learned = await asyncio.to_thread(knowledge_base.add_answer, request.query, answer)
+    return {"success": True, "matched_cached_answer": matched, "learned": learned}
+
 @app.get("/messages")
 async def get_messages(limit: int = 50):
     """Fetch chat messages from Supabase database"""
@@ -815,9 +1725,77 @@ async def get_messages(limit: int = 50):
         logging.error(f"Failed to fetch messages: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch messages: {e}")
 
+def export_response(chunks, export_format: str, name: str) -> StreamingResponse:
+    filename = f"{name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{export_format}"
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+def check_export_format(export_format: str) -> None:
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(EXPORT_FORMATS)}")
+
+@app.get("/transactions/stream")
+async def stream_transaction_status(address: str | None = None):
+    """Server-sent events with each status change of an address's transactions (all addresses if omitted)"""
+    try:
+        subscription = STATUS_BROADCASTER.subscribe(address)
+    except SubscriberLimitError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+
+    async def events():
+        try:
+            while True:
+                event = await subscription.get()
+                yield {"event": "transaction_status", "data": json.dumps(event)}
+        finally:
+            subscription.close()
+
+    # The background task also unsubscribes clients that disconnect before the first event is read
+    return EventSourceResponse(events(), ping=TX_STREAM_PING_SECONDS, background=BackgroundTask(subscription.close))
+
+@app.get("/export/transactions")
+async def export_transactions(format: str = "ndjson", address: str | None = None):
+    """Stream every transaction (optionally one address's) as NDJSON or CSV, one store page at a time"""
+    check_export_format(format)
+    pages = TRANSACTION_STORE.iter_transactions(address, page_size=EXPORT_PAGE_SIZE)
+    return export_response(stream_pages(pages, format, TRANSACTION_FIELDS), format, "transactions")
+
+async def message_pages(role: str | None):
+    after_id = None
+    while True:
+        page = await fetch_messages_page(after_id=after_id, page_size=EXPORT_PAGE_SIZE, role=role)
+        if not page:
+            return
+        after_id = page[-1]["id"]
+        yield page
+
+@app.get("/export/messages")
+async def export_messages(format: str = "ndjson", role: str | None = None):
+    """Stream every Supabase chat message (optionally one role's) as NDJSON or CSV"""
+    check_export_format(format)
+    if not SUPABASE_AVAILABLE:
+        raise HTTPException(status_code=503, detail="Supabase not available")
+    return export_response(astream_pages(message_pages(role), format, MESSAGE_FIELDS), format, "messages")
+
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    health = {
+        "status": "healthy" if WARMUP.ready else "warming",
+        "warmup": WARMUP.snapshot(),
+        "upstreams": breaker_snapshot(),
+        "rpc_endpoints": chain_client.snapshot(),
+        "rate_limits": RATE_LIMITER.snapshot(),
+        "lanes": LANE_SCHEDULER.snapshot(),
+        "realt_catalog": REALT_CATALOG.snapshot(),
+        "asset_history": ASSET_HISTORY.snapshot(),
+        "transaction_stream": STATUS_BROADCASTER.snapshot(),
+        "logging": logging_stats(),
+    }
+    # Load balancers only route traffic here once the warm-up has finished
+    return health if WARMUP.ready else JSONResponse(status_code=503, content=health)
 
 if __name__ == "__main__":
     import uvicorn
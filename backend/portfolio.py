@@ -0,0 +1,104 @@
+"""
+Incrementally maintained per-user portfolio aggregates.
+
+Instead of recomputing a user's totals from raw transaction records, each
+transaction store keeps integer counters per user, updated in the same
+write as the record itself:
+
+- on insert, the record's amount and count are added under its status
+- on a status change, they move from the old status to the new one
+
+Counters are keyed ``"<asset_id>|<metric>"`` plus ``"*|<metric>"`` for the
+user-wide totals, so answering "my portfolio" costs O(number of assets),
+independent of history length. Amounts are stored as USDC base units
+(6 decimals); records whose amount is not a number ("unknown") are counted
+separately.
+"""
+
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Optional
+
+USDC_DECIMALS = 6
+TOTAL_KEY = "*"
+
+
+def amount_to_units(amount: Any, decimals: int = USDC_DECIMALS) -> Optional[int]:
+    """Convert a human amount ("100", "12.5") to base units, or None if it is not a number."""
+    try:
+        value = Decimal(str(amount))
+    except (InvalidOperation, ValueError):
+        return None
+    if not value.is_finite() or value < 0:
+        return None
+    return int(value * (10 ** decimals))
+
+
+def record_deltas(record: Dict[str, Any], sign: int = 1) -> Dict[str, int]:
+    """Counter deltas for adding (sign=1) or removing (sign=-1) one record."""
+    units = amount_to_units(record.get("amount"))
+    status = record.get("status") or "unknown"
+    deltas: Dict[str, int] = {}
+    for scope in (TOTAL_KEY, record.get("asset_id") or "unknown"):
+        deltas[f"{scope}|count"] = sign
+        deltas[f"{scope}|{status}_count"] = sign
+        if units is None:
+            deltas[f"{scope}|unknown_amount_count"] = sign
+        else:
+            deltas[f"{scope}|invested_units"] = sign * units
+            deltas[f"{scope}|{status}_units"] = sign * units
+    return deltas
+
+
+def status_change_deltas(record: Dict[str, Any], old_status: Optional[str], new_status: str) -> Dict[str, int]:
+    """Counter deltas for moving one record from old_status to new_status."""
+    if old_status == new_status:
+        return {}
+    deltas = record_deltas({**record, "status": old_status}, -1)
+    for key, value in record_deltas({**record, "status": new_status}, 1).items():
+        deltas[key] = deltas.get(key, 0) + value
+    return {key: value for key, value in deltas.items() if value}
+
+
+def _format_units(units: int, decimals: int = USDC_DECIMALS) -> str:
+    return format(Decimal(units).scaleb(-decimals).normalize(), "f") if units else "0"
+
+
+def _summarize(counters: Dict[str, int]) -> Dict[str, Any]:
+    # invested_units counts every record; failed investments never moved funds
+    invested_units = counters.get("invested_units", 0) - counters.get("failed_units", 0)
+    return {
+        "total_invested": _format_units(invested_units),
+        "total_invested_units": invested_units,
+        "transaction_count": counters.get("count", 0),
+        "pending_count": counters.get("pending_count", 0),
+        "confirmed_count": counters.get("confirmed_count", 0),
+        "failed_count": counters.get("failed_count", 0),
+        "pending_invested": _format_units(counters.get("pending_units", 0)),
+        "confirmed_invested": _format_units(counters.get("confirmed_units", 0)),
+        "failed_amount": _format_units(counters.get("failed_units", 0)),
+        "unknown_amount_count": counters.get("unknown_amount_count", 0),
+    }
+
+
+def build_portfolio(address: str, counters: Dict[str, int]) -> Dict[str, Any]:
+    """
+    Turn a user's raw counters into the portfolio response.
+
+    Args:
+        address: User address
+        counters: {"<scope>|<metric>": value} as kept by the transaction store
+
+    Returns:
+        User-wide totals plus a per-asset breakdown
+    """
+    scopes: Dict[str, Dict[str, int]] = {}
+    for key, value in counters.items():
+        scope, _, metric = key.partition("|")
+        scopes.setdefault(scope, {})[metric] = int(value)
+
+    assets = [
+        {"asset_id": asset_id, **_summarize(metrics)}
+        for asset_id, metrics in sorted(scopes.items())
+        if asset_id != TOTAL_KEY and metrics.get("count", 0) > 0
+    ]
+    return {"address": address, **_summarize(scopes.get(TOTAL_KEY, {})), "assets": assets}
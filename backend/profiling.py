@@ -0,0 +1,251 @@
+"""
+Opt-in per-request profiling.
+
+When a single /ask-agent call is slow it is hard to tell whether the time
+went to routing, rendering, an upstream API or Supabase. ``ProfilingMiddleware``
+profiles selected requests wall-clock and async-aware, and writes a
+flamegraph-ready file to a local directory. The file name is returned in an
+``X-Profile-Id`` response header.
+
+A request is profiled when:
+
+- it sends ``X-Profile: <PROFILING_ADMIN_TOKEN>`` (header mode is off while
+  no token is configured), or
+- it is picked by ``PROFILING_SAMPLE_RATE`` (0 by default)
+
+Profilers:
+    pyinstrument (if installed): async-aware statistical profiler. Writes a
+        speedscope JSON file (open it at https://www.speedscope.app). It
+        only samples the event-loop thread, so blocking work handed to
+        ``lane_to_thread`` shows up as a wait.
+    built-in sampler: a sampler thread that reads the request task's stack
+        every ``interval``. While the task is running, it records the live
+        stack. While the task is suspended, it records the chain of awaiting
+        coroutines; if the task is waiting on ``lane_to_thread``, the worker
+        thread's live stack follows under an ``[executor]`` frame, otherwise
+        the leaf is ``[await]``, so upstream waits show up. It writes
+        collapsed stacks (``.folded``), which flamegraph.pl and speedscope
+        can read. Each stack is weighted in microseconds of wall time,
+        because CPU-bound code holds the GIL and delays samples.
+
+``PROFILING_BACKEND`` picks one: ``auto`` (pyinstrument when installed),
+``pyinstrument`` or ``sampler``. Use ``sampler`` when the time goes to
+executor threads.
+
+Requests that are not profiled cost one header lookup and, when sampling
+is on, one random draw.
+"""
+
+import asyncio
+import hmac
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    from pyinstrument import Profiler as _PyinstrumentProfiler
+    from pyinstrument.renderers import SpeedscopeRenderer
+    PYINSTRUMENT_AVAILABLE = True
+except ImportError:
+    PYINSTRUMENT_AVAILABLE = False
+
+from .lanes import run_for_task, worker_thread
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+
+def _frame_label(frame: Any) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class TaskStackSampler:
+    """
+    Wall-clock sampler for one asyncio task.
+
+    Args:
+        interval: Seconds between samples
+    """
+
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._task = asyncio.current_task()
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            try:
+                stack = self._sample()
+            except Exception:
+                continue  # the task moved on while it was being read; skip this sample
+            now = time.perf_counter()
+            if stack:
+                # Weight by elapsed time: the sampler waits for the GIL while the loop thread computes
+                self.stacks[";".join(stack)] += max(1, int((now - last) * 1_000_000))
+            last = now
+
+    def _sample(self) -> List[str]:
+        root = self._task.get_coro().cr_frame
+        if asyncio.current_task(self._loop) is self._task:
+            # Running: the live stack of the loop thread, cut at the task's coroutine
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                if frame is root:
+                    break
+                frame = frame.f_back
+            return stack[::-1]
+        # Suspended: follow the chain of awaited coroutines
+        stack = []
+        awaitable = self._task.get_coro()
+        while awaitable is not None and getattr(awaitable, "cr_frame", None) is not None:
+            stack.append(_frame_label(awaitable.cr_frame))
+            awaitable = awaitable.cr_await
+        thread = worker_thread(self._task)
+        frame = sys._current_frames().get(thread) if thread is not None else None
+        if frame is None:
+            stack.append("[await]")
+            return stack
+        # Waiting on a worker thread: its live stack, cut at the lane wrapper
+        worker = []
+        while frame is not None and frame.f_code is not run_for_task.__code__:
+            worker.append(_frame_label(frame))
+            frame = frame.f_back
+        stack.append("[executor]")
+        stack.extend(reversed(worker))
+        return stack
+
+    def folded(self) -> str:
+        """Collapsed stacks ("frame;frame;leaf microseconds" per line)."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling selected requests.
+
+    Args:
+        app: ASGI application
+        output_dir: Directory for profile files
+        paths: Path prefixes eligible for profiling
+        sample_rate: Fraction of eligible requests profiled without the header
+        admin_token: Value of the X-Profile header that forces profiling (None disables header mode)
+        interval: Sampling interval in seconds
+        max_files: Profiles kept; the oldest are deleted beyond this
+        backend: "auto" (pyinstrument when installed), "pyinstrument" or "sampler"
+    """
+
+    def __init__(
+        self,
+        app: Any,
+        output_dir: str,
+        paths: Sequence[str] = ("/ask-agent",),
+        sample_rate: float = 0.0,
+        admin_token: Optional[str] = None,
+        interval: float = 0.001,
+        max_files: int = 200,
+        backend: str = "auto",
+    ):
+        self.app = app
+        self.output_dir = output_dir
+        self.paths = tuple(paths)
+        self.sample_rate = sample_rate
+        self.admin_token = admin_token.encode() if admin_token else None
+        self.interval = interval
+        self.max_files = max_files
+        if backend not in ("auto", "pyinstrument", "sampler"):
+            raise ValueError(f"Unknown profiling backend '{backend}'")
+        if backend == "pyinstrument" and not PYINSTRUMENT_AVAILABLE:
+            logger.warning("PROFILING_BACKEND=pyinstrument but pyinstrument is not installed; using the built-in sampler")
+        self.use_pyinstrument = PYINSTRUMENT_AVAILABLE and backend != "sampler"
+
+    def _selected(self, scope: Dict[str, Any]) -> bool:
+        if scope["type"] != "http" or not scope["path"].startswith(self.paths):
+            return False
+        if self.admin_token is not None:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER:
+                    return hmac.compare_digest(value, self.admin_token)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if not self._selected(scope):
+            await self.app(scope, receive, send)
+            return
+
+        slug = scope["path"].strip("/").replace("/", "_") or "root"
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{slug}-{uuid.uuid4().hex[:8]}"
+        extension = "speedscope.json" if self.use_pyinstrument else "folded"
+        filename = f"{profile_id}.{extension}"
+
+        async def send_with_id(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), (PROFILE_ID_HEADER, filename.encode())]}
+            await send(message)
+
+        if self.use_pyinstrument:
+            profiler = _PyinstrumentProfiler(interval=self.interval, async_mode="enabled")
+        else:
+            profiler = TaskStackSampler(self.interval)
+        start = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profiler.stop()
+            duration = time.perf_counter() - start
+            try:
+                await asyncio.to_thread(self._write, filename, profiler)
+                logger.info(
+                    "Request profiled",
+                    extra={"event": "profile.saved", "path": scope["path"], "file": filename, "duration_ms": round(duration * 1000, 1)},
+                )
+            except Exception as e:
+                logger.warning(f"Failed to write profile {filename}: {e}")
+
+    def _write(self, filename: str, profiler: Any) -> None:
+        os.makedirs(self.output_dir, exist_ok=True)
+        if self.use_pyinstrument:
+            content = profiler.output(renderer=SpeedscopeRenderer())
+        else:
+            content = profiler.folded()
+        path = os.path.join(self.output_dir, filename)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(f"{path}.tmp", path)
+        self._prune()
+
+    def _prune(self) -> None:
+        entries = sorted(
+            (entry for entry in os.scandir(self.output_dir) if entry.is_file() and not entry.name.endswith(".tmp")),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        for entry in entries[:max(0, len(entries) - self.max_files)]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
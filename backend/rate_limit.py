@@ -0,0 +1,119 @@
+"""
+Token-bucket admission control for /ask-agent.
+
+Every client IP gets one bucket
+per tier, so a client flooding LLM-backed search prompts exhausts only its
+own "llm" bucket and cannot starve other users' OpenAI/Tavily quota or its
+own cheap requests. A request that finds its bucket empty is rejected
+immediately with the number of seconds until a token is available, instead
+of being queued.
+
+/ask-agent/batch is admitted once per batch from its own "batch" tier, at
+one token per message, so a batch is not cut short by the per-request buckets.
+
+Buckets are process-local; with several workers each worker enforces the
+limit on the requests it serves.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a client's bucket for a tier is empty."""
+
+    def __init__(self, tier: str, retry_after: float):
+        self.tier = tier
+        self.retry_after = retry_after
+        super().__init__(f"Rate limit exceeded for {tier} requests; retry in {retry_after:.1f}s")
+
+    @property
+    def retry_after_header(self) -> str:
+        """Whole seconds for the Retry-After header (at least 1)."""
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class TokenBucket:
+    """
+    Classic token bucket.
+
+    Args:
+        rate: Tokens added per second
+        capacity: Maximum tokens held, i.e. the allowed burst
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def try_acquire(self, cost: float = 1.0, now: Optional[float] = None) -> float:
+        """
+        Take ``cost`` tokens if available.
+
+        Returns:
+            0.0 if admitted, otherwise seconds until enough tokens accumulate
+        """
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        if self.rate <= 0:
+            return math.inf
+        return (cost - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    Per-client token buckets for a set of named tiers.
+
+    Args:
+        tiers: {tier: (tokens per minute, burst capacity)}
+        max_clients: Buckets kept before the least recently used are dropped
+            (a dropped client simply starts again with a full bucket)
+    """
+
+    def __init__(self, tiers: Dict[str, Tuple[float, float]], max_clients: int = 10000):
+        self.tiers = tiers
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[Tuple[str, Hashable], TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.rejected: Dict[str, int] = {tier: 0 for tier in tiers}
+
+    def check(self, tier: str, client: Hashable, cost: float = 1.0) -> None:
+        """
+        Admit one request or raise.
+
+        Raises:
+            RateLimitExceeded: If the client's bucket for this tier is empty
+            KeyError: If the tier is not configured
+        """
+        per_minute, burst = self.tiers[tier]
+        key = (tier, client)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(per_minute / 60.0, burst)
+                self._buckets[key] = bucket
+                while len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            retry_after = bucket.try_acquire(cost)
+            if retry_after:
+                self.rejected[tier] += 1
+        if retry_after:
+            raise RateLimitExceeded(tier, retry_after)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                tier: {"per_minute": per_minute, "burst": burst, "rejected": self.rejected[tier]}
+                for tier, (per_minute, burst) in self.tiers.items()
+            }
@@ -0,0 +1,529 @@
+"""
+Persistent columnar snapshot of the RealT token catalog.
+
+Each real-estate query used to download and parse RealT's full token list
+before answering, and after a restart the first query always paid for it.
+The catalog is now kept as a local snapshot that loads instantly:
+
+- numeric fields live in one NumPy structured array (``columns.npy``)
+- variable-length strings (names, symbols) are stored as one UTF-8 byte
+  blob plus an offsets array per column
+- cities and states are dictionary-encoded into small integer codes
+
+All ``.npy`` files are opened with ``mmap_mode="r"``, so loading a snapshot
+costs a few page mappings regardless of catalog size. Snapshots are written
+into a fresh versioned directory and published by atomically replacing a
+``CURRENT`` pointer file, so readers (and other workers) never see a
+partially written snapshot. ``RealTCatalogService`` serves the loaded
+snapshot and refreshes it from the RealT API in the background.
+
+``RealTCatalog.query`` filters (location, APY range, price range, rented
+status), sorts and paginates the whole catalog with vectorized column
+masks, so listings stay fast at tens of thousands of properties.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .http_pool import get_session
+from .resilience import get_breaker
+
+logger = logging.getLogger(__name__)
+
+REALT_TOKENS_URL = "https://api.realt.community/v1/token"
+SNAPSHOT_FORMAT_VERSION = 1
+
+COLUMN_DTYPE = np.dtype([
+    ("apy", "f4"),
+    ("token_price", "f4"),
+    ("monthly_rent", "f4"),
+    ("total_tokens", "i8"),
+    ("rented_units", "i4"),
+    ("total_units", "i4"),
+    ("city_code", "i4"),
+    ("state_code", "i4"),
+])
+STRING_COLUMNS = ("name", "symbol")
+
+# Sort keys accepted by RealTCatalog.query
+SORT_KEYS = ("apy", "price", "occupancy", "rent")
+
+# "9943 Marlowe St, Detroit, MI 48227" -> ("Detroit", "MI")
+_ADDRESS_RE = re.compile(r",\s*([^,]+?),\s*([A-Z]{2})\b")
+
+
+def _number(value: Any, default: float = 0.0) -> float:
+    try:
+        return float(value) if value is not None else default
+    except (TypeError, ValueError):
+        return default
+
+
+def parse_location(token: Dict[str, Any]) -> Tuple[str, str]:
+    """(city, state) from explicit fields, else parsed from the property's full address."""
+    city, state = token.get("city"), token.get("state")
+    if not (city and state):
+        match = _ADDRESS_RE.search(token.get("fullName") or "")
+        if match:
+            city, state = city or match.group(1).strip(), state or match.group(2)
+    return city or "Unknown", state or "US"
+
+
+class StringColumn:
+    """Variable-length strings stored as a UTF-8 blob plus offsets (n + 1 entries)."""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, values: Sequence[str]) -> "StringColumn":
+        encoded = [value.encode("utf-8") for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        blob = np.frombuffer(b"".join(encoded), dtype=np.uint8) if encoded else np.zeros(0, dtype=np.uint8)
+        return cls(blob, offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        return bytes(self.blob[self.offsets[index]:self.offsets[index + 1]]).decode("utf-8")
+
+
+class RealTCatalog:
+    """
+    Immutable columnar view of the RealT catalog.
+
+    Args:
+        columns: Structured array with COLUMN_DTYPE, one row per token
+        strings: StringColumn per entry of STRING_COLUMNS
+        cities: City vocabulary indexed by ``city_code``
+        states: State vocabulary indexed by ``state_code``
+        fetched_at: ISO timestamp of the RealT download
+    """
+
+    def __init__(
+        self,
+        columns: np.ndarray,
+        strings: Dict[str, StringColumn],
+        cities: List[str],
+        states: List[str],
+        fetched_at: str,
+    ):
+        self.columns = columns
+        self.strings = strings
+        self.cities = cities
+        self.states = states
+        self.fetched_at = fetched_at
+        self._rows_by_key: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    @staticmethod
+    def _codes(vocabulary: List[str], wanted: str) -> np.ndarray:
+        wanted = wanted.strip().lower()
+        return np.array([code for code, value in enumerate(vocabulary) if value.lower() == wanted], dtype=np.int32)
+
+    def match_location(self, text: str) -> Dict[str, str]:
+        """
+        Interpret free text ("detroit", "MI", "Detroit, MI") as query filters.
+
+        Returns:
+            {"city": ..., "state": ...} with the parts found in the catalog (empty if none)
+        """
+        filters: Dict[str, str] = {}
+        for part in (p.strip() for p in text.split(",")):
+            if not part:
+                continue
+            if "state" not in filters and len(self._codes(self.states, part)):
+                filters["state"] = part.upper() if len(part) == 2 else part
+            elif "city" not in filters and len(self._codes(self.cities, part)):
+                filters["city"] = part
+        return filters
+
+    def _sort_values(self, sort: str) -> np.ndarray:
+        columns = self.columns
+        if sort == "apy":
+            return columns["apy"]
+        if sort == "price":
+            return columns["token_price"]
+        if sort == "rent":
+            return columns["monthly_rent"]
+        if sort == "occupancy":
+            total = columns["total_units"].astype(np.float32)
+            return np.divide(columns["rented_units"], total, out=np.zeros(len(columns), dtype=np.float32), where=total > 0)
+        raise ValueError(f"Unknown sort '{sort}' (expected one of {', '.join(SORT_KEYS)})")
+
+    def query(
+        self,
+        city: Optional[str] = None,
+        state: Optional[str] = None,
+        min_apy: Optional[float] = None,
+        max_apy: Optional[float] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        min_rent: Optional[float] = None,
+        max_rent: Optional[float] = None,
+        rented_only: bool = False,
+        sort: str = "apy",
+        descending: bool = True,
+        offset: int = 0,
+        limit: int = 20,
+    ) -> Tuple[int, np.ndarray]:
+        """
+        Filter, sort and paginate the catalog.
+
+        Args:
+            city: City name (case-insensitive)
+            state: State code or name as stored, e.g. "MI" (case-insensitive)
+            min_apy / max_apy: APY range in percent
+            min_price / max_price: Token price range in USD
+            min_rent / max_rent: Monthly rent range in USD
+            rented_only: Only properties with at least one rented unit
+            sort: One of SORT_KEYS
+            descending: Sort order; ties keep catalog order
+            offset: Matching rows to skip
+            limit: Maximum rows returned
+
+        Returns:
+            (number of matching rows, row indices of the requested page)
+
+        Raises:
+            ValueError: If the sort key is unknown
+        """
+        columns = self.columns
+        mask = np.ones(len(columns), dtype=bool)
+        if city:
+            mask &= np.isin(columns["city_code"], self._codes(self.cities, city))
+        if state:
+            mask &= np.isin(columns["state_code"], self._codes(self.states, state))
+        if min_apy is not None:
+            mask &= columns["apy"] >= min_apy
+        if max_apy is not None:
+            mask &= columns["apy"] <= max_apy
+        if min_price is not None:
+            mask &= columns["token_price"] >= min_price
+        if max_price is not None:
+            mask &= columns["token_price"] <= max_price
+        if min_rent is not None:
+            mask &= columns["monthly_rent"] >= min_rent
+        if max_rent is not None:
+            mask &= columns["monthly_rent"] <= max_rent
+        if rented_only:
+            mask &= columns["rented_units"] > 0
+
+        matches = np.flatnonzero(mask)
+        total = len(matches)
+        end = min(total, max(0, offset) + max(0, limit))
+        if offset >= end:
+            return total, np.zeros(0, dtype=np.int64)
+
+        keys = self._sort_values(sort)[matches]
+        if descending:
+            keys = -keys
+        if end < total:
+            # Only the first `end` rows are needed: partition, then sort just those
+            candidates = np.argpartition(keys, end - 1)[:end]
+            # Rows tied with the cut-off value may be split arbitrarily; include all of them
+            cutoff = keys[candidates].max()
+            candidates = np.union1d(candidates, np.flatnonzero(keys == cutoff))
+        else:
+            candidates = np.arange(total)
+        # Stable order on (key, catalog position)
+        order = candidates[np.lexsort((candidates, keys[candidates]))]
+        return total, matches[order[offset:end]]
+
+    @classmethod
+    def from_tokens(cls, tokens: List[Dict[str, Any]], fetched_at: Optional[str] = None) -> "RealTCatalog":
+        """Build a catalog from RealT API token dicts."""
+        city_codes: Dict[str, int] = {}
+        state_codes: Dict[str, int] = {}
+        rows = []
+        names: List[str] = []
+        symbols: List[str] = []
+        for token in tokens:
+            if not isinstance(token, dict):
+                continue
+            city, state = parse_location(token)
+            rows.append((
+                _number(token.get("annualPercentageYield")),
+                _number(token.get("tokenPrice")),
+                _number(token.get("netRentMonth")),
+                int(_number(token.get("totalTokens"))),
+                int(_number(token.get("rentedUnits"))),
+                int(_number(token.get("totalUnits"))),
+                city_codes.setdefault(city, len(city_codes)),
+                state_codes.setdefault(state, len(state_codes)),
+            ))
+            names.append(token.get("fullName") or "Unknown Property")
+            symbols.append(token.get("symbol") or "")
+        return cls(
+            np.array(rows, dtype=COLUMN_DTYPE),
+            {"name": StringColumn.from_strings(names), "symbol": StringColumn.from_strings(symbols)},
+            list(city_codes),
+            list(state_codes),
+            fetched_at or datetime.now().isoformat(),
+        )
+
+    def stable_key(self, index: int) -> str:
+        """Key that identifies a property across refreshes: its token symbol, else its name."""
+        return self.strings["symbol"][index] or self.strings["name"][index]
+
+    def stable_keys(self) -> List[str]:
+        return [self.stable_key(i) for i in range(len(self))]
+
+    def row_for_asset_id(self, asset_id: str) -> Optional[int]:
+        """Catalog row for an ``asset()`` ID (case-insensitive), or None."""
+        if self._rows_by_key is None:
+            rows: Dict[str, int] = {}
+            for index, key in enumerate(self.stable_keys()):
+                rows.setdefault(key.upper(), index)
+            self._rows_by_key = rows
+        return self._rows_by_key.get(asset_id.upper())
+
+    def location(self, index: int) -> str:
+        row = self.columns[index]
+        return f"{self.cities[row['city_code']]}, {self.states[row['state_code']]}"
+
+    def asset(self, index: int) -> Dict[str, Any]:
+        """Asset dict (the shape /ask-agent and the renderers use) for one catalog row."""
+        row = self.columns[index]
+        token_price = round(float(row["token_price"]), 2)
+        rented, total = int(row["rented_units"]), int(row["total_units"])
+        asset = {
+            # Rows move between refreshes; the symbol does not, so bookmarked IDs stay valid
+            "asset_id": self.stable_key(index),
+            "asset_type": "Real Estate Token",
+            "protocol": "RealT",
+            "property_name": self.strings["name"][index],
+            "location": self.location(index),
+            "yield_apy": round(float(row["apy"]), 2),
+            "token_price": token_price,
+            "total_tokens": int(row["total_tokens"]),
+            "rented_units": rented,
+            "total_units": total,
+            "min_investment": f"{token_price} USDC",
+            "status": "Active" if rented > 0 else "Inactive",
+            "last_updated": self.fetched_at,
+            "source": "RealT API",
+        }
+        if total > 0:
+            asset["occupancy_rate"] = round(100.0 * rented / total, 1)
+        if row["monthly_rent"] > 0:
+            asset["monthly_rent"] = round(float(row["monthly_rent"]), 2)
+        return asset
+
+    def save(self, root: str) -> str:
+        """
+        Write the catalog as a new snapshot under ``root`` and publish it.
+
+        Returns:
+            The snapshot directory
+        """
+        os.makedirs(root, exist_ok=True)
+        directory = os.path.join(root, f"snapshot-{time.time_ns()}-{os.getpid()}")
+        os.makedirs(directory)
+        np.save(os.path.join(directory, "columns.npy"), self.columns)
+        for name, column in self.strings.items():
+            np.save(os.path.join(directory, f"{name}_blob.npy"), column.blob)
+            np.save(os.path.join(directory, f"{name}_offsets.npy"), column.offsets)
+        with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "version": SNAPSHOT_FORMAT_VERSION,
+                "rows": len(self),
+                "fetched_at": self.fetched_at,
+                "cities": self.cities,
+                "states": self.states,
+            }, f)
+
+        pointer_tmp = os.path.join(root, f"CURRENT.{os.getpid()}.tmp")
+        with open(pointer_tmp, "w", encoding="utf-8") as f:
+            f.write(os.path.basename(directory))
+        os.replace(pointer_tmp, os.path.join(root, "CURRENT"))
+        _prune_snapshots(root, keep=os.path.basename(directory))
+        return directory
+
+    @classmethod
+    def load(cls, root: str) -> Optional["RealTCatalog"]:
+        """Memory-map the current snapshot under ``root``, or None if there is none."""
+        try:
+            with open(os.path.join(root, "CURRENT"), encoding="utf-8") as f:
+                directory = os.path.join(root, f.read().strip())
+            with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("version") != SNAPSHOT_FORMAT_VERSION:
+                return None
+            columns = np.load(os.path.join(directory, "columns.npy"), mmap_mode="r")
+            strings = {
+                name: StringColumn(
+                    np.load(os.path.join(directory, f"{name}_blob.npy"), mmap_mode="r"),
+                    np.load(os.path.join(directory, f"{name}_offsets.npy"), mmap_mode="r"),
+                )
+                for name in STRING_COLUMNS
+            }
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"No usable RealT snapshot in {root}: {e}")
+            return None
+        return cls(columns, strings, meta["cities"], meta["states"], meta["fetched_at"])
+
+
+def _prune_snapshots(root: str, keep: str, grace_seconds: float = 300.0) -> None:
+    # Older snapshots may still be mapped by other workers; only remove ones past a grace period
+    now = time.time()
+    for entry in os.listdir(root):
+        path = os.path.join(root, entry)
+        if entry.startswith("snapshot-") and entry != keep and now - os.path.getmtime(path) > grace_seconds:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def download_realt_tokens() -> List[Dict[str, Any]]:
+    """
+    Download RealT's full token list.
+
+    Raises:
+        CircuitOpenError: If the RealT circuit is open
+        ValueError: If the response is not a token list
+    """
+    with get_breaker("realt").protect() as timeout:
+        response = get_session("realt").get(REALT_TOKENS_URL, timeout=timeout)
+        response.raise_for_status()
+        tokens = response.json()
+    if not isinstance(tokens, list):
+        raise ValueError(f"Unexpected RealT response: {str(tokens)[:200]}")
+    return tokens
+
+
+class RealTCatalogService:
+    """
+    Holds the current catalog: loads the snapshot at startup and refreshes it in the background.
+
+    Args:
+        snapshot_dir: Directory holding the snapshots
+        refresh_interval: Seconds between background refreshes
+        on_catalog: Callable invoked with each catalog that is loaded or refreshed
+    """
+
+    def __init__(
+        self,
+        snapshot_dir: str,
+        refresh_interval: float = 900.0,
+        on_catalog: Optional[Callable[[RealTCatalog], object]] = None,
+    ):
+        self.snapshot_dir = snapshot_dir
+        self.refresh_interval = refresh_interval
+        self.on_catalog = on_catalog
+        self._catalog: Optional[RealTCatalog] = None
+        self._refresh_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def catalog(self) -> Optional[RealTCatalog]:
+        return self._catalog
+
+    def _publish(self, catalog: RealTCatalog) -> None:
+        self._catalog = catalog
+        if self.on_catalog is not None:
+            try:
+                self.on_catalog(catalog)
+            except Exception as e:
+                logger.warning(f"RealT catalog listener failed: {e}")
+
+    def load_snapshot(self) -> Optional[RealTCatalog]:
+        catalog = RealTCatalog.load(self.snapshot_dir)
+        if catalog is not None:
+            self._publish(catalog)
+            logger.info(f"Loaded RealT snapshot: {len(catalog)} tokens fetched at {catalog.fetched_at}")
+        return catalog
+
+    def _refresh_locked(self) -> RealTCatalog:
+        try:
+            catalog = RealTCatalog.from_tokens(download_realt_tokens())
+            catalog.save(self.snapshot_dir)
+        except Exception as e:
+            self.last_error = str(e)
+            raise
+        self.last_error = None
+        self._publish(catalog)
+        return catalog
+
+    def refresh(self) -> RealTCatalog:
+        """Download the catalog, persist it and swap it in (blocking)."""
+        with self._refresh_lock:
+            return self._refresh_locked()
+
+    def get(self) -> Optional[RealTCatalog]:
+        """
+        Current catalog, downloading it synchronously if there is no snapshot yet.
+
+        Blocks for up to the download timeout, so it is meant for warm-up, not the
+        request path (use ``catalog``). Concurrent callers wait for one download.
+
+        Returns:
+            The catalog, or None if there is no snapshot and RealT is unreachable
+        """
+        if self._catalog is None:
+            with self._refresh_lock:
+                # Another caller may have downloaded it while this one waited
+                if self._catalog is None:
+                    try:
+                        self._refresh_locked()
+                    except Exception as e:
+                        logger.warning(f"RealT catalog unavailable: {e}")
+        return self._catalog
+
+    def _seconds_until_stale(self) -> float:
+        if self._catalog is None:
+            return 0.0
+        try:
+            age = (datetime.now() - datetime.fromisoformat(self._catalog.fetched_at)).total_seconds()
+        except ValueError:
+            return 0.0
+        return self.refresh_interval - age
+
+    async def run(self) -> None:
+        while True:
+            if self._seconds_until_stale() <= 0:
+                try:
+                    catalog = await asyncio.to_thread(self.refresh)
+                    logger.info(f"Refreshed RealT catalog: {len(catalog)} tokens")
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"RealT catalog refresh failed: {e}")
+            # Retry failed refreshes within a minute; otherwise wake when the snapshot goes stale
+            delay = min(self.refresh_interval, 60.0) if self.last_error else self._seconds_until_stale()
+            await asyncio.sleep(max(1.0, delay))
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        catalog = self._catalog
+        return {
+            "tokens": len(catalog) if catalog is not None else 0,
+            "fetched_at": catalog.fetched_at if catalog is not None else None,
+            "last_error": self.last_error,
+        }
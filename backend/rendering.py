@@ -0,0 +1,161 @@
+"""
+Markdown rendering for RWA-GPT chat responses.
+
+Responses are assembled from per-item fragments (one per transaction or
+listed asset). Fragments are cached on the item's rendered fields, so
+repeated history and listing requests only format items that changed.
+Clients using the structured response mode skip this module entirely and
+render the typed data themselves.
+"""
+
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+from .token_registry import get_registry
+
+# Fields that affect a rendered fragment; used as the cache key
+TRANSACTION_FIELDS = ("amount", "asset_id", "timestamp", "chain_id", "status", "tx_hash", "confirmed_at", "x402_payment_id")
+ASSET_FIELDS = (
+    "asset_id", "property_name", "location", "yield_apy", "token_price", "occupancy_rate",
+    "rented_units", "total_units", "monthly_rent", "min_investment", "status", "source",
+)
+
+EMPTY_HISTORY_TEXT = (
+    "📋 **Your Transaction History**\n\nNo transactions found yet.\n\n"
+    "💡 Try making an investment first:\n• 'invest 100 USDC in RE-001'\n• 'invest 50 USDC in RE-002'"
+)
+
+
+def _fragment_key(item: Dict, fields: Iterable[str]) -> tuple:
+    return tuple(item.get(field) for field in fields)
+
+
+@lru_cache(maxsize=4096)
+def _transaction_fragment(key: tuple) -> str:
+    tx = dict(zip(TRANSACTION_FIELDS, key))
+    text = f"   💰 Amount: {tx['amount']} USDC\n"
+    text += f"   🏠 Asset: {tx['asset_id']}\n"
+    text += f"   📅 Time: {tx['timestamp'][:19].replace('T', ' ')}\n"
+    text += f"   🔗 Chain: {get_registry().chain_name(tx['chain_id'])} (ID: {tx['chain_id']})\n"
+
+    # Status with emoji
+    status_emoji = "✅" if tx['status'] == "confirmed" else "⏳" if tx['status'] == "pending" else "❌"
+    text += f"   📊 Status: {status_emoji} {tx['status'].title()}\n"
+
+    if tx.get('tx_hash'):
+        text += f"   🔗 TX Hash: {tx['tx_hash']}\n"
+    if tx.get('confirmed_at'):
+        text += f"   ✅ Confirmed: {tx['confirmed_at'][:19].replace('T', ' ')}\n"
+    if tx.get('x402_payment_id'):
+        text += f"   🤖 x402 ID: {tx['x402_payment_id']}\n"
+    return text
+
+
+@lru_cache(maxsize=4096)
+def _asset_fragment(key: tuple) -> str:
+    asset = dict(zip(ASSET_FIELDS, key))
+    text = f"🏢 Property: {asset['property_name']}\n"
+    text += f"📍 Location: {asset['location']}\n"
+    text += f"💰 APY: {asset['yield_apy']}% | Token Price: ${asset['token_price']}\n"
+
+    if asset.get('occupancy_rate'):
+        text += f"🏠 Occupancy: {asset['occupancy_rate']}% | Units: {asset['rented_units']}/{asset['total_units']}\n"
+    if asset.get('monthly_rent'):
+        text += f"💵 Monthly Rent: ${asset['monthly_rent']}\n"
+
+    text += f"🔵 Min Investment: {asset['min_investment']}\n"
+    text += f"📈 Status: {asset['status']} | Source: {asset['source']}\n"
+    text += f"⚡ To invest: 'invest 100 USDC in {asset['asset_id']}'\n\n"
+    return text
+
+
+def render_transaction_history(transactions: List[Dict]) -> str:
+    """
+    Render a user's transactions (already sorted newest first) as Markdown.
+
+    Args:
+        transactions: Transaction records
+
+    Returns:
+        Markdown text for the chat response
+    """
+    if not transactions:
+        return EMPTY_HISTORY_TEXT
+
+    parts = ["📋 **Your Transaction History**\n\n", f"Found {len(transactions)} transaction(s)\n\n"]
+    for i, tx in enumerate(transactions, 1):
+        parts.append(f"🔹 **Transaction #{i}**\n")
+        parts.append(_transaction_fragment(_fragment_key(tx, TRANSACTION_FIELDS)))
+        parts.append("\n")
+
+    parts.append("💡 **Commands:**\n")
+    parts.append("• 'invest 100 USDC in RE-001' - Make new investment\n")
+    parts.append("• 'show real estate investments' - View available options\n")
+    parts.append("• 'transaction history' - View this list again\n")
+    return "".join(parts)
+
+
+def render_real_estate_listing(assets: List[Dict], updated_at: str, total: Optional[int] = None, start: int = 1) -> str:
+    """
+    Render real estate listings as Markdown.
+
+    Args:
+        assets: Real estate asset records for one page
+        updated_at: Display timestamp for the data refresh line
+        total: Number of matching listings across all pages, if known
+        start: 1-based rank of the first asset on this page
+
+    Returns:
+        Markdown text for the chat response
+    """
+    parts = ["🏠 **REAL-TIME REAL ESTATE RWA INVESTMENTS**\n", f"📊 Live data updated: {updated_at}\n"]
+    if total is not None:
+        if assets:
+            parts.append(f"📋 Showing {start}-{start + len(assets) - 1} of {total} matching properties\n")
+        elif total:
+            parts.append(f"📋 No properties on this page ({total} matching properties)\n")
+        else:
+            parts.append("📋 No properties match these filters\n")
+    parts.append("\n")
+    for i, asset in enumerate(assets, start):
+        parts.append(f"🏆 #{i} - {asset['asset_id']}\n")
+        parts.append(_asset_fragment(_fragment_key(asset, ASSET_FIELDS)))
+
+    parts.append("🎯 **Why Real Estate RWA?**\n")
+    parts.append("• Fractional ownership of real properties\n")
+    parts.append("• Monthly rental income distributions\n")
+    parts.append("• Transparent, blockchain-verified ownership\n")
+    parts.append("• Lower minimum investments than traditional REITs\n\n")
+    parts.append("💡 Try: 'invest 50 USDC in RE-001', 'properties in Detroit with APY above 9%' or 'properties page 2'\n")
+    return "".join(parts)
+
+
+def render_portfolio(portfolio: Dict) -> str:
+    """
+    Render a portfolio summary (see portfolio.build_portfolio) as Markdown.
+
+    Args:
+        portfolio: Portfolio totals with a per-asset breakdown
+
+    Returns:
+        Markdown text for the chat response
+    """
+    if not portfolio["transaction_count"]:
+        return EMPTY_HISTORY_TEXT
+
+    parts = [
+        "💼 **Your Portfolio**\n\n",
+        f"💰 Total Invested: {portfolio['total_invested']} USDC across {portfolio['transaction_count']} transaction(s)\n",
+        f"✅ Confirmed: {portfolio['confirmed_invested']} USDC ({portfolio['confirmed_count']})\n",
+        f"⏳ Pending: {portfolio['pending_invested']} USDC ({portfolio['pending_count']})\n",
+    ]
+    if portfolio["failed_count"]:
+        parts.append(f"❌ Failed (not counted): {portfolio['failed_amount']} USDC ({portfolio['failed_count']})\n")
+    parts.append("\n")
+
+    for asset in portfolio["assets"]:
+        parts.append(f"🔹 **{asset['asset_id']}**: {asset['total_invested']} USDC ")
+        parts.append(f"({asset['transaction_count']} transaction(s), {asset['confirmed_invested']} USDC confirmed)\n")
+
+    parts.append("\n💡 Try: 'transaction history' for the full list\n")
+    return "".join(parts)
@@ -0,0 +1,259 @@
+"""
+Circuit breakers and adaptive timeouts for RWA-GPT upstream calls.
+
+Every external dependency (1inch, 0x, RealT, the subgraph and the LLM search
+agent) gets its own breaker. A breaker tracks a rolling window of recent
+calls, opens when the error rate or slow-call rate crosses a threshold, and
+lets a limited number of probe calls through once the cool-down expires
+(half-open). While open, callers fail immediately instead of waiting for a
+timeout, so the existing fallbacks kick in without delay.
+
+Timeouts are derived from the observed latency of successful calls: a high
+percentile of the window multiplied by a safety factor, clamped to a
+per-upstream [min, max] range.
+
+Only upstream trouble counts as a failure: transport errors, timeouts and
+5xx responses (plus 408/429). A 4xx answer to a bad request (unknown token,
+unsupported pair) shows the upstream is up, so a burst of bad user input
+cannot open a breaker for everyone.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, Optional, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+# Client-error statuses that still mean the upstream is struggling
+_UPSTREAM_CLIENT_STATUSES = frozenset({408, 429})
+
+
+def is_upstream_failure(exc: BaseException) -> bool:
+    """
+    Whether an exception raised around an upstream call counts against its breaker.
+
+    HTTP errors carrying a response (requests' HTTPError, httpx's HTTPStatusError)
+    count only for 5xx, 408 and 429; every other exception counts.
+    """
+    status = getattr(getattr(exc, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status >= 500 or status in _UPSTREAM_CLIENT_STATUSES
+    return True
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the upstream circuit is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(f"{name} circuit open; retry in {retry_after:.1f}s")
+
+
+class CircuitBreaker:
+    """
+    Per-upstream circuit breaker with latency-derived timeouts.
+
+    Args:
+        name: Upstream name used in errors and health output
+        window_size: Number of recent calls considered for the error rates
+        min_calls: Minimum calls in the window before the breaker may open
+        failure_rate_threshold: Fraction of failed calls that opens the circuit
+        slow_call_threshold: Latency in seconds above which a call counts as slow
+        slow_rate_threshold: Fraction of slow calls that opens the circuit
+        open_seconds: Cool-down before half-open probing starts
+        half_open_max_calls: Concurrent probe calls allowed while half-open
+        min_timeout: Lower bound for the adaptive timeout in seconds
+        max_timeout: Upper bound (and cold-start value) for the timeout in seconds
+        timeout_percentile: Latency percentile the timeout is based on
+        timeout_multiplier: Safety factor applied to that percentile
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window_size: int = 20,
+        min_calls: int = 5,
+        failure_rate_threshold: float = 0.5,
+        slow_call_threshold: Optional[float] = None,
+        slow_rate_threshold: float = 0.8,
+        open_seconds: float = 30.0,
+        half_open_max_calls: int = 1,
+        min_timeout: float = 1.0,
+        max_timeout: float = 15.0,
+        timeout_percentile: float = 95.0,
+        timeout_multiplier: float = 2.0,
+    ):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_threshold = slow_call_threshold if slow_call_threshold is not None else max_timeout * 0.8
+        self.slow_rate_threshold = slow_rate_threshold
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.timeout_percentile = timeout_percentile
+        self.timeout_multiplier = timeout_multiplier
+
+        # (ok, slow) per call, and latencies of successful calls only
+        self._outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=window_size)
+        self._latencies: Deque[float] = deque(maxlen=window_size)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self) -> None:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._half_open_in_flight = 0
+
+    def _open(self) -> None:
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._half_open_in_flight = 0
+        # Latencies from before the upstream degraded would time out every probe;
+        # probes use max_timeout until a new window has been collected
+        self._latencies.clear()
+
+    def allow_request(self) -> bool:
+        """Return True if a call may be attempted now (reserving a probe slot when half-open)."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._half_open_in_flight < self.half_open_max_calls:
+                self._half_open_in_flight += 1
+                return True
+            return False
+
+    def retry_after(self) -> float:
+        """Seconds until the next probe will be allowed (0 when not open)."""
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+
+    def timeout(self) -> float:
+        """Timeout for the next call, based on recent successful latencies."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if len(latencies) < self.min_calls:
+            return self.max_timeout
+        rank = min(len(latencies) - 1, int(round(self.timeout_percentile / 100.0 * (len(latencies) - 1))))
+        adaptive = latencies[rank] * self.timeout_multiplier
+        return min(self.max_timeout, max(self.min_timeout, adaptive))
+
+    def record_success(self, latency: float) -> None:
+        slow = latency >= self.slow_call_threshold
+        with self._lock:
+            self._latencies.append(latency)
+            if self._state == HALF_OPEN:
+                # A successful probe closes the circuit with a fresh window
+                self._state = CLOSED
+                self._outcomes.clear()
+                self._half_open_in_flight = 0
+            self._outcomes.append((True, slow))
+            self._evaluate()
+
+    def record_failure(self, latency: Optional[float] = None) -> None:
+        slow = latency is not None and latency >= self.slow_call_threshold
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._open()
+                return
+            self._outcomes.append((False, slow))
+            self._evaluate()
+
+    def _evaluate(self) -> None:
+        if self._state != CLOSED or len(self._outcomes) < self.min_calls:
+            return
+        calls = len(self._outcomes)
+        failures = sum(1 for ok, _ in self._outcomes if not ok)
+        slow_calls = sum(1 for _, slow in self._outcomes if slow)
+        if failures / calls >= self.failure_rate_threshold or slow_calls / calls >= self.slow_rate_threshold:
+            self._open()
+
+    @contextmanager
+    def protect(self) -> Iterator[float]:
+        """
+        Guard one upstream call.
+
+        Yields the timeout to use for the call and records the outcome when
+        the block exits: an exception counts as a failure if
+        ``is_upstream_failure`` says so, anything else as a success. The
+        exception is re-raised either way.
+
+        Raises:
+            CircuitOpenError: If the circuit is open and no probe slot is free
+        """
+        if not self.allow_request():
+            raise CircuitOpenError(self.name, self.retry_after())
+        start = time.monotonic()
+        try:
+            yield self.timeout()
+        except BaseException as e:
+            if is_upstream_failure(e):
+                self.record_failure(time.monotonic() - start)
+            else:
+                # The upstream answered; the request itself was bad
+                self.record_success(time.monotonic() - start)
+            raise
+        else:
+            self.record_success(time.monotonic() - start)
+
+    def snapshot(self) -> Dict:
+        """Return the breaker state for health/diagnostic output."""
+        state = self.state
+        with self._lock:
+            calls = len(self._outcomes)
+            failures = sum(1 for ok, _ in self._outcomes if not ok)
+        return {
+            "state": state,
+            "window_calls": calls,
+            "window_failures": failures,
+            "timeout_s": round(self.timeout(), 3),
+            "retry_after_s": round(self.retry_after(), 1),
+        }
+
+
+# Per-upstream tuning: LLM search is legitimately slow, HTTP APIs are not.
+UPSTREAM_SETTINGS: Dict[str, Dict] = {
+    "1inch": {"min_timeout": 2.0, "max_timeout": 15.0},
+    "0x": {"min_timeout": 2.0, "max_timeout": 15.0},
+    "realt": {"min_timeout": 2.0, "max_timeout": 10.0},
+    "subgraph": {"min_timeout": 2.0, "max_timeout": 15.0},
+    "llm": {"min_timeout": 20.0, "max_timeout": 90.0, "timeout_multiplier": 1.5, "open_seconds": 60.0},
+}
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Return the shared breaker for an upstream, creating it on first use."""
+    with _registry_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name, **UPSTREAM_SETTINGS.get(name, {}))
+            _breakers[name] = breaker
+        return breaker
+
+
+def breaker_snapshot() -> Dict[str, Dict]:
+    """Return the state of every breaker created so far."""
+    with _registry_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
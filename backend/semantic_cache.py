@@ -0,0 +1,303 @@
+"""
+Semantic cache for web-search answers.
+
+The exact-key cache in front of ``search_web`` misses as soon as a prompt
+is phrased differently ("best real estate rwa investments" vs "top real
+estate RWA investment options"). This cache stores each answered prompt's embedding in a
+preallocated float32 matrix and serves a stored answer when a new prompt's
+cosine similarity to a cached prompt is at least ``threshold``. Entries
+expire after a TTL, and when the cache is full the least recently used
+entry is overwritten.
+
+Because a semantic hit can be wrong, hits are audited:
+
+- a sampled fraction of semantic hits is re-answered for real in the
+  background and the two answers are compared; low agreement counts as a
+  false hit and evicts the entry
+- users can report an unhelpful answer, which counts as a false hit and
+  evicts the entry that served it
+
+Both are reported in ``stats()`` so the threshold can be tuned.
+
+Similar wording is not enough on its own: "current yield on Maple" and
+"current yield on Centrifuge" differ in one word. A semantic hit also
+requires the two prompts to name the same entities (``key_terms``, e.g.
+protocols and chains) and the same numbers.
+"""
+
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Canonical forms so common rephrasings embed close together
+SEARCH_SYNONYMS = {
+    "top": "best",
+    "highest": "best",
+    "leading": "best",
+    "greatest": "best",
+    "apy": "yield",
+    "apr": "yield",
+    "return": "yield",
+    "yielding": "yield",
+    "interest": "yield",
+    "investing": "investment",
+    "invest": "investment",
+    "opportunitie": "investment",  # "opportunities" after plural stripping
+    "option": "investment",
+    "real-world": "rwa",
+    "tokenised": "tokenized",
+}
+
+# Protocols, issuers and chains whose names must match exactly for a semantic hit
+SEARCH_ENTITIES = (
+    "backed", "blackrock", "buidl", "centrifuge", "clearpool", "franklin", "goldfinch", "maple",
+    "matrixdock", "mountain", "ondo", "openeden", "ousg", "paxg", "paxos", "plume", "polymesh",
+    "realt", "securitize", "superstate", "tether", "truefi", "usdy", "xaut",
+    "arbitrum", "avalanche", "bnb", "ethereum", "optimism", "polygon", "solana",
+)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_TERM_RE = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Lower-case, collapse whitespace and trim punctuation for exact matching."""
+    return _WHITESPACE_RE.sub(" ", prompt.lower()).strip(" ?!.")
+
+
+def _signature(key: str, key_terms: FrozenSet[str]) -> FrozenSet[str]:
+    """Numbers and key terms in a normalized prompt."""
+    return frozenset(term for term in _TERM_RE.findall(key) if term in key_terms or term[0].isdigit())
+
+
+@dataclass
+class SemanticHit:
+    answer: str
+    similarity: float
+    cached_prompt: str
+    slot: int
+    exact: bool
+
+
+class SemanticCache:
+    """
+    Embedding-similarity cache with LRU eviction and false-hit auditing.
+
+    Args:
+        embedder: Object with ``embed(texts) -> L2-normalized float32 matrix``
+        threshold: Minimum cosine similarity for a semantic hit
+        max_entries: Entries kept before the least recently used is replaced
+        ttl: Seconds an entry is served
+        audit_rate: Fraction of semantic (non-exact) hits re-checked against a fresh answer
+        audit_min_agreement: Minimum answer similarity for an audited hit to count as correct
+        key_terms: Lower-case words (entity names) that must match exactly for a semantic hit;
+            numbers always must
+    """
+
+    def __init__(
+        self,
+        embedder: Any,
+        threshold: float = 0.85,
+        max_entries: int = 512,
+        ttl: float = 3600.0,
+        audit_rate: float = 0.05,
+        audit_min_agreement: float = 0.5,
+        key_terms: Iterable[str] = SEARCH_ENTITIES,
+    ):
+        self.embedder = embedder
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.audit_rate = audit_rate
+        self.audit_min_agreement = audit_min_agreement
+        self.key_terms = frozenset(term.lower() for term in key_terms)
+
+        self._vectors: Optional[np.ndarray] = None  # allocated on first store, once the dimension is known
+        self._expires = np.zeros(max_entries, dtype=np.float64)  # 0 marks a free slot
+        self._last_used = np.zeros(max_entries, dtype=np.float64)
+        self._prompts: List[Optional[str]] = [None] * max_entries
+        self._answers: List[Optional[str]] = [None] * max_entries
+        self._signatures: List[Optional[FrozenSet[str]]] = [None] * max_entries
+        self._exact: Dict[str, int] = {}
+        # Recently served prompt -> (slot, cached prompt, answer), so feedback can find the entry that answered it
+        self._served: "OrderedDict[str, Tuple[int, str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.counters = {
+            "lookups": 0,
+            "exact_hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "key_term_mismatches": 0,
+            "stores": 0,
+            "evictions": 0,
+            "audits": 0,
+            "audit_false_hits": 0,
+            "feedback_false_hits": 0,
+        }
+        self._hit_similarities: List[float] = []
+
+    def _embed(self, text: str) -> np.ndarray:
+        return self.embedder.embed([text])[0].astype(np.float32)
+
+    def _free(self, slot: int) -> None:
+        prompt = self._prompts[slot]
+        if prompt is not None and self._exact.get(prompt) == slot:
+            del self._exact[prompt]
+        self._prompts[slot] = None
+        self._answers[slot] = None
+        self._signatures[slot] = None
+        self._expires[slot] = 0.0
+        self._last_used[slot] = 0.0
+
+    def _remember_served(self, prompt: str, slot: int) -> None:
+        self._served[prompt] = (slot, self._prompts[slot], self._answers[slot])
+        self._served.move_to_end(prompt)
+        while len(self._served) > self.max_entries:
+            self._served.popitem(last=False)
+
+    def lookup(self, prompt: str) -> Optional[SemanticHit]:
+        """Cached answer for ``prompt`` (exact or semantically similar), or None."""
+        key = normalize_prompt(prompt)
+        query = None if key in self._exact else self._embed(key)
+        now = time.time()
+        with self._lock:
+            self.counters["lookups"] += 1
+            slot = self._exact.get(key)
+            similarity = 1.0
+            if slot is None and self._vectors is not None:
+                if query is None:
+                    query = self._embed(key)
+                live = self._expires > now
+                if live.any():
+                    scores = np.where(live, self._vectors @ query, -1.0)
+                    candidates = np.flatnonzero(scores >= self.threshold)
+                    signature = _signature(key, self.key_terms)
+                    # Most similar first; skip entries about other entities or numbers
+                    for candidate in candidates[np.argsort(-scores[candidates])]:
+                        if self._signatures[candidate] == signature:
+                            slot, similarity = int(candidate), float(scores[candidate])
+                            break
+                    else:
+                        if len(candidates):
+                            self.counters["key_term_mismatches"] += 1
+            if slot is None or self._expires[slot] <= now:
+                self.counters["misses"] += 1
+                return None
+
+            exact = self._prompts[slot] == key
+            self.counters["exact_hits" if exact else "semantic_hits"] += 1
+            if not exact:
+                self._hit_similarities.append(similarity)
+                del self._hit_similarities[:-1000]
+            self._last_used[slot] = now
+            self._remember_served(key, slot)
+            return SemanticHit(self._answers[slot], similarity, self._prompts[slot], slot, exact)
+
+    def store(self, prompt: str, answer: str) -> None:
+        key = normalize_prompt(prompt)
+        vector = self._embed(key)
+        now = time.time()
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+            slot = self._exact.get(key)
+            if slot is None:
+                free = np.flatnonzero(self._expires <= now)
+                if len(free):
+                    slot = int(free[0])
+                else:
+                    slot = int(np.argmin(self._last_used))
+                    self.counters["evictions"] += 1
+                if self._prompts[slot] is not None:
+                    self._free(slot)
+            self._vectors[slot] = vector
+            self._prompts[slot] = key
+            self._answers[slot] = answer
+            self._signatures[slot] = _signature(key, self.key_terms)
+            self._expires[slot] = now + self.ttl
+            self._last_used[slot] = now
+            self._exact[key] = slot
+            self.counters["stores"] += 1
+
+    def should_audit(self, hit: SemanticHit) -> bool:
+        return not hit.exact and random.random() < self.audit_rate
+
+    def record_audit(self, hit: SemanticHit, fresh_answer: str) -> bool:
+        """
+        Compare a served semantic hit with a freshly computed answer.
+
+        Returns:
+            True if the hit was judged a false hit (the entry is evicted)
+        """
+        vectors = self.embedder.embed([hit.answer, fresh_answer])
+        agreement = float(vectors[0] @ vectors[1])
+        with self._lock:
+            self.counters["audits"] += 1
+            if agreement >= self.audit_min_agreement:
+                return False
+            self.counters["audit_false_hits"] += 1
+            if self._answers[hit.slot] == hit.answer:
+                self._free(hit.slot)
+            return True
+
+    def report_feedback(self, prompt: str, helpful: bool) -> bool:
+        """
+        Record user feedback on an answer served for ``prompt``.
+
+        Returns:
+            True if the feedback matched an answer served from this cache
+        """
+        key = normalize_prompt(prompt)
+        with self._lock:
+            served = self._served.pop(key, None)
+            if served is None:
+                return False
+            slot, cached_prompt, answer = served
+            if not helpful:
+                self.counters["feedback_false_hits"] += 1
+                # The slot may have been reused since; only evict the entry that was served
+                if self._prompts[slot] == cached_prompt and self._answers[slot] == answer:
+                    self._free(slot)
+            return True
+
+    def answer_for(self, prompt: str) -> Optional[str]:
+        """Answer last served for, or stored under, ``prompt`` if it is still known."""
+        key = normalize_prompt(prompt)
+        with self._lock:
+            served = self._served.get(key)
+            if served is not None:
+                return served[2]
+            slot = self._exact.get(key)
+            if slot is not None and self._expires[slot] > time.time():
+                return self._answers[slot]
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self.counters)
+            similarities = sorted(self._hit_similarities)
+            size = int((self._expires > time.time()).sum())
+        hits = counters["exact_hits"] + counters["semantic_hits"]
+        false_hits = counters["audit_false_hits"] + counters["feedback_false_hits"]
+        return {
+            **counters,
+            "size": size,
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "hit_rate": round(hits / counters["lookups"], 4) if counters["lookups"] else None,
+            "audit_false_hit_rate": (
+                round(counters["audit_false_hits"] / counters["audits"], 4) if counters["audits"] else None
+            ),
+            "false_hits_per_semantic_hit": (
+                round(false_hits / counters["semantic_hits"], 4) if counters["semantic_hits"] else None
+            ),
+            "semantic_hit_similarity_p50": similarities[len(similarities) // 2] if similarities else None,
+            "semantic_hit_similarity_min": similarities[0] if similarities else None,
+        }
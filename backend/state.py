@@ -0,0 +1,603 @@
+"""
+Shared transaction state for RWA-GPT.
+
+The API used to keep transactions in a module-level list, which only works
+with a single uvicorn worker. This module provides a small store interface
+with three interchangeable backends:
+
+- ``memory``: in-process, for local development and tests
+- ``sqlite``: a SQLite database in WAL mode, shared by all workers on one host
+- ``redis``: any Redis-protocol server, shared across hosts
+
+The backend is selected with the ``STATE_BACKEND`` environment variable.
+Every backend also maintains per-user portfolio counters (see portfolio.py)
+in the same write as the transaction record.
+
+All backends follow the same contract (checked by test_state.py): a status
+update applies to every record carrying the hash, and records move in and
+out of the pending set whichever direction their status changes.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .portfolio import record_deltas, status_change_deltas
+
+# Columns persisted for every transaction record
+TRANSACTION_FIELDS = (
+    "id", "timestamp", "user_address", "amount", "asset_id", "transaction_type",
+    "x402_payment_id", "status", "chain_id", "tx_hash", "confirmed_at",
+)
+
+
+def new_transaction_id() -> str:
+    return uuid.uuid4().hex
+
+
+class TransactionStore(ABC):
+    """Interface shared by all transaction state backends."""
+
+    name = "base"
+
+    @abstractmethod
+    def add(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Persist a new transaction record and return it (with its id)."""
+
+    @abstractmethod
+    def attach_tx_hash(self, tx_hash: str, x402_payment_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Attach a blockchain hash to an existing record.
+
+        Matches the most recent record with the given x402 payment ID, or,
+        when no payment ID is given, the most recent pending record that has
+        no hash yet. Returns the updated record, or None if nothing matched.
+        """
+
+    def update_status(self, tx_hash: str, status: str, confirmed_at: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Set the status of every record with this hash and return the oldest, or None if not found."""
+        updated = self.update_statuses({tx_hash: status}, confirmed_at)
+        return updated[0] if updated else None
+
+    @abstractmethod
+    def list_transactions(self, user_address: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return records in insertion order, optionally only those of one user."""
+
+    def iter_transactions(self, user_address: Optional[str] = None, page_size: int = 500) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield records in insertion order, one page at a time.
+
+        Backends override this to read one page per query, so exports hold at
+        most ``page_size`` records in memory however large the store is.
+        """
+        records = self.list_transactions(user_address)
+        for start in range(0, len(records), page_size):
+            yield records[start:start + page_size]
+
+    def pending_tx_hashes(self) -> List[str]:
+        """Return hashes of submitted transactions that are still pending."""
+        return [
+            tx["tx_hash"] for tx in self.list_transactions()
+            if tx["status"] == "pending" and tx["tx_hash"]
+        ]
+
+    @abstractmethod
+    def update_statuses(self, updates: Dict[str, str], confirmed_at: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Apply many {tx_hash: status} updates to every record with each hash.
+
+        Returns:
+            The updated records in insertion order; unknown hashes are skipped
+        """
+
+    @abstractmethod
+    def portfolio_counters(self, user_address: str) -> Dict[str, int]:
+        """Return the user's portfolio counters ({"<scope>|<metric>": value})."""
+
+    def close(self) -> None:
+        pass
+
+    @staticmethod
+    def _user_key(record: Dict[str, Any]) -> str:
+        return (record.get("user_address") or "").lower()
+
+    @staticmethod
+    def _normalize(record: Dict[str, Any]) -> Dict[str, Any]:
+        normalized = {field: record.get(field) for field in TRANSACTION_FIELDS}
+        if not normalized["id"]:
+            normalized["id"] = new_transaction_id()
+        return normalized
+
+
+class InMemoryTransactionStore(TransactionStore):
+    """Process-local store; only suitable for a single worker."""
+
+    name = "memory"
+
+    def __init__(self):
+        self._records: List[Dict[str, Any]] = []
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def _apply(self, record: Dict[str, Any], deltas: Dict[str, int]) -> None:
+        counters = self._counters.setdefault(self._user_key(record), {})
+        for key, value in deltas.items():
+            counters[key] = counters.get(key, 0) + value
+
+    def add(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        record = self._normalize(record)
+        with self._lock:
+            self._records.append(record)
+            self._apply(record, record_deltas(record))
+        return dict(record)
+
+    def attach_tx_hash(self, tx_hash: str, x402_payment_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            for tx in reversed(self._records):
+                if x402_payment_id:
+                    matched = tx.get("x402_payment_id") == x402_payment_id
+                else:
+                    matched = tx["status"] == "pending" and tx["tx_hash"] is None
+                if matched:
+                    tx["tx_hash"] = tx_hash
+                    return dict(tx)
+        return None
+
+    def update_statuses(self, updates: Dict[str, str], confirmed_at: Optional[str] = None) -> List[Dict[str, Any]]:
+        confirmed_at = confirmed_at or datetime.now().isoformat()
+        updated = []
+        with self._lock:
+            for tx in self._records:
+                status = updates.get(tx["tx_hash"]) if tx.get("tx_hash") else None
+                if status is None:
+                    continue
+                self._apply(tx, status_change_deltas(tx, tx["status"], status))
+                tx["status"] = status
+                tx["confirmed_at"] = confirmed_at
+                updated.append(dict(tx))
+        return updated
+
+    def list_transactions(self, user_address: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            records = list(self._records)
+        if user_address:
+            user_address = user_address.lower()
+            records = [tx for tx in records if (tx.get("user_address") or "").lower() == user_address]
+        return [dict(tx) for tx in records]
+
+    def iter_transactions(self, user_address: Optional[str] = None, page_size: int = 500) -> Iterator[List[Dict[str, Any]]]:
+        user_address = user_address.lower() if user_address else None
+        # Records are only ever appended, so a position is a stable cursor
+        position = 0
+        while True:
+            with self._lock:
+                chunk = [dict(tx) for tx in self._records[position:position + page_size]]
+            if not chunk:
+                return
+            position += len(chunk)
+            if user_address:
+                chunk = [tx for tx in chunk if (tx.get("user_address") or "").lower() == user_address]
+            if chunk:
+                yield chunk
+
+    def portfolio_counters(self, user_address: str) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters.get(user_address.lower(), {}))
+
+
+class SQLiteTransactionStore(TransactionStore):
+    """
+    SQLite store in WAL mode, safe to share between worker processes on one host.
+
+    Args:
+        path: Database file path
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str = "rwa_state.db"):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS transactions (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                id TEXT UNIQUE NOT NULL,
+                timestamp TEXT,
+                user_address TEXT,
+                user_key TEXT,
+                amount TEXT,
+                asset_id TEXT,
+                transaction_type TEXT,
+                x402_payment_id TEXT,
+                status TEXT,
+                chain_id INTEGER,
+                tx_hash TEXT,
+                confirmed_at TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_transactions_user ON transactions (user_key);
+            CREATE INDEX IF NOT EXISTS idx_transactions_hash ON transactions (tx_hash);
+            CREATE INDEX IF NOT EXISTS idx_transactions_x402 ON transactions (x402_payment_id);
+            CREATE INDEX IF NOT EXISTS idx_transactions_status ON transactions (status);
+            CREATE TABLE IF NOT EXISTS portfolio_counters (
+                user_key TEXT NOT NULL,
+                counter TEXT NOT NULL,
+                value INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_key, counter)
+            );
+            """
+        )
+        self._backfill_counters(conn)
+
+    def _backfill_counters(self, conn: sqlite3.Connection) -> None:
+        """Build counters for databases created before portfolio aggregates existed."""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            has_counters = conn.execute("SELECT 1 FROM portfolio_counters LIMIT 1").fetchone()
+            if not has_counters:
+                for row in conn.execute("SELECT * FROM transactions ORDER BY seq").fetchall():
+                    record = self._row_to_record(row)
+                    self._apply(conn, record, record_deltas(record))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _apply(self, conn: sqlite3.Connection, record: Dict[str, Any], deltas: Dict[str, int]) -> None:
+        if not deltas:
+            return
+        user_key = self._user_key(record)
+        conn.executemany(
+            "INSERT INTO portfolio_counters (user_key, counter, value) VALUES (?, ?, ?) "
+            "ON CONFLICT (user_key, counter) DO UPDATE SET value = value + excluded.value",
+            [(user_key, key, value) for key, value in deltas.items()],
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode; write paths open explicit IMMEDIATE transactions
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row_to_record(row: sqlite3.Row) -> Dict[str, Any]:
+        return {field: row[field] for field in TRANSACTION_FIELDS}
+
+    def _get(self, conn: sqlite3.Connection, seq: int) -> Dict[str, Any]:
+        row = conn.execute("SELECT * FROM transactions WHERE seq = ?", (seq,)).fetchone()
+        return self._row_to_record(row)
+
+    def add(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        record = self._normalize(record)
+        columns = list(TRANSACTION_FIELDS) + ["user_key"]
+        values = [record[field] for field in TRANSACTION_FIELDS] + [self._user_key(record)]
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                f"INSERT INTO transactions ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+                values,
+            )
+            self._apply(conn, record, record_deltas(record))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return record
+
+    def attach_tx_hash(self, tx_hash: str, x402_payment_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if x402_payment_id:
+                row = conn.execute(
+                    "SELECT seq FROM transactions WHERE x402_payment_id = ? ORDER BY seq DESC LIMIT 1",
+                    (x402_payment_id,),
+                ).fetchone()
+            else:
+                row = conn.execute(
+                    "SELECT seq FROM transactions WHERE status = 'pending' AND tx_hash IS NULL ORDER BY seq DESC LIMIT 1"
+                ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute("UPDATE transactions SET tx_hash = ? WHERE seq = ?", (tx_hash, row["seq"]))
+            record = self._get(conn, row["seq"])
+            conn.execute("COMMIT")
+            return record
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def list_transactions(self, user_address: Optional[str] = None) -> List[Dict[str, Any]]:
+        conn = self._conn()
+        if user_address:
+            rows = conn.execute(
+                "SELECT * FROM transactions WHERE user_key = ? ORDER BY seq", (user_address.lower(),)
+            ).fetchall()
+        else:
+            rows = conn.execute("SELECT * FROM transactions ORDER BY seq").fetchall()
+        return [self._row_to_record(row) for row in rows]
+
+    def iter_transactions(self, user_address: Optional[str] = None, page_size: int = 500) -> Iterator[List[Dict[str, Any]]]:
+        # Keyset pagination on seq: every page is an index range scan
+        last_seq = 0
+        while True:
+            # Looked up per page; a streaming consumer may resume on another thread
+            conn = self._conn()
+            if user_address:
+                rows = conn.execute(
+                    "SELECT * FROM transactions WHERE user_key = ? AND seq > ? ORDER BY seq LIMIT ?",
+                    (user_address.lower(), last_seq, page_size),
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT * FROM transactions WHERE seq > ? ORDER BY seq LIMIT ?", (last_seq, page_size)
+                ).fetchall()
+            if not rows:
+                return
+            last_seq = rows[-1]["seq"]
+            yield [self._row_to_record(row) for row in rows]
+
+    def pending_tx_hashes(self) -> List[str]:
+        rows = self._conn().execute(
+            "SELECT tx_hash FROM transactions WHERE status = 'pending' AND tx_hash IS NOT NULL ORDER BY seq"
+        ).fetchall()
+        return [row["tx_hash"] for row in rows]
+
+    def update_statuses(self, updates: Dict[str, str], confirmed_at: Optional[str] = None) -> List[Dict[str, Any]]:
+        if not updates:
+            return []
+        confirmed_at = confirmed_at or datetime.now().isoformat()
+        conn = self._conn()
+        placeholders = ", ".join("?" for _ in updates)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for row in conn.execute(
+                f"SELECT * FROM transactions WHERE tx_hash IN ({placeholders})", list(updates)
+            ).fetchall():
+                old = self._row_to_record(row)
+                self._apply(conn, old, status_change_deltas(old, old["status"], updates[old["tx_hash"]]))
+            conn.executemany(
+                "UPDATE transactions SET status = ?, confirmed_at = ? WHERE tx_hash = ?",
+                [(status, confirmed_at, tx_hash) for tx_hash, status in updates.items()],
+            )
+            rows = conn.execute(
+                f"SELECT * FROM transactions WHERE tx_hash IN ({placeholders}) ORDER BY seq", list(updates)
+            ).fetchall()
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return [self._row_to_record(row) for row in rows]
+
+    def portfolio_counters(self, user_address: str) -> Dict[str, int]:
+        rows = self._conn().execute(
+            "SELECT counter, value FROM portfolio_counters WHERE user_key = ?", (user_address.lower(),)
+        ).fetchall()
+        return {row["counter"]: row["value"] for row in rows}
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class RedisTransactionStore(TransactionStore):
+    """
+    Store backed by a Redis-protocol server, shared across workers and hosts.
+
+    Each record is a hash whose fields hold JSON-encoded values. Sorted sets
+    keep insertion order globally, per user and per transaction hash, and
+    claiming the most recent unhashed pending record is a single atomic
+    ZPOPMAX.
+
+    Args:
+        url: Redis connection URL (used when no client is given)
+        client: Existing redis-py compatible client, e.g. ``fakeredis.FakeRedis()``
+            as a local stand-in (see test_state.py)
+        prefix: Key prefix for all state keys
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str = "redis://localhost:6379/0", client: Any = None, prefix: str = "rwa"):
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise RuntimeError("STATE_BACKEND=redis requires the 'redis' package") from e
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, *parts: str) -> str:
+        return ":".join((self.prefix,) + parts)
+
+    def _record_key(self, tx_id: str) -> str:
+        return self._key("tx", tx_id)
+
+    @staticmethod
+    def _text(value: Any) -> str:
+        return value.decode() if isinstance(value, bytes) else value
+
+    def _load(self, tx_id: str) -> Optional[Dict[str, Any]]:
+        raw = self.client.hgetall(self._record_key(tx_id))
+        if not raw:
+            return None
+        record = {self._text(k): json.loads(self._text(v)) for k, v in raw.items()}
+        return {field: record.get(field) for field in TRANSACTION_FIELDS}
+
+    def _save_fields(self, pipe: Any, tx_id: str, fields: Dict[str, Any]) -> None:
+        pipe.hset(self._record_key(tx_id), mapping={k: json.dumps(v) for k, v in fields.items()})
+
+    def _apply(self, pipe: Any, record: Dict[str, Any], deltas: Dict[str, int]) -> None:
+        portfolio_key = self._key("portfolio", self._user_key(record))
+        for key, value in deltas.items():
+            pipe.hincrby(portfolio_key, key, value)
+
+    def _set_status(self, tx_hash: str, status: str, confirmed_at: str) -> List[Tuple[float, str]]:
+        """
+        Change the status of every record with this hash and move their portfolio
+        counters atomically (WATCH/MULTI).
+
+        Returns:
+            (sequence number, record id) of each updated record
+        """
+        entries = [
+            (seq, self._text(tx_id))
+            for tx_id, seq in self.client.zrange(self._key("tx", "hash", tx_hash), 0, -1, withscores=True)
+        ]
+        if not entries:
+            return []
+        try:
+            from redis.exceptions import WatchError
+        except ImportError:  # client stand-ins without redis-py never raise it
+            WatchError = ()
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(*(self._record_key(tx_id) for _, tx_id in entries))
+                    olds = [(seq, tx_id, self._load(tx_id)) for seq, tx_id in entries]
+                    pipe.multi()
+                    for _, tx_id, old in olds:
+                        if old is None:
+                            continue
+                        self._save_fields(pipe, tx_id, {"status": status, "confirmed_at": confirmed_at})
+                        self._apply(pipe, old, status_change_deltas(old, old["status"], status))
+                    # Keep the pending index in step with the status, in either direction
+                    if status == "pending":
+                        pipe.sadd(self._key("tx", "pending"), tx_hash)
+                    else:
+                        pipe.srem(self._key("tx", "pending"), tx_hash)
+                    pipe.execute()
+                    return [(seq, tx_id) for seq, tx_id, old in olds if old is not None]
+                except WatchError:
+                    continue
+
+    def add(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        record = self._normalize(record)
+        tx_id = record["id"]
+        seq = self.client.incr(self._key("tx", "seq"))
+        pipe = self.client.pipeline()
+        self._save_fields(pipe, tx_id, record)
+        pipe.zadd(self._key("tx", "all"), {tx_id: seq})
+        pipe.zadd(self._key("tx", "user", self._user_key(record)), {tx_id: seq})
+        self._apply(pipe, record, record_deltas(record))
+        if record["x402_payment_id"]:
+            pipe.set(self._key("tx", "x402", record["x402_payment_id"]), tx_id)
+        if record["tx_hash"]:
+            pipe.zadd(self._key("tx", "hash", record["tx_hash"]), {tx_id: seq})
+            if record["status"] == "pending":
+                pipe.sadd(self._key("tx", "pending"), record["tx_hash"])
+        elif record["status"] == "pending":
+            pipe.zadd(self._key("tx", "unhashed"), {tx_id: seq})
+        pipe.execute()
+        return record
+
+    def attach_tx_hash(self, tx_hash: str, x402_payment_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        if x402_payment_id:
+            tx_id = self.client.get(self._key("tx", "x402", x402_payment_id))
+            if tx_id is None:
+                return None
+            tx_id = self._text(tx_id)
+        else:
+            claimed = self.client.zpopmax(self._key("tx", "unhashed"))
+            if not claimed:
+                return None
+            tx_id = self._text(claimed[0][0])
+
+        seq = self.client.zscore(self._key("tx", "all"), tx_id)
+        pipe = self.client.pipeline()
+        self._save_fields(pipe, tx_id, {"tx_hash": tx_hash})
+        pipe.zrem(self._key("tx", "unhashed"), tx_id)
+        pipe.zadd(self._key("tx", "hash", tx_hash), {tx_id: seq or 0})
+        pipe.execute()
+        record = self._load(tx_id)
+        if record is not None and record["status"] == "pending":
+            self.client.sadd(self._key("tx", "pending"), tx_hash)
+        return record
+
+    def pending_tx_hashes(self) -> List[str]:
+        return sorted(self._text(tx_hash) for tx_hash in self.client.smembers(self._key("tx", "pending")))
+
+    def update_statuses(self, updates: Dict[str, str], confirmed_at: Optional[str] = None) -> List[Dict[str, Any]]:
+        if not updates:
+            return []
+        confirmed_at = confirmed_at or datetime.now().isoformat()
+        # Each change reads the old status for the portfolio counters, so
+        # hashes are updated one optimistic transaction at a time
+        found = sorted(entry for tx_hash, status in updates.items() for entry in self._set_status(tx_hash, status, confirmed_at))
+        records = (self._load(tx_id) for _, tx_id in found)
+        return [record for record in records if record is not None]
+
+    def list_transactions(self, user_address: Optional[str] = None) -> List[Dict[str, Any]]:
+        index = self._key("tx", "user", user_address.lower()) if user_address else self._key("tx", "all")
+        tx_ids = [self._text(tx_id) for tx_id in self.client.zrange(index, 0, -1)]
+        records = (self._load(tx_id) for tx_id in tx_ids)
+        return [record for record in records if record is not None]
+
+    def iter_transactions(self, user_address: Optional[str] = None, page_size: int = 500) -> Iterator[List[Dict[str, Any]]]:
+        index = self._key("tx", "user", user_address.lower()) if user_address else self._key("tx", "all")
+        last_seq = 0
+        while True:
+            # Scores are insertion sequence numbers, so "after the last score" is a stable cursor
+            page = self.client.zrangebyscore(index, f"({last_seq}", "+inf", start=0, num=page_size, withscores=True)
+            if not page:
+                return
+            last_seq = int(page[-1][1])
+            pipe = self.client.pipeline()
+            for tx_id, _ in page:
+                pipe.hgetall(self._record_key(self._text(tx_id)))
+            records = []
+            for raw in pipe.execute():
+                if raw:
+                    record = {self._text(k): json.loads(self._text(v)) for k, v in raw.items()}
+                    records.append({field: record.get(field) for field in TRANSACTION_FIELDS})
+            if records:
+                yield records
+
+    def portfolio_counters(self, user_address: str) -> Dict[str, int]:
+        raw = self.client.hgetall(self._key("portfolio", user_address.lower()))
+        return {self._text(k): int(v) for k, v in raw.items()}
+
+    def close(self) -> None:
+        close = getattr(self.client, "close", None)
+        if close is not None:
+            close()
+
+
+def create_transaction_store(backend: Optional[str] = None) -> TransactionStore:
+    """
+    Create the transaction store selected by configuration.
+
+    Args:
+        backend: "memory", "sqlite" or "redis"; defaults to STATE_BACKEND (memory)
+
+    Returns:
+        TransactionStore instance
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    backend = (backend or os.getenv("STATE_BACKEND", "memory")).lower()
+    if backend == "memory":
+        return InMemoryTransactionStore()
+    if backend == "sqlite":
+        return SQLiteTransactionStore(os.getenv("STATE_SQLITE_PATH", "rwa_state.db"))
+    if backend == "redis":
+        return RedisTransactionStore(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    raise ValueError(f"Unknown STATE_BACKEND '{backend}' (expected memory, sqlite or redis)")
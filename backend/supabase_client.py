@@ -5,6 +5,7 @@ This module provides database operations for storing and retrieving chat message
 using Supabase as the backend database.
 """
 
+import asyncio
 import os
 import logging
 from typing import List, Dict, Any, Optional
@@ -160,6 +161,46 @@ async def fetch_messages(limit: int = 100) -> List[Dict[str, Any]]:
         raise Exception(f"Database fetch failed: {e}")
 
 
+async def fetch_messages_page(
+    after_id: Optional[Any] = None,
+    page_size: int = 500,
+    role: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Fetch one page of messages in id order, for exports that walk the whole table.
+    
+    Uses keyset pagination (``id > after_id``) so every page costs the same
+    however deep into the table it is.
+    
+    Args:
+        after_id: Id of the last message of the previous page (None for the first page)
+        page_size: Maximum number of messages in the page
+        role: Optional role to filter by ('user' or 'agent')
+    
+    Returns:
+        List of message dictionaries; empty once the table is exhausted
+        
+    Raises:
+        Exception: If database operation fails
+    """
+    try:
+        client = initialize_supabase()
+        
+        query = client.table("messages").select("*")
+        if role:
+            query = query.eq("role", role)
+        if after_id is not None:
+            query = query.gt("id", after_id)
+        
+        # Run the blocking HTTP call off the event loop; exports issue many of them
+        result = await asyncio.to_thread(query.order("id").limit(page_size).execute)
+        return result.data or []
+        
+    except Exception as e:
+        logger.error(f"Failed to fetch messages page: {e}")
+        raise Exception(f"Database page fetch failed: {e}")
+
+
 async def fetch_messages_by_role(role: str, limit: int = 50) -> List[Dict[str, Any]]:
     """
     Fetch messages filtered by role.
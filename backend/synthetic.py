@@ -0,0 +1,183 @@
+"""
+Seeded synthetic RWA market data.
+
+Everything here is generated with NumPy from an explicit seed, so the same
+arguments always produce the same market. Column values are drawn as whole
+arrays, never per field. This keeps millions of rows cheap to generate.
+It is used for two things:
+
+- the demo fallback listing in ``fetch_real_estate_rwa_data`` when the
+  RealT catalog is unavailable (``demo_catalog``)
+- the data source for the catalog, recommender and history benchmarks in
+  ``benchmarks.py``
+
+Properties come back as a ``RealTCatalog``, so they support the same
+queries, snapshots and asset dicts as the real catalog. Transactions come
+back as column arrays and are turned into store records on demand.
+"""
+
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, Iterator, Optional
+
+import numpy as np
+
+from .realt_catalog import COLUMN_DTYPE, RealTCatalog, StringColumn
+
+DEMO_SEED = 20240601
+
+# (city, state, base APY %, base token price USD) for typical RealT markets
+MARKETS = (
+    ("Detroit", "MI", 8.2, 62.50),
+    ("Cleveland", "OH", 7.8, 45.00),
+    ("Memphis", "TN", 9.1, 38.75),
+    ("Birmingham", "AL", 7.5, 55.25),
+    ("Toledo", "OH", 8.7, 41.80),
+    ("Chicago", "IL", 7.1, 58.40),
+    ("Montgomery", "AL", 8.9, 47.10),
+    ("Highland Park", "MI", 9.4, 36.20),
+    ("Akron", "OH", 8.0, 44.60),
+    ("Jackson", "MS", 9.6, 35.90),
+)
+STREETS = ("Main St", "Oak Ave", "Maple St", "Elm St", "Cedar Ave", "Park Ave", "Pine St", "Lake Dr", "Hill Rd", "Washington Blvd")
+
+# Transaction statuses and the share of transactions in each
+TRANSACTION_STATUSES = ("confirmed", "pending", "failed")
+STATUS_WEIGHTS = (0.85, 0.10, 0.05)
+AMOY_CHAIN_ID = 80002
+
+
+class SyntheticCatalog(RealTCatalog):
+    """RealTCatalog of generated properties, labelled as demo data."""
+
+    def asset(self, index: int) -> Dict[str, Any]:
+        asset = super().asset(index)
+        asset["asset_id"] = f"RE-{index + 1:03d}"
+        asset["protocol"] = "RWA-GPT Demo"
+        asset["source"] = "Synthetic Demo Data"
+        return asset
+
+
+def generate_catalog(count: int, seed: int = DEMO_SEED, fetched_at: Optional[str] = None) -> SyntheticCatalog:
+    """
+    Generate ``count`` synthetic properties.
+
+    Args:
+        count: Number of properties
+        seed: RNG seed; equal seeds give identical catalogs
+        fetched_at: Timestamp recorded on the catalog (defaults to now)
+
+    Returns:
+        SyntheticCatalog with one row per property
+    """
+    rng = np.random.default_rng(seed)
+    market = rng.integers(0, len(MARKETS), count)
+    base_apy = np.array([m[2] for m in MARKETS], dtype=np.float32)[market]
+    base_price = np.array([m[3] for m in MARKETS], dtype=np.float32)[market]
+
+    total_units = rng.integers(1, 31, count, dtype=np.int32)
+    # Occupancy skews high, as it does for managed rentals
+    rented_units = np.rint(total_units * rng.beta(8.0, 1.5, count)).astype(np.int32)
+    rent_per_unit = rng.normal(950.0, 180.0, count).clip(450.0, 2200.0)
+
+    columns = np.zeros(count, dtype=COLUMN_DTYPE)
+    columns["apy"] = np.round(base_apy + rng.normal(0.0, 0.6, count), 2).clip(3.0, 18.0)
+    columns["token_price"] = np.round(base_price * rng.lognormal(0.0, 0.08, count), 2)
+    columns["monthly_rent"] = np.round(rented_units * rent_per_unit, 2)
+    columns["total_tokens"] = rng.integers(800, 2001, count)
+    columns["rented_units"] = rented_units
+    columns["total_units"] = total_units
+    # One vocabulary entry per market; states may repeat across markets
+    states = list(dict.fromkeys(m[1] for m in MARKETS))
+    columns["city_code"] = market
+    columns["state_code"] = np.array([states.index(m[1]) for m in MARKETS], dtype=np.int32)[market]
+
+    numbers = rng.integers(100, 20000, count).tolist()
+    streets = rng.integers(0, len(STREETS), count).tolist()
+    zips = rng.integers(10000, 99999, count).tolist()
+    markets = market.tolist()
+    names = [
+        f"{n} {STREETS[s]}, {MARKETS[m][0]}, {MARKETS[m][1]} {z}"
+        for n, s, m, z in zip(numbers, streets, markets, zips)
+    ]
+    symbols = [f"SYNTH-{i + 1}" for i in range(count)]
+
+    return SyntheticCatalog(
+        columns,
+        {"name": StringColumn.from_strings(names), "symbol": StringColumn.from_strings(symbols)},
+        [m[0] for m in MARKETS],
+        states,
+        fetched_at or datetime.now().isoformat(),
+    )
+
+
+@lru_cache(maxsize=1)
+def demo_catalog() -> SyntheticCatalog:
+    """Small fixed demo catalog used when RealT data is unavailable."""
+    return generate_catalog(25, seed=DEMO_SEED)
+
+
+def user_address(index: int) -> str:
+    """Deterministic wallet address for synthetic user ``index``."""
+    return f"0x{index + 1:040x}"
+
+
+def generate_transactions(
+    count: int,
+    users: int,
+    assets: int,
+    seed: int = DEMO_SEED,
+    days: int = 365,
+    end: Optional[datetime] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Generate ``count`` synthetic investment transactions as column arrays.
+
+    Args:
+        count: Number of transactions
+        users: Number of distinct investors (see ``user_address``)
+        assets: Number of properties invested in (``SYNTH-1`` and up, as in generate_catalog)
+        seed: RNG seed; equal seeds give identical transactions
+        days: Time span the transactions cover, ending at ``end``
+        end: Latest possible timestamp (defaults to now)
+
+    Returns:
+        {"user", "asset", "amount_cents", "timestamp", "status", "tx_hash_words"} arrays,
+        ordered oldest first; ``status`` indexes TRANSACTION_STATUSES
+    """
+    rng = np.random.default_rng(seed)
+    end_ts = (end or datetime.now()).timestamp()
+    # A few active investors account for most transactions
+    user = np.minimum(rng.zipf(1.3, count) - 1, users - 1)
+    return {
+        "user": rng.permutation(users)[user],
+        "asset": rng.integers(0, assets, count),
+        "amount_cents": np.rint(rng.lognormal(np.log(150.0), 0.9, count).clip(10.0, 50000.0) * 100).astype(np.int64),
+        "timestamp": np.sort(end_ts - rng.uniform(0.0, days * 86400.0, count)),
+        "status": rng.choice(len(TRANSACTION_STATUSES), count, p=STATUS_WEIGHTS).astype(np.int8),
+        "tx_hash_words": rng.integers(0, np.iinfo(np.uint64).max, (count, 4), dtype=np.uint64, endpoint=True),
+    }
+
+
+def transaction_records(transactions: Dict[str, np.ndarray]) -> Iterator[Dict[str, Any]]:
+    """
+    Yield store records (the shape TransactionStore.add accepts) for generated transactions.
+
+    Pending transactions have no transaction hash yet.
+    """
+    for i in range(len(transactions["user"])):
+        status = TRANSACTION_STATUSES[transactions["status"][i]]
+        timestamp = datetime.fromtimestamp(float(transactions["timestamp"][i]))
+        cents = int(transactions["amount_cents"][i])
+        yield {
+            "timestamp": timestamp.isoformat(),
+            "user_address": user_address(int(transactions["user"][i])),
+            "amount": f"{cents // 100}.{cents % 100:02d}",
+            "asset_id": f"SYNTH-{int(transactions['asset'][i]) + 1}",
+            "transaction_type": "investment",
+            "x402_payment_id": f"x402_synthetic_{i}",
+            "status": status,
+            "chain_id": AMOY_CHAIN_ID,
+            "tx_hash": None if status == "pending" else "0x" + transactions["tx_hash_words"][i].tobytes().hex(),
+            "confirmed_at": (timestamp + timedelta(seconds=30)).isoformat() if status == "confirmed" else None,
+        }
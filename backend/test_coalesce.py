@@ -0,0 +1,134 @@
+"""
+Single-flight coalescing and the TTL cache used for shared upstream calls.
+"""
+
+import asyncio
+
+import pytest
+
+from backend import coalesce
+from backend.coalesce import SingleFlight, TTLCache, shared_call
+
+
+def test_concurrent_calls_with_the_same_key_share_one_call():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def main():
+        flights = SingleFlight()
+        results = await asyncio.gather(*(flights.do("key", fetch) for _ in range(5)), flights.do("other", fetch))
+        return results, flights
+
+    results, flights = asyncio.run(main())
+
+    assert results == ["result"] * 6
+    assert len(calls) == 2
+    assert flights._in_flight == {}
+
+
+def test_a_shared_failure_reaches_every_caller():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def main():
+        flights = SingleFlight()
+        return await asyncio.gather(*(flights.do("key", fetch) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+
+    assert len(calls) == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_a_cancelled_leader_hands_the_call_to_a_waiting_follower():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return len(calls)
+
+    async def main():
+        flights = SingleFlight()
+        leader = asyncio.create_task(flights.do("key", fetch))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(flights.do("key", fetch)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        results = await asyncio.gather(*followers)
+        return leader, results
+
+    leader, results = asyncio.run(main())
+
+    assert leader.cancelled()
+    # One follower re-ran the call and the others shared its result
+    assert results == [2, 2, 2]
+    assert len(calls) == 2
+
+
+def test_a_cancelled_follower_does_not_cancel_the_leader():
+    async def fetch():
+        await asyncio.sleep(0.03)
+        return "result"
+
+    async def main():
+        flights = SingleFlight()
+        leader = asyncio.create_task(flights.do("key", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.do("key", fetch))
+        await asyncio.sleep(0.01)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        return await leader
+
+    assert asyncio.run(main()) == "result"
+
+
+def test_ttl_cache_expires_entries_and_evicts_least_recently_used(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(coalesce.time, "monotonic", lambda: now[0])
+    cache = TTLCache(max_entries=2)
+
+    cache.set("a", 1, ttl=10)
+    cache.set("b", 2, ttl=10)
+    assert cache.get("a") == (True, 1)  # "a" is now the most recently used
+    cache.set("c", 3, ttl=10)
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+
+    now[0] += 11
+    assert cache.get("a") == (False, None)
+    assert cache.get("missing") == (False, None)
+
+
+def test_shared_call_caches_only_results_accepted_by_cache_if():
+    coalesce.upstream_cache.clear()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return {"ok": len(calls) > 1}
+
+    async def main():
+        first = await shared_call("test-shared-call", fetch, ttl=60, cache_if=lambda result: result["ok"])
+        second = await shared_call("test-shared-call", fetch, ttl=60, cache_if=lambda result: result["ok"])
+        third = await shared_call("test-shared-call", fetch, ttl=60, cache_if=lambda result: result["ok"])
+        return first, second, third
+
+    try:
+        first, second, third = asyncio.run(main())
+    finally:
+        coalesce.upstream_cache.clear()
+
+    assert first == {"ok": False}
+    assert second == third == {"ok": True}
+    assert len(calls) == 2
@@ -0,0 +1,89 @@
+"""
+Token buckets and per-client, per-tier admission control.
+"""
+
+import math
+
+import pytest
+
+from backend import rate_limit
+from backend.rate_limit import RateLimiter, RateLimitExceeded, TokenBucket
+
+
+def test_token_bucket_allows_the_burst_then_refills_at_the_rate():
+    bucket = TokenBucket(rate=2.0, capacity=3)
+    bucket.updated = 0.0
+
+    assert [bucket.try_acquire(now=0.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.try_acquire(now=0.0) == pytest.approx(0.5)
+    assert bucket.try_acquire(now=0.5) == 0.0
+    # Refill is capped at the capacity
+    bucket.try_acquire(cost=0, now=100.0)
+    assert bucket.tokens == 3
+
+
+def test_token_bucket_costs_and_zero_rate():
+    bucket = TokenBucket(rate=1.0, capacity=5)
+    bucket.updated = 0.0
+    assert bucket.try_acquire(cost=4, now=0.0) == 0.0
+    # A rejected request takes nothing
+    assert bucket.try_acquire(cost=3, now=0.0) == pytest.approx(2.0)
+    assert bucket.try_acquire(cost=1, now=0.0) == 0.0
+
+    empty = TokenBucket(rate=0.0, capacity=1)
+    empty.try_acquire()
+    assert empty.try_acquire() == math.inf
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_limiter_isolates_clients_and_tiers(clock):
+    limiter = RateLimiter({"llm": (60, 2), "cheap": (600, 10)})
+
+    limiter.check("llm", "1.1.1.1")
+    limiter.check("llm", "1.1.1.1")
+    with pytest.raises(RateLimitExceeded) as exc:
+        limiter.check("llm", "1.1.1.1")
+    assert exc.value.tier == "llm"
+    assert exc.value.retry_after == pytest.approx(1.0)
+    assert exc.value.retry_after_header == "1"
+
+    # Another client and another tier of the same client are unaffected
+    limiter.check("llm", "2.2.2.2")
+    limiter.check("cheap", "1.1.1.1")
+
+    clock[0] += 1.0
+    limiter.check("llm", "1.1.1.1")
+    assert limiter.snapshot()["llm"] == {"per_minute": 60, "burst": 2, "rejected": 1}
+
+
+def test_limiter_charges_the_cost_in_one_go(clock):
+    limiter = RateLimiter({"batch": (60, 20)})
+
+    limiter.check("batch", "client", cost=15)
+    with pytest.raises(RateLimitExceeded) as exc:
+        limiter.check("batch", "client", cost=10)
+    assert exc.value.retry_after == pytest.approx(5.0)
+    limiter.check("batch", "client", cost=5)
+
+    with pytest.raises(KeyError):
+        limiter.check("unknown", "client")
+
+
+def test_limiter_drops_the_least_recently_used_client(clock):
+    limiter = RateLimiter({"llm": (60, 1)}, max_clients=2)
+
+    limiter.check("llm", "a")
+    limiter.check("llm", "b")
+    limiter.check("llm", "c")  # drops "a"
+    assert len(limiter._buckets) == 2
+
+    # A dropped client starts again with a full bucket; a kept one is still empty
+    limiter.check("llm", "a")
+    with pytest.raises(RateLimitExceeded):
+        limiter.check("llm", "c")
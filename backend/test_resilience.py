@@ -0,0 +1,114 @@
+"""
+Circuit breaker: what counts as a failure, opening, half-open probing and
+adaptive timeouts.
+"""
+
+import pytest
+
+from backend import resilience
+from backend.resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, is_upstream_failure
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class FakeHTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.response = FakeResponse(status_code)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+    return now
+
+
+def fail(breaker, exc):
+    with pytest.raises(type(exc)):
+        with breaker.protect():
+            raise exc
+
+
+@pytest.mark.parametrize(
+    "exc, counts",
+    [
+        (FakeHTTPError(500), True),
+        (FakeHTTPError(503), True),
+        (FakeHTTPError(429), True),
+        (FakeHTTPError(408), True),
+        (FakeHTTPError(400), False),
+        (FakeHTTPError(404), False),
+        (ConnectionError("reset"), True),
+        (TimeoutError(), True),
+    ],
+)
+def test_is_upstream_failure(exc, counts):
+    assert is_upstream_failure(exc) is counts
+
+
+def test_client_errors_pass_through_without_opening(clock):
+    breaker = CircuitBreaker("test", min_calls=3)
+
+    for _ in range(10):
+        fail(breaker, FakeHTTPError(400))
+
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()["window_failures"] == 0
+
+
+def test_upstream_failures_open_the_circuit_and_fail_fast(clock):
+    breaker = CircuitBreaker("test", min_calls=3, open_seconds=30)
+
+    for _ in range(3):
+        fail(breaker, ConnectionError("reset"))
+
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError) as exc:
+        with breaker.protect():
+            pass
+    assert exc.value.retry_after == pytest.approx(30)
+
+
+def test_half_open_allows_one_probe_and_closes_on_success(clock):
+    breaker = CircuitBreaker("test", min_calls=3, open_seconds=30)
+    for _ in range(3):
+        fail(breaker, FakeHTTPError(502))
+
+    clock[0] += 30
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()  # only one probe at a time
+
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()["window_calls"] == 1
+
+
+def test_a_failed_probe_reopens_the_circuit(clock):
+    breaker = CircuitBreaker("test", min_calls=3, open_seconds=30)
+    for _ in range(3):
+        fail(breaker, TimeoutError())
+    clock[0] += 30
+
+    fail(breaker, TimeoutError())
+
+    assert breaker.state == OPEN
+    assert breaker.retry_after() == pytest.approx(30)
+
+
+def test_timeout_follows_observed_latency_within_bounds(clock):
+    breaker = CircuitBreaker("test", min_calls=3, min_timeout=1.0, max_timeout=15.0, timeout_multiplier=2.0)
+    assert breaker.timeout() == 15.0  # cold start
+
+    for latency in (2.0, 2.0, 3.0):
+        breaker.record_success(latency)
+    assert breaker.timeout() == 6.0
+
+    fast = CircuitBreaker("fast", min_calls=3, min_timeout=1.0)
+    for _ in range(3):
+        fast.record_success(0.01)
+    assert fast.timeout() == 1.0
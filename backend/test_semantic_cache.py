@@ -0,0 +1,155 @@
+"""
+Semantic cache: exact and rephrased hits, the entity guard, expiry,
+eviction and false-hit feedback.
+"""
+
+import pytest
+
+from backend import semantic_cache
+from backend.knowledge_base import HashingEmbedder
+from backend.semantic_cache import SEARCH_SYNONYMS, SemanticCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(semantic_cache.time, "time", lambda: now[0])
+    return now
+
+
+def make_cache(**options):
+    options.setdefault("threshold", 0.9)
+    options.setdefault("audit_rate", 0.0)
+    return SemanticCache(HashingEmbedder(bigrams=True, binary=True, synonyms=SEARCH_SYNONYMS), **options)
+
+
+def test_exact_hit_ignores_case_whitespace_and_trailing_punctuation(clock):
+    cache = make_cache()
+    cache.store("Best RWA yields", "answer")
+
+    hit = cache.lookup("  best   rwa YIELDS? ")
+
+    assert hit.exact and hit.answer == "answer" and hit.similarity == 1.0
+    assert cache.stats()["exact_hits"] == 1
+
+
+def test_rephrased_prompt_is_a_semantic_hit(clock):
+    cache = make_cache()
+    cache.store("best real estate rwa investments", "real estate answer")
+
+    hit = cache.lookup("top real estate RWA investment options")
+
+    assert hit is not None and not hit.exact
+    assert hit.answer == "real estate answer"
+    assert hit.cached_prompt == "best real estate rwa investments"
+    assert hit.similarity >= 0.9
+    assert cache.lookup("how do I bridge usdc to polygon") is None
+
+
+@pytest.mark.parametrize(
+    "stored, asked",
+    [
+        ("current yield on Maple", "current yield on Centrifuge"),
+        ("treasury yield above 5%", "treasury yield above 4%"),
+    ],
+)
+def test_similar_prompts_about_other_entities_or_numbers_miss(clock, stored, asked):
+    # Even with a permissive threshold the key terms must match
+    cache = make_cache(threshold=0.5)
+    cache.store(stored, "answer")
+
+    assert cache.lookup(asked) is None
+    assert cache.stats()["key_term_mismatches"] == 1
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = make_cache(ttl=60)
+    cache.store("ondo usdy yield", "answer")
+    cache.store("maple lending pools", "answer")
+
+    clock[0] += 59
+    assert cache.lookup("ondo usdy yield") is not None
+    clock[0] += 2
+    assert cache.lookup("ondo usdy yield") is None
+    # A never-served entry is forgotten; a served answer stays known for feedback
+    assert cache.answer_for("maple lending pools") is None
+    assert cache.answer_for("ondo usdy yield") == "answer"
+    assert cache.stats()["size"] == 0
+
+
+def test_a_full_cache_replaces_the_least_recently_used_entry(clock):
+    cache = make_cache(max_entries=2)
+    cache.store("ondo usdy yield", "ondo")
+    clock[0] += 1
+    cache.store("maple lending pools", "maple")
+    clock[0] += 1
+    cache.lookup("ondo usdy yield")
+    clock[0] += 1
+
+    cache.store("realt rental properties", "realt")
+
+    assert cache.lookup("maple lending pools") is None
+    assert cache.lookup("ondo usdy yield").answer == "ondo"
+    assert cache.lookup("realt rental properties").answer == "realt"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_negative_feedback_evicts_the_entry_that_served_the_prompt(clock):
+    cache = make_cache()
+    cache.store("best real estate rwa investments", "answer")
+    cache.lookup("top real estate RWA investment options")
+
+    assert cache.report_feedback("top real estate rwa investment options", helpful=False)
+
+    assert cache.lookup("best real estate rwa investments") is None
+    assert cache.stats()["feedback_false_hits"] == 1
+    # Feedback is matched once per served answer
+    assert not cache.report_feedback("top real estate rwa investment options", helpful=False)
+
+
+def test_negative_feedback_leaves_a_reused_slot_alone(clock):
+    cache = make_cache(max_entries=1)
+    cache.store("ondo usdy yield", "ondo")
+    cache.lookup("ondo usdy yield")
+    clock[0] += 1
+    cache.store("maple lending pools", "maple")  # reuses the only slot
+
+    assert cache.report_feedback("ondo usdy yield", helpful=False)
+
+    assert cache.lookup("maple lending pools").answer == "maple"
+    assert cache.stats()["feedback_false_hits"] == 1
+
+
+def test_helpful_and_unmatched_feedback_keep_entries(clock):
+    cache = make_cache()
+    cache.store("ondo usdy yield", "answer")
+    cache.lookup("ondo usdy yield")
+
+    assert cache.report_feedback("ondo usdy yield", helpful=True)
+    assert not cache.report_feedback("never asked", helpful=False)
+    assert cache.lookup("ondo usdy yield") is not None
+    assert cache.stats()["feedback_false_hits"] == 0
+
+
+def test_answer_for_returns_the_served_answer_even_after_the_slot_is_reused(clock):
+    cache = make_cache(max_entries=1)
+    cache.store("ondo usdy yield", "ondo")
+    cache.lookup("ondo usdy yield")
+    cache.store("maple lending pools", "maple")
+
+    assert cache.answer_for("Ondo USDY yield?") == "ondo"
+    assert cache.answer_for("maple lending pools") == "maple"
+    assert cache.answer_for("never asked") is None
+
+
+def test_a_failed_audit_evicts_the_semantic_hit(clock):
+    cache = make_cache()
+    cache.store("best real estate rwa investments", "realt detroit rental homes yield ten percent")
+    hit = cache.lookup("top real estate RWA investment options")
+
+    assert not cache.record_audit(hit, "realt detroit rental homes yield ten percent")
+    assert cache.record_audit(hit, "tokenized treasury bills from ondo and blackrock")
+
+    assert cache.lookup("best real estate rwa investments") is None
+    stats = cache.stats()
+    assert stats["audits"] == 2 and stats["audit_false_hits"] == 1
@@ -0,0 +1,134 @@
+"""
+Contract tests run against every transaction store backend.
+
+The Redis backend runs against ``fakeredis`` as an in-process stand-in and
+is skipped when it is not installed.
+"""
+
+import pytest
+
+from backend.state import InMemoryTransactionStore, RedisTransactionStore, SQLiteTransactionStore
+
+ALICE = "0xAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA"
+BOB = "0xbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbb"
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        store = InMemoryTransactionStore()
+    elif request.param == "sqlite":
+        store = SQLiteTransactionStore(str(tmp_path / "state.db"))
+    else:
+        fakeredis = pytest.importorskip("fakeredis")
+        store = RedisTransactionStore(client=fakeredis.FakeRedis(), prefix="test")
+    yield store
+    store.close()
+
+
+def investment(user=ALICE, amount="100", status="pending", **fields):
+    return {"user_address": user, "amount": amount, "asset_id": "RE-001", "status": status, **fields}
+
+
+def test_add_assigns_ids_and_keeps_insertion_order(store):
+    first = store.add(investment(amount="1"))
+    second = store.add(investment(user=BOB, amount="2"))
+    third = store.add(investment(amount="3", id="fixed-id"))
+
+    assert first["id"] and first["id"] != second["id"]
+    assert third["id"] == "fixed-id"
+    assert [tx["amount"] for tx in store.list_transactions()] == ["1", "2", "3"]
+    # User filter is case-insensitive
+    assert [tx["amount"] for tx in store.list_transactions(ALICE.lower())] == ["1", "3"]
+
+
+def test_attach_tx_hash_by_payment_id_or_latest_unhashed_pending(store):
+    store.add(investment(amount="1"))
+    store.add(investment(amount="2", x402_payment_id="x402_1"))
+    store.add(investment(amount="3"))
+
+    by_payment = store.attach_tx_hash("0xaaa", x402_payment_id="x402_1")
+    assert by_payment["amount"] == "2" and by_payment["tx_hash"] == "0xaaa"
+
+    latest = store.attach_tx_hash("0xbbb")
+    assert latest["amount"] == "3"
+    assert store.attach_tx_hash("0xccc")["amount"] == "1"
+    assert store.attach_tx_hash("0xddd") is None
+    assert store.attach_tx_hash("0xeee", x402_payment_id="unknown") is None
+
+
+def test_update_status_changes_every_record_with_the_hash(store):
+    store.add(investment(amount="1", tx_hash="0xdup"))
+    store.add(investment(amount="2", tx_hash="0xdup"))
+    store.add(investment(amount="3", tx_hash="0xother"))
+
+    record = store.update_status("0xdup", "confirmed", "2024-01-01T00:00:00")
+
+    assert record["amount"] == "1"  # the oldest record is returned
+    statuses = {tx["amount"]: (tx["status"], tx["confirmed_at"]) for tx in store.list_transactions()}
+    assert statuses["1"] == ("confirmed", "2024-01-01T00:00:00")
+    assert statuses["2"] == ("confirmed", "2024-01-01T00:00:00")
+    assert statuses["3"][0] == "pending"
+    assert store.update_status("0xmissing", "confirmed") is None
+
+
+def test_update_statuses_returns_updated_records_in_insertion_order(store):
+    store.add(investment(amount="1", tx_hash="0x1"))
+    store.add(investment(amount="2", tx_hash="0x2"))
+    store.add(investment(amount="3", tx_hash="0x1"))
+
+    updated = store.update_statuses({"0x2": "failed", "0x1": "confirmed", "0xmissing": "confirmed"})
+
+    assert [(tx["amount"], tx["status"]) for tx in updated] == [("1", "confirmed"), ("2", "failed"), ("3", "confirmed")]
+    assert store.update_statuses({}) == []
+
+
+def test_pending_index_follows_status_both_ways(store):
+    store.add(investment(tx_hash="0xsubmitted"))
+    store.add(investment())  # no hash yet: not pollable
+    store.add(investment(tx_hash="0xdone", status="confirmed"))
+    assert store.pending_tx_hashes() == ["0xsubmitted"]
+
+    store.attach_tx_hash("0xattached")
+    assert sorted(store.pending_tx_hashes()) == ["0xattached", "0xsubmitted"]
+
+    store.update_status("0xsubmitted", "confirmed")
+    assert store.pending_tx_hashes() == ["0xattached"]
+
+    # A status moved back to pending is polled again
+    store.update_status("0xsubmitted", "pending")
+    store.update_statuses({"0xdone": "pending"})
+    assert sorted(store.pending_tx_hashes()) == ["0xattached", "0xdone", "0xsubmitted"]
+
+
+def test_iter_transactions_pages_through_everything(store):
+    for index in range(5):
+        store.add(investment(user=ALICE if index % 2 == 0 else BOB, amount=str(index)))
+
+    pages = list(store.iter_transactions(page_size=2))
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [tx["amount"] for page in pages for tx in page] == ["0", "1", "2", "3", "4"]
+
+    alice = [tx["amount"] for page in store.iter_transactions(ALICE, page_size=2) for tx in page]
+    assert alice == ["0", "2", "4"]
+    assert list(store.iter_transactions("0xnobody")) == []
+
+
+def test_portfolio_counters_follow_adds_and_status_changes(store):
+    store.add(investment(amount="100", tx_hash="0x1"))
+    store.add(investment(amount="50.5", tx_hash="0x2"))
+    store.add(investment(amount="unknown"))
+    store.add(investment(user=BOB, amount="7"))
+
+    store.update_statuses({"0x1": "confirmed", "0x2": "failed"})
+    store.update_status("0x1", "confirmed")  # unchanged status moves nothing
+
+    counters = store.portfolio_counters(ALICE.lower())
+    assert counters["*|count"] == 3
+    assert counters["*|invested_units"] == 150_500_000
+    assert counters["*|confirmed_units"] == 100_000_000
+    assert counters["*|failed_units"] == 50_500_000
+    assert counters.get("*|pending_units", 0) == 0
+    assert counters["*|pending_count"] == 1
+    assert counters["*|unknown_amount_count"] == 1
+    assert store.portfolio_counters(BOB)["*|pending_units"] == 7_000_000
@@ -0,0 +1,84 @@
+"""
+Tiered APY/price history: bucket means, ring-buffer wrap-around and tier
+selection.
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from backend.timeseries import AssetTimeSeries
+
+T0 = 1_700_006_400.0  # midnight UTC, so every tier's buckets start here
+TIERS = (("minute", 60, 10), ("hour", 3600, 10))
+
+
+def minute(i):
+    return T0 + 60 * i
+
+
+@pytest.fixture
+def series():
+    """Asset A sampled every minute for 30 minutes (APY = minute index); B joins at minute 25."""
+    series = AssetTimeSeries(TIERS)
+    for i in range(30):
+        keys = ["A", "B"] if i >= 25 else ["A"]
+        series.append(minute(i), keys, np.full(len(keys), float(i)), np.full(len(keys), 50.0))
+    return series
+
+
+def test_samples_in_one_bucket_are_averaged():
+    series = AssetTimeSeries(TIERS)
+    assert series.append(T0, ["A"], np.array([4.0]), np.array([10.0]))
+    assert series.append(T0 + 10, ["A"], np.array([6.0]), np.array([20.0]))
+    # Samples must move forward in time
+    assert not series.append(T0 + 10, ["A"], np.array([99.0]), np.array([99.0]))
+
+    history = series.history("A", T0, T0 + 60, resolution="minute")
+
+    assert history["points"] == [
+        {"timestamp": datetime.fromtimestamp(T0).isoformat(), "yield_apy": 5.0, "token_price": 15.0, "samples": 2}
+    ]
+
+
+def test_a_full_tier_keeps_only_its_newest_buckets(series):
+    history = series.history("A", T0, minute(29), resolution="minute")
+
+    assert [point["yield_apy"] for point in history["points"]] == [float(i) for i in range(20, 30)]
+    assert series.snapshot()["tiers"]["minute"] == {"buckets": 10, "capacity": 10}
+
+
+def test_a_recent_range_reads_the_finest_tier(series):
+    history = series.history("A", minute(25), minute(29))
+
+    assert history["resolution"] == "minute"
+    assert len(history["points"]) == 5
+
+
+def test_a_range_the_fine_tier_no_longer_holds_reads_a_coarser_tier(series):
+    history = series.history("A", T0, minute(29))
+
+    assert history["resolution"] == "hour"
+    assert history["points"] == [
+        {"timestamp": datetime.fromtimestamp(T0).isoformat(), "yield_apy": 14.5, "token_price": 50.0, "samples": 30}
+    ]
+
+
+def test_the_point_budget_moves_to_a_coarser_tier(series):
+    assert series.history("A", minute(20), minute(29))["resolution"] == "minute"
+    assert series.history("A", minute(20), minute(29), max_points=3)["resolution"] == "hour"
+
+
+def test_a_short_history_is_covered_by_the_fine_tier(series):
+    # B only exists since minute 25, which the minute tier still holds
+    history = series.history("B", T0, minute(29))
+
+    assert history["resolution"] == "minute"
+    assert [point["yield_apy"] for point in history["points"]] == [25.0, 26.0, 27.0, 28.0, 29.0]
+
+
+def test_unknown_assets_and_resolutions(series):
+    assert series.history("missing", T0, minute(29)) is None
+    with pytest.raises(ValueError):
+        series.history("A", T0, minute(29), resolution="second")
@@ -0,0 +1,117 @@
+"""
+x402 payment intents: idempotency scoping, conflicts and analytics.
+"""
+
+import pytest
+
+from backend import coalesce
+from backend.x402_integration import (
+    AMOY_USDC_ADDRESS,
+    IdempotencyConflictError,
+    PaymentAnalytics,
+    X402PaymentProcessor,
+)
+
+ALICE = "0xAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA"
+BOB = "0xbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbb"
+
+
+@pytest.fixture
+def processor():
+    return X402PaymentProcessor("amoy", idempotency_ttl=60, analytics=PaymentAnalytics())
+
+
+def create(processor, amount="10", user=ALICE, key="key-1", **options):
+    options.setdefault("metadata", {"asset_id": "RE-001"})
+    return processor.create_payment_intent(
+        amount, AMOY_USDC_ADDRESS, user, idempotency_key=key, user_address=user, **options
+    )
+
+
+def test_a_repeated_key_replays_the_original_intent(processor):
+    first = create(processor)
+    # The same amount written differently is the same payment
+    replay = create(processor, amount="10.00")
+
+    assert replay["payment_id"] == first["payment_id"]
+    assert replay["idempotent_replay"] and "idempotent_replay" not in first
+    assert create(processor, key="key-2")["payment_id"] != first["payment_id"]
+    assert create(processor, key=None)["payment_id"] != first["payment_id"]
+
+
+def test_keys_are_scoped_to_the_paying_user(processor):
+    alice = create(processor, user=ALICE)
+    bob = create(processor, user=BOB)
+
+    assert bob["payment_id"] != alice["payment_id"]
+    assert not bob.get("idempotent_replay")
+    # The owner's address is compared case-insensitively
+    assert create(processor, user=ALICE.lower())["payment_id"] == alice["payment_id"]
+
+
+@pytest.mark.parametrize(
+    "changes",
+    [
+        {"amount": "11"},
+        {"metadata": {"asset_id": "RE-002"}},
+        {"chain_id": 137},
+    ],
+)
+def test_reusing_a_key_for_a_different_payment_conflicts(processor, changes):
+    create(processor, chain_id=80002)
+
+    with pytest.raises(IdempotencyConflictError):
+        create(processor, **{"chain_id": 80002, **changes})
+
+
+def test_keys_expire_after_the_ttl(processor, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(coalesce.time, "monotonic", lambda: now[0])
+    first = create(processor)
+
+    now[0] += 61
+
+    assert create(processor)["payment_id"] != first["payment_id"]
+    # Once expired, the key may be used for a different payment
+    create(processor, key="key-3")
+    now[0] += 61
+    assert create(processor, amount="12", key="key-3")["success"]
+
+
+def test_batch_creates_repeated_keys_once_and_reports_conflicts(processor):
+    intent = {
+        "amount": "10",
+        "token_address": AMOY_USDC_ADDRESS,
+        "recipient": ALICE,
+        "metadata": {"asset_id": "RE-001"},
+        "idempotency_key": "batch-key",
+        "user_address": ALICE,
+    }
+
+    results = processor.create_payment_intents([intent, dict(intent), {**intent, "amount": "20"}])
+
+    assert results[0]["success"] and results[1]["payment_id"] == results[0]["payment_id"]
+    assert results[1]["idempotent_replay"]
+    assert not results[2]["success"] and results[2]["idempotency_conflict"]
+
+
+def test_process_agent_payment_raises_conflicts_instead_of_falling_back(processor):
+    first = processor.process_agent_payment("invest 10", "10", "RE-001", ALICE, idempotency_key="agent-key")
+    replay = processor.process_agent_payment("invest 10", "10", "RE-001", ALICE, idempotency_key="agent-key")
+
+    assert first["status"] == "processed" and not first["idempotent_replay"]
+    assert replay["x402_payment_id"] == first["x402_payment_id"] and replay["idempotent_replay"]
+    with pytest.raises(IdempotencyConflictError):
+        processor.process_agent_payment("invest 10", "10", "RE-001", ALICE, idempotency_key="agent-key", chain_id=137)
+
+
+def test_simulated_intents_are_counted_but_not_timed(processor):
+    result = create(processor)
+    create(processor)  # a replay creates nothing
+
+    summary = processor.analytics.summary(window_seconds=60)
+
+    assert summary["simulated_intents"] == 1
+    assert summary["intent_success_rate"] == 1.0
+    assert processor.analytics.payment(result["payment_id"])["intent_seconds"] is None
+    assert summary["intent_creation"] == {"count": 0}
@@ -0,0 +1,107 @@
+"""
+Pro-rata yield distribution: exact integer splits and dust handling.
+"""
+
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+from backend.yield_engine import aggregate_stakes, compute_pro_rata_payouts, distribute_yield, payouts_to_records
+
+
+def exact_shares(stakes, total_amount):
+    total_stake = sum(stakes)
+    return [Fraction(total_amount * stake, total_stake) for stake in stakes]
+
+
+def test_aggregate_stakes_sums_per_investor_case_insensitively():
+    investors, stakes = aggregate_stakes(["0xA", "0xb", "0xa", "0xB", "0xc"], [1, "2", 3, 4, 5])
+
+    assert investors.tolist() == ["0xa", "0xb", "0xc"]
+    assert stakes.tolist() == [4, 6, 5]
+
+
+def test_aggregate_stakes_rejects_bad_input():
+    with pytest.raises(ValueError):
+        aggregate_stakes(["0xa"], [1, 2])
+    with pytest.raises(ValueError):
+        aggregate_stakes(["0xa"], [-1])
+
+
+def test_largest_remainder_hands_dust_to_the_largest_fractions():
+    # 100 over 1:1:1 -> 33.33 each; the one unit of dust goes to the lowest index on a full tie
+    payouts, dust = compute_pro_rata_payouts(np.array([1, 1, 1]), 100)
+    assert payouts.tolist() == [34, 33, 33]
+    assert dust == 0
+
+    # 10 over 3:3:4 -> 3.0, 3.0, 4.0 exactly; nothing to hand out
+    payouts, dust = compute_pro_rata_payouts(np.array([3, 3, 4]), 10)
+    assert payouts.tolist() == [3, 3, 4]
+
+    # 8 over 1:2:4 -> 1.14, 2.29, 4.57; the largest remainder is the last one
+    payouts, dust = compute_pro_rata_payouts(np.array([1, 2, 4]), 8)
+    assert payouts.tolist() == [1, 2, 5]
+
+
+def test_retain_keeps_the_dust_in_the_pool():
+    payouts, dust = compute_pro_rata_payouts(np.array([1, 1, 1]), 100, dust_policy="retain")
+
+    assert payouts.tolist() == [33, 33, 33]
+    assert dust == 1
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_payouts_sum_exactly_and_stay_within_one_unit_of_the_exact_share(seed):
+    rng = np.random.default_rng(seed)
+    stakes = rng.integers(1, 10**9, size=257)
+    total_amount = int(rng.integers(1, 10**9))
+
+    payouts, dust = compute_pro_rata_payouts(stakes, total_amount)
+
+    assert dust == 0
+    assert int(payouts.sum()) == total_amount
+    for payout, share in zip(payouts.tolist(), exact_shares(stakes.tolist(), total_amount)):
+        assert share - 1 < payout < share + 1
+
+
+def test_wei_sized_amounts_use_exact_integers():
+    # Products overflow int64, so the object-array path must give the same exact result
+    stakes = [10**24 + 1, 2 * 10**24, 3 * 10**24 - 1]
+    total_amount = 10**21 + 7
+
+    result = distribute_yield(
+        [{"investor": f"0x{i}", "amount": str(stake)} for i, stake in enumerate(stakes)],
+        str(total_amount),
+    )
+
+    payouts = [int(p) for p in result["payouts"]]
+    assert sum(payouts) == total_amount == result["distributed"]
+    assert result["total_stake"] == sum(stakes)
+    for payout, share in zip(payouts, exact_shares(stakes, total_amount)):
+        assert share - 1 < payout < share + 1
+
+
+def test_zero_stake_and_empty_inputs_distribute_nothing():
+    payouts, dust = compute_pro_rata_payouts(np.array([0, 0]), 50)
+    assert payouts.tolist() == [0, 0] and dust == 50
+
+    result = distribute_yield([], 50)
+    assert result["distributed"] == 0 and result["dust"] == 50
+
+    with pytest.raises(ValueError):
+        compute_pro_rata_payouts(np.array([1]), 10, dust_policy="round")
+    with pytest.raises(ValueError):
+        compute_pro_rata_payouts(np.array([1]), -1)
+
+
+def test_payouts_to_records_serializes_amounts_as_strings():
+    result = distribute_yield([{"investor": "0xA", "amount": 1}, {"investor": "0xB", "amount": 3}], 10**20)
+
+    records = payouts_to_records(result)
+
+    assert records == [
+        {"investor": "0xa", "stake": "1", "payout": str(25 * 10**18)},
+        {"investor": "0xb", "stake": "3", "payout": str(75 * 10**18)},
+    ]
+    assert payouts_to_records(result, limit=1) == records[:1]
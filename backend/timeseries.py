@@ -0,0 +1,247 @@
+"""
+Per-asset APY and token price history.
+
+Each catalog refresh used to replace the previous one, so only the latest
+``yield_apy`` and ``token_price`` of an asset were ever known. Every refresh
+is now appended to ``AssetTimeSeries``, which keeps the history at three
+resolutions (tiers):
+
+- minute: one bucket per minute
+- hour: one bucket per hour
+- day: one bucket per day
+
+A tier is a ring buffer of buckets. Each bucket is one row of a
+(bucket x asset) float32 matrix holding the mean APY and mean price of the
+samples that fell into it. Appending a refresh updates the current bucket
+of every tier with one vectorized operation across all assets, so
+downsampling happens as data arrives. When a tier is full its oldest bucket
+is overwritten. Reading a chart range picks the finest tier that covers the
+range within ``max_points`` and slices one asset's column. Raw samples are
+never scanned.
+
+Assets are tracked by a stable key (the RealT token symbol), not by their
+row in the catalog, because rows can move between refreshes. The history is
+process-local and starts empty on restart.
+"""
+
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# (tier name, bucket width in seconds, buckets kept)
+DEFAULT_TIERS = (
+    ("minute", 60, 720),
+    ("hour", 3600, 720),
+    ("day", 86400, 730),
+)
+
+# Chart ranges accepted by /assets/{id}/history
+HISTORY_RANGES = {
+    "1d": 86400,
+    "7d": 7 * 86400,
+    "30d": 30 * 86400,
+    "90d": 90 * 86400,
+    "1y": 365 * 86400,
+    "all": None,
+}
+
+_INITIAL_ROWS = 16
+_INITIAL_ASSETS = 256
+
+
+class _Tier:
+    """
+    Ring buffer of fixed-width buckets for all assets at one resolution.
+
+    Rows and asset columns are allocated as they are needed, so memory grows
+    with the data actually held, up to ``capacity`` rows.
+    """
+
+    def __init__(self, name: str, width: int, capacity: int):
+        self.name = name
+        self.width = width
+        self.capacity = capacity
+        self.times = np.zeros(0, dtype=np.float64)  # bucket start, unix seconds
+        self.apy = np.zeros((0, 0), dtype=np.float32)
+        self.price = np.zeros((0, 0), dtype=np.float32)
+        self.counts = np.zeros((0, 0), dtype=np.uint16)
+        self.head = -1
+        self.filled = 0
+
+    def _grow(self, rows: int, assets: int) -> None:
+        old_rows, old_assets = self.apy.shape
+        if rows <= old_rows and assets <= old_assets:
+            return
+        rows, assets = max(rows, old_rows), max(assets, old_assets)
+        # Rows are only added before the ring wraps, so existing rows keep their positions
+        self.times = np.concatenate([self.times, np.zeros(rows - old_rows)])
+        for name, dtype in (("apy", np.float32), ("price", np.float32), ("counts", np.uint16)):
+            grown = np.zeros((rows, assets), dtype=dtype)
+            grown[:old_rows, :old_assets] = getattr(self, name)
+            setattr(self, name, grown)
+
+    def ensure_assets(self, assets: int) -> None:
+        if assets > self.apy.shape[1]:
+            self._grow(self.apy.shape[0], max(assets, 2 * self.apy.shape[1], _INITIAL_ASSETS))
+
+    def add(self, timestamp: float, columns: np.ndarray, apy: np.ndarray, price: np.ndarray) -> None:
+        bucket = timestamp - timestamp % self.width
+        if self.filled and bucket < self.times[self.head]:
+            return  # older than the current bucket; already downsampled past it
+        if not self.filled or bucket > self.times[self.head]:
+            rows = self.apy.shape[0]
+            if self.head + 1 >= rows and rows < self.capacity:
+                self._grow(min(self.capacity, max(2 * rows, _INITIAL_ROWS)), self.apy.shape[1])
+            self.head = (self.head + 1) % self.apy.shape[0]
+            self.times[self.head] = bucket
+            self.counts[self.head] = 0
+            self.filled = min(self.filled + 1, self.apy.shape[0])
+
+        # Running mean of the samples in this bucket
+        counts = self.counts[self.head, columns].astype(np.float32) + 1
+        for matrix, values in ((self.apy, apy), (self.price, price)):
+            current = matrix[self.head, columns]
+            matrix[self.head, columns] = np.where(counts == 1, values, current + (values - current) / counts)
+        self.counts[self.head, columns] = np.minimum(counts, np.iinfo(np.uint16).max)
+
+    def order(self) -> np.ndarray:
+        """Row indices from oldest to newest bucket."""
+        return (self.head - self.filled + 1 + np.arange(self.filled)) % max(1, self.apy.shape[0])
+
+    def oldest(self) -> Optional[float]:
+        return float(self.times[self.order()[0]]) if self.filled else None
+
+    def rows_between(self, start: float, end: float) -> np.ndarray:
+        rows = self.order()
+        times = self.times[rows]
+        return rows[(times >= start - start % self.width) & (times <= end)]
+
+    def nbytes(self) -> int:
+        return self.times.nbytes + self.apy.nbytes + self.price.nbytes + self.counts.nbytes
+
+
+class AssetTimeSeries:
+    """
+    Downsampled APY/price history for every catalog asset.
+
+    Args:
+        tiers: (name, bucket width in seconds, buckets kept), finest first
+    """
+
+    def __init__(self, tiers: Sequence[Tuple[str, int, int]] = DEFAULT_TIERS):
+        self.tiers = [_Tier(name, width, capacity) for name, width, capacity in tiers]
+        self._columns: Dict[str, int] = {}
+        self._first_seen: List[float] = []  # first sample time per column
+        self._lock = threading.Lock()
+        self.last_timestamp: Optional[float] = None
+        self.samples = 0
+
+    def append(self, timestamp: float, keys: Sequence[str], apy: np.ndarray, price: np.ndarray) -> bool:
+        """
+        Add one sample per asset taken at ``timestamp``.
+
+        Returns:
+            False if the sample is not newer than the last one appended (it is ignored)
+        """
+        with self._lock:
+            if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+                return False
+            columns = np.empty(len(keys), dtype=np.int64)
+            for i, key in enumerate(keys):
+                column = self._columns.get(key)
+                if column is None:
+                    column = self._columns[key] = len(self._columns)
+                    self._first_seen.append(timestamp)
+                columns[i] = column
+            apy = np.asarray(apy, dtype=np.float32)
+            price = np.asarray(price, dtype=np.float32)
+            for tier in self.tiers:
+                tier.ensure_assets(len(self._columns))
+                tier.add(timestamp, columns, apy, price)
+            self.last_timestamp = timestamp
+            self.samples += 1
+            return True
+
+    def record_catalog(self, catalog: Any) -> bool:
+        """Append a RealTCatalog's APY and token price columns, timed at its fetch time."""
+        try:
+            timestamp = datetime.fromisoformat(catalog.fetched_at).timestamp()
+        except (TypeError, ValueError):
+            timestamp = datetime.now().timestamp()
+        return self.append(timestamp, catalog.stable_keys(), catalog.columns["apy"], catalog.columns["token_price"])
+
+    def _pick_tier(self, column: int, start: float, end: float, max_points: int) -> _Tier:
+        with_data = [tier for tier in self.tiers if tier.filled]
+        fitting = [tier for tier in with_data if len(tier.rows_between(start, end)) <= max_points]
+        # A tier covers the range if it still holds everything the asset has in it;
+        # a short history is covered by fine tiers even when the range is long
+        covered_from = max(start, self._first_seen[column])
+        for tier in fitting:
+            if tier.oldest() <= covered_from:
+                return tier
+        # Nothing holds the whole range within budget: the coarsest fitting tier reaches back furthest
+        return fitting[-1] if fitting else with_data[-1]
+
+    def history(
+        self,
+        key: str,
+        start: float,
+        end: float,
+        resolution: Optional[str] = None,
+        max_points: int = 500,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Chart points for one asset.
+
+        Args:
+            key: Stable asset key
+            start / end: Range in unix seconds
+            resolution: Tier name to force; picked automatically when None
+            max_points: Point budget used when picking a tier
+
+        Returns:
+            {"resolution", "points": [{"timestamp", "yield_apy", "token_price", "samples"}]},
+            or None if the asset has no history
+
+        Raises:
+            ValueError: If ``resolution`` is not a tier name
+        """
+        with self._lock:
+            column = self._columns.get(key)
+            if column is None or self.last_timestamp is None:
+                return None
+            if resolution is None:
+                tier = self._pick_tier(column, start, end, max_points)
+            else:
+                tier = next((t for t in self.tiers if t.name == resolution), None)
+                if tier is None:
+                    raise ValueError(f"Unknown resolution '{resolution}' (expected one of {', '.join(t.name for t in self.tiers)})")
+            rows = tier.rows_between(start, end)
+            rows = rows[tier.counts[rows, column] > 0] if len(rows) else rows
+            times = tier.times[rows].tolist()
+            apy = tier.apy[rows, column].tolist()
+            price = tier.price[rows, column].tolist()
+            counts = tier.counts[rows, column].tolist()
+
+        points: List[Dict[str, Any]] = [
+            {
+                "timestamp": datetime.fromtimestamp(t).isoformat(),
+                "yield_apy": round(a, 2),
+                "token_price": round(p, 2),
+                "samples": c,
+            }
+            for t, a, p, c in zip(times, apy, price, counts)
+        ]
+        return {"resolution": tier.name, "points": points}
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "assets": len(self._columns),
+                "samples": self.samples,
+                "last_sample": datetime.fromtimestamp(self.last_timestamp).isoformat() if self.last_timestamp else None,
+                "tiers": {tier.name: {"buckets": tier.filled, "capacity": tier.capacity} for tier in self.tiers},
+                "memory_bytes": sum(tier.nbytes() for tier in self.tiers),
+            }
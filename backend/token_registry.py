@@ -0,0 +1,196 @@
+"""
+Chain and token registry loaded from configuration.
+
+Supported chains and their token addresses used to be hardcoded in an
+if/elif chain in ``agent.tokens_for_chain``, which silently fell back to
+Polygon for any chain it did not know. They now live in ``tokens.json``
+(override the path with ``TOKEN_REGISTRY_PATH``):
+
+    {
+      "default_chain": 80002,
+      "chains": {
+        "137": {
+          "name": "Polygon",
+          "native": "POL",
+          "zerox_url": "https://polygon.api.0x.org/swap/v1/quote",
+          "testnet": false,
+          "tokens": {"USDC": {"address": "0x...", "decimals": 6}, ...}
+        }
+      }
+    }
+
+``native`` is the gas token's symbol; ``wrapped_native`` names the listed
+token that trades 1:1 with it (WETH on ETH-gas chains), if any.
+
+Lookups are dictionary reads: by chain id, by (chain id, symbol) and by
+(chain id, address), so adding chains or tokens does not slow them down.
+Unknown chains and tokens raise instead of being replaced by a default.
+"""
+
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_REGISTRY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tokens.json")
+
+
+class UnsupportedChainError(ValueError):
+    """Raised for a chain id that is not in the registry."""
+
+
+class UnknownTokenError(ValueError):
+    """Raised for a token symbol or address that is not registered on a chain."""
+
+
+@dataclass(frozen=True)
+class Token:
+    chain_id: int
+    symbol: str
+    address: str
+    decimals: int
+
+    def to_units(self, amount: Decimal) -> int:
+        """Human amount -> smallest units."""
+        return int(amount * (10 ** self.decimals))
+
+    def from_units(self, units: Any) -> Decimal:
+        """Smallest units (int or numeric string) -> human amount."""
+        return Decimal(str(units)) / (Decimal(10) ** self.decimals)
+
+
+@dataclass(frozen=True)
+class Chain:
+    chain_id: int
+    name: str
+    zerox_url: Optional[str] = None
+    testnet: bool = False
+    native: str = "ETH"
+    wrapped_native: Optional[str] = None
+    tokens: Dict[str, Token] = field(default_factory=dict)
+
+
+class TokenRegistry:
+    """
+    Indexed chains and tokens.
+
+    Args:
+        chains: Chains to register
+        default_chain: Chain id used when a request does not name one
+    """
+
+    def __init__(self, chains: List[Chain], default_chain: int):
+        self._chains: Dict[int, Chain] = {chain.chain_id: chain for chain in chains}
+        self._by_address: Dict[Tuple[int, str], Token] = {
+            (chain.chain_id, token.address.lower()): token for chain in chains for token in chain.tokens.values()
+        }
+        if default_chain not in self._chains:
+            raise UnsupportedChainError(f"Default chain {default_chain} is not configured")
+        self.default_chain = default_chain
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "TokenRegistry":
+        """
+        Build a registry from the parsed ``tokens.json`` structure.
+
+        Raises:
+            ValueError: If an entry is missing a required field
+        """
+        chains = []
+        for chain_key, entry in config.get("chains", {}).items():
+            chain_id = int(chain_key)
+            try:
+                tokens = {
+                    symbol.upper(): Token(chain_id, symbol.upper(), spec["address"], int(spec["decimals"]))
+                    for symbol, spec in entry.get("tokens", {}).items()
+                }
+                chains.append(Chain(
+                    chain_id=chain_id,
+                    name=entry["name"],
+                    zerox_url=entry.get("zerox_url"),
+                    testnet=bool(entry.get("testnet", False)),
+                    native=entry.get("native", "ETH").upper(),
+                    wrapped_native=entry["wrapped_native"].upper() if entry.get("wrapped_native") else None,
+                    tokens=tokens,
+                ))
+            except KeyError as e:
+                raise ValueError(f"Chain {chain_key} in token registry is missing {e}") from e
+        return cls(chains, default_chain=int(config.get("default_chain", 137)))
+
+    @classmethod
+    def load(cls, path: str) -> "TokenRegistry":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_config(json.load(f))
+
+    def chain(self, chain_id: int) -> Chain:
+        """
+        Raises:
+            UnsupportedChainError: If the chain is not registered
+        """
+        chain = self._chains.get(chain_id)
+        if chain is None:
+            raise UnsupportedChainError(f"Unsupported chain {chain_id}")
+        return chain
+
+    def token(self, chain_id: int, asset: str) -> Token:
+        """
+        Resolve a token symbol or address on a chain.
+
+        Raises:
+            UnsupportedChainError: If the chain is not registered
+            UnknownTokenError: If the token is not registered on the chain
+        """
+        chain = self.chain(chain_id)
+        if asset.startswith("0x") and len(asset) == 42:
+            token = self._by_address.get((chain_id, asset.lower()))
+        else:
+            token = chain.tokens.get(asset.upper())
+        if token is None:
+            raise UnknownTokenError(f"Unknown asset '{asset}' for chain {chain_id}")
+        return token
+
+    def chains(self) -> List[Chain]:
+        return list(self._chains.values())
+
+    def chains_with(self, *symbols: str, include_testnets: bool = False) -> List[int]:
+        """Ids of the chains listing every one of ``symbols``, in configuration order."""
+        wanted = [symbol.upper() for symbol in symbols]
+        return [
+            chain.chain_id for chain in self._chains.values()
+            if (include_testnets or not chain.testnet) and all(symbol in chain.tokens for symbol in wanted)
+        ]
+
+    def chain_name(self, chain_id: int) -> str:
+        chain = self._chains.get(chain_id)
+        return chain.name if chain is not None else f"Chain {chain_id}"
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "default_chain": self.default_chain,
+            "chains": {
+                str(chain.chain_id): {"name": chain.name, "testnet": chain.testnet, "native": chain.native, "tokens": sorted(chain.tokens)}
+                for chain in self._chains.values()
+            },
+        }
+
+
+_registry: Optional[TokenRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> TokenRegistry:
+    """
+    Shared registry loaded from TOKEN_REGISTRY_PATH (default: backend/tokens.json) on first use.
+
+    Raises:
+        OSError / ValueError: If the configuration cannot be read
+    """
+    global _registry
+    if _registry is not None:
+        return _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = TokenRegistry.load(os.getenv("TOKEN_REGISTRY_PATH") or DEFAULT_REGISTRY_PATH)
+        return _registry
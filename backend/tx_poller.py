@@ -0,0 +1,135 @@
+"""
+Background confirmation poller for submitted transactions.
+
+Transactions used to change status only when the frontend posted to
+/update-transaction, so abandoned tabs left records pending forever. The
+poller periodically collects every pending ``tx_hash`` from the transaction
+store, looks the receipts up through the batching ``ChainClient`` (so they
+go out as JSON-RPC batch ``eth_getTransactionReceipt`` requests) and
+applies all resulting status changes in one bulk update. Hashes that are
+still unmined are retried with per-hash exponential backoff.
+
+Works against any EVM JSON-RPC endpoint, including a local Hardhat node
+(``TX_POLLER_RPC_URL=http://127.0.0.1:8545``).
+"""
+
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List, Optional
+
+from .chain_client import ChainClient
+from .state import TransactionStore
+
+logger = logging.getLogger(__name__)
+
+# Receipt status field -> transaction record status
+RECEIPT_STATUSES = {"0x1": "confirmed", "0x0": "failed"}
+
+
+class TransactionPoller:
+    """
+    Periodically confirm pending transactions via batched receipt lookups.
+
+    Args:
+        store: Transaction store holding the pending records
+        client: Chain client used for receipt lookups
+        interval: Seconds between polling rounds
+        batch_size: Maximum receipts looked up per round chunk
+        max_backoff: Upper bound in seconds for a single hash's retry delay
+        apply_updates: Callable applying {tx_hash: status} updates; defaults to
+            the store's bulk update
+    """
+
+    def __init__(
+        self,
+        store: TransactionStore,
+        client: ChainClient,
+        interval: float = 15.0,
+        batch_size: int = 50,
+        max_backoff: float = 600.0,
+        apply_updates: Optional[Callable[[Dict[str, str]], object]] = None,
+    ):
+        self.store = store
+        self.client = client
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_backoff = max_backoff
+        self.apply_updates = apply_updates or store.update_statuses
+        # tx_hash -> (next check time, consecutive misses)
+        self._backoff: Dict[str, tuple] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def _due_hashes(self, pending: List[str]) -> List[str]:
+        now = time.monotonic()
+        pending_set = set(pending)
+        # Forget hashes that were confirmed elsewhere (e.g. /update-transaction)
+        for tx_hash in list(self._backoff):
+            if tx_hash not in pending_set:
+                del self._backoff[tx_hash]
+        return [tx_hash for tx_hash in pending if self._backoff.get(tx_hash, (0.0, 0))[0] <= now]
+
+    def _back_off(self, tx_hash: str) -> None:
+        _, misses = self._backoff.get(tx_hash, (0.0, 0))
+        misses += 1
+        delay = min(self.max_backoff, self.interval * (2 ** (misses - 1)))
+        self._backoff[tx_hash] = (time.monotonic() + delay, misses)
+
+    async def poll_once(self) -> Dict[str, str]:
+        """
+        Run one polling round.
+
+        Returns:
+            The {tx_hash: status} updates that were applied
+        """
+        pending = await asyncio.to_thread(self.store.pending_tx_hashes)
+        due = self._due_hashes(pending)
+        updates: Dict[str, str] = {}
+
+        for start in range(0, len(due), self.batch_size):
+            batch = due[start:start + self.batch_size]
+            receipts = await asyncio.gather(
+                *(self.client.get_transaction_receipt(tx_hash) for tx_hash in batch),
+                return_exceptions=True,
+            )
+            failures = sum(1 for receipt in receipts if isinstance(receipt, Exception))
+            if failures:
+                logger.warning(f"Receipt lookup failed for {failures} of {len(batch)} transactions")
+
+            for tx_hash, receipt in zip(batch, receipts):
+                if isinstance(receipt, Exception):
+                    receipt = None
+                status = RECEIPT_STATUSES.get((receipt or {}).get("status"))
+                if status:
+                    updates[tx_hash] = status
+                    self._backoff.pop(tx_hash, None)
+                else:
+                    self._back_off(tx_hash)
+
+        if updates:
+            await asyncio.to_thread(self.apply_updates, updates)
+            logger.info(f"Transaction poller updated {len(updates)} transaction(s)")
+        return updates
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Transaction poller round failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
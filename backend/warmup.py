@@ -0,0 +1,105 @@
+"""
+Startup warm-up and readiness.
+
+The first requests after a deploy used to pay for everything that is set up
+lazily: DNS lookups and TLS handshakes to the upstream APIs, the first
+RealT download, index and numpy code paths that have never run, and the
+LangGraph agent's first invocation. ``Warmup`` runs those steps once, in the
+background, when the app starts. Each step runs concurrently with the
+others and has its own timeout.
+
+``/health`` reports the app as ready only after every step has finished.
+A step that fails or times out does not block readiness. It is reported
+in the snapshot, and its work is done lazily by the first request that
+needs it, as before.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+WarmupStep = Callable[[], Awaitable[Any]]
+
+
+class Warmup:
+    """
+    Named warm-up steps and their outcome.
+
+    Args:
+        steps: {step name: async callable}
+        timeout: Seconds each step may take before it is abandoned
+        enabled: When False, nothing runs and the app is ready immediately
+    """
+
+    def __init__(self, steps: Dict[str, WarmupStep], timeout: float = 30.0, enabled: bool = True):
+        self.steps = steps
+        self.timeout = timeout
+        self.enabled = enabled
+        self.results: Dict[str, Dict[str, Any]] = {name: {"status": "pending"} for name in steps}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return not self.enabled or self.finished_at is not None
+
+    async def _run_step(self, name: str, step: WarmupStep) -> None:
+        self.results[name] = {"status": "running"}
+        start = time.monotonic()
+        try:
+            detail = await asyncio.wait_for(step(), timeout=self.timeout)
+            result: Dict[str, Any] = {"status": "ok"}
+            if detail is not None:
+                result["detail"] = detail
+        except asyncio.TimeoutError:
+            result = {"status": "timeout"}
+        except Exception as e:
+            result = {"status": "failed", "error": str(e)}
+        result["duration_ms"] = round((time.monotonic() - start) * 1000, 1)
+        self.results[name] = result
+        if result["status"] == "ok":
+            logger.info(f"Warm-up step {name} done", extra={"event": "warmup.step", "step": name, **result})
+        else:
+            logger.warning(f"Warm-up step {name} {result['status']}", extra={"event": "warmup.step", "step": name, **result})
+
+    async def run(self) -> None:
+        """Run every step concurrently and mark the app ready."""
+        self.started_at = time.monotonic()
+        try:
+            await asyncio.gather(*(self._run_step(name, step) for name, step in self.steps.items()))
+        finally:
+            self.finished_at = time.monotonic()
+        logger.info(
+            "Warm-up finished",
+            extra={"event": "warmup.finished", "duration_ms": round((self.finished_at - self.started_at) * 1000, 1)},
+        )
+
+    def start(self) -> None:
+        """Start the warm-up in the background (must be called on the event loop)."""
+        if self.enabled and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        duration = None
+        if self.started_at is not None:
+            end = self.finished_at if self.finished_at is not None else time.monotonic()
+            duration = round((end - self.started_at) * 1000, 1)
+        return {
+            "enabled": self.enabled,
+            "ready": self.ready,
+            "duration_ms": duration,
+            "steps": {name: dict(result) for name, result in self.results.items()},
+        }
@@ -0,0 +1,177 @@
+"""
+Pro-rata yield distribution for MockRWAPool investors.
+
+``MockRWAPool.distributeYield`` only emits ``YieldDistributed(totalAmount)``;
+this module works out who gets what. Indexed ``Invested`` events are
+aggregated into one stake per investor, and the distribution is split in
+integer base units:
+
+    payout_i = floor(total_amount * stake_i / total_stake)
+
+The floors leave at most ``n_investors - 1`` units of dust, which is either
+handed out one unit at a time to the largest fractional remainders
+(``largest_remainder``, so payouts sum exactly to the distributed amount)
+or kept in the pool (``retain``).
+
+All arithmetic is vectorized with NumPy. When the products fit in int64 the
+fast path runs on native integers; wei-sized amounts fall back to exact
+Python integers held in object arrays.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DUST_POLICIES = ("largest_remainder", "retain")
+INT64_MAX = np.iinfo(np.int64).max
+
+
+def _to_int_array(values: Sequence[Any]) -> np.ndarray:
+    """Parse base-unit amounts (ints or decimal strings) into int64 or exact object arrays."""
+    if isinstance(values, np.ndarray) and values.dtype.kind in "iu" and values.dtype.itemsize <= 8:
+        if values.dtype.kind == "i" and len(values) and values.min() < 0:
+            raise ValueError("Amounts must be non-negative")
+        if values.dtype == np.uint64 and len(values) and int(values.max()) > INT64_MAX:
+            return values.astype(object)
+        return values.astype(np.int64)
+    parsed = [int(v) for v in values]
+    if any(v < 0 for v in parsed):
+        raise ValueError("Amounts must be non-negative")
+    if parsed and max(parsed) > INT64_MAX:
+        return np.array(parsed, dtype=object)
+    return np.array(parsed, dtype=np.int64)
+
+
+def aggregate_stakes(investors: Sequence[str], amounts: Sequence[Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sum Invested event amounts per investor.
+
+    Args:
+        investors: Investor address per event
+        amounts: Invested amount per event in base units
+
+    Returns:
+        (unique lowercase investor addresses in first-seen order, stake per investor)
+    """
+    if len(investors) != len(amounts):
+        raise ValueError("investors and amounts must have the same length")
+    # Hash-based factorization; several times faster than np.unique's string sort
+    index: Dict[str, int] = {}
+    inverse = np.fromiter(
+        (index.setdefault(str(address).lower(), len(index)) for address in investors),
+        dtype=np.int64,
+        count=len(investors),
+    )
+    unique = np.array(list(index), dtype=str)
+    values = _to_int_array(amounts)
+
+    stakes = np.zeros(len(unique), dtype=values.dtype)
+    np.add.at(stakes, inverse, values)
+    if stakes.dtype == np.int64 and len(values) and int(values.max()) * len(values) > INT64_MAX:
+        # Sums may have wrapped; redo exactly
+        stakes = np.zeros(len(unique), dtype=object)
+        np.add.at(stakes, inverse, values.astype(object))
+    return unique, stakes
+
+
+def compute_pro_rata_payouts(
+    stakes: np.ndarray,
+    total_amount: int,
+    dust_policy: str = "largest_remainder",
+) -> Tuple[np.ndarray, int]:
+    """
+    Split ``total_amount`` across stakes in integer base units.
+
+    Args:
+        stakes: Stake per investor (int64 or object array of ints)
+        total_amount: Amount being distributed, in base units
+        dust_policy: "largest_remainder" or "retain"
+
+    Returns:
+        (payout per investor, undistributed dust)
+
+    Raises:
+        ValueError: If the policy is unknown or inputs are invalid
+    """
+    if dust_policy not in DUST_POLICIES:
+        raise ValueError(f"Unknown dust policy '{dust_policy}' (expected one of {', '.join(DUST_POLICIES)})")
+    total_amount = int(total_amount)
+    if total_amount < 0:
+        raise ValueError("total_amount must be non-negative")
+    if len(stakes) == 0:
+        return np.zeros(0, dtype=np.int64), total_amount
+
+    total_stake = int(stakes.sum())
+    if total_stake == 0:
+        return np.zeros(len(stakes), dtype=np.int64), total_amount
+
+    max_stake = int(stakes.max())
+    if stakes.dtype != object and total_amount * max_stake <= INT64_MAX and total_stake <= INT64_MAX:
+        products = stakes.astype(np.int64) * np.int64(total_amount)
+    else:
+        products = stakes.astype(object) * total_amount
+    # floor_divide/remainder have object loops (divmod does not)
+    payouts = products // total_stake
+    remainders = products % total_stake
+
+    dust = total_amount - int(payouts.sum())
+    if dust and dust_policy == "largest_remainder":
+        if remainders.dtype == object:
+            # Rank on remainder / total_stake scaled to 62 bits so the sort stays vectorized
+            rank_keys = (remainders * (1 << 62) // total_stake).astype(np.int64)
+        else:
+            rank_keys = remainders
+        # Largest remainder first; ties go to the larger stake, then the lower index
+        order = np.lexsort((np.arange(len(stakes)), -stakes.astype(float), -rank_keys))
+        payouts[order[:dust]] += 1
+        dust = 0
+    return payouts, dust
+
+
+def distribute_yield(
+    events: Iterable[Dict[str, Any]],
+    total_amount: Any,
+    dust_policy: str = "largest_remainder",
+) -> Dict[str, Any]:
+    """
+    Compute each investor's share of a yield distribution.
+
+    Args:
+        events: Invested events as dicts with "investor" and "amount" (base units)
+        total_amount: YieldDistributed totalAmount in base units
+        dust_policy: "largest_remainder" or "retain"
+
+    Returns:
+        Dict with per-investor stakes and payouts plus distribution totals
+    """
+    investors: List[str] = []
+    amounts: List[Any] = []
+    for event in events:
+        investors.append(event["investor"])
+        amounts.append(event["amount"])
+
+    unique, stakes = aggregate_stakes(investors, amounts)
+    payouts, dust = compute_pro_rata_payouts(stakes, int(total_amount), dust_policy)
+    return {
+        "investors": unique,
+        "stakes": stakes,
+        "payouts": payouts,
+        "total_amount": int(total_amount),
+        "total_stake": int(stakes.sum()) if len(stakes) else 0,
+        "distributed": int(payouts.sum()) if len(payouts) else 0,
+        "dust": dust,
+        "dust_policy": dust_policy,
+    }
+
+
+def payouts_to_records(result: Dict[str, Any], limit: Optional[int] = None) -> List[Dict[str, str]]:
+    """Convert a distribution result to JSON-safe records (amounts as decimal strings)."""
+    count = len(result["investors"]) if limit is None else min(limit, len(result["investors"]))
+    return [
+        {
+            "investor": str(result["investors"][i]),
+            "stake": str(int(result["stakes"][i])),
+            "payout": str(int(result["payouts"][i])),
+        }
+        for i in range(count)
+    ]